@@ -0,0 +1,58 @@
+"""add composite indexes for hot query paths
+
+Revision ID: 7c3e91d4a2b8
+Revises: 25f212107175
+Create Date: 2026-02-02 10:14:08.402611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e91d4a2b8'
+down_revision: Union[str, None] = '25f212107175'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nama index, tabel, kolom) — harus sama dengan __table_args__ di app/models.py
+INDEXES = [
+    ('ix_posts_moderation_status_created_at', 'posts', ['moderation_status', 'created_at', 'id']),
+    ('ix_posts_user_id_moderation_status', 'posts', ['user_id', 'moderation_status', 'created_at']),
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at']),
+    ('ix_connections_following_id', 'connections', ['following_id', 'created_at']),
+    ('ix_post_likes_post_id', 'post_likes', ['post_id']),
+    ('ix_blocked_users_blocked_id', 'blocked_users', ['blocked_id']),
+    ('ix_notifications_recipient_id_created_at', 'notifications', ['recipient_id', 'created_at']),
+    ('ix_chat_participants_user_id', 'chat_participants', ['user_id']),
+    ('ix_messages_chat_id_sent_at', 'messages', ['chat_id', 'sent_at']),
+    ('ix_appeals_content_id', 'appeals', ['content_id']),
+    ('ix_reports_status_created_at', 'reports', ['status', 'created_at']),
+    ('ix_bot_messages_bot_chat_id_sent_at', 'bot_messages', ['bot_chat_id', 'sent_at']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY tidak boleh berjalan di dalam transaksi,
+    # jadi tabel tetap bisa ditulis selama index dibangun di production.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True
+            )
@@ -0,0 +1,35 @@
+"""add media_variants table
+
+Revision ID: 9a4d2e6f1c3b
+Revises: 7c3e91d4a2b8
+Create Date: 2026-02-09 09:21:44.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d2e6f1c3b'
+down_revision: Union[str, None] = '7c3e91d4a2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_variants',
+    sa.Column('source', sa.String(length=1024), nullable=False),
+    sa.Column('format', sa.String(length=10), nullable=False),
+    sa.Column('sizes', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('media_variants')
@@ -0,0 +1,37 @@
+"""add media_blobs table for content-addressed uploads
+
+Revision ID: d81f5b27c6e0
+Revises: 9a4d2e6f1c3b
+Create Date: 2026-02-12 14:03:51.772940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f5b27c6e0'
+down_revision: Union[str, None] = '9a4d2e6f1c3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('ext', sa.String(length=10), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_media_blobs_ref_count_updated_at', 'media_blobs', ['ref_count', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_media_blobs_ref_count_updated_at', table_name='media_blobs')
+    op.drop_table('media_blobs')
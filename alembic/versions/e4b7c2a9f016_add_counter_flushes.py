@@ -0,0 +1,30 @@
+"""add counter_flushes table for idempotent counter flushes
+
+Revision ID: e4b7c2a9f016
+Revises: d81f5b27c6e0
+Create Date: 2026-02-14 09:21:07.415302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c2a9f016'
+down_revision: Union[str, None] = 'd81f5b27c6e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('counter_flushes',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('applied_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('counter_flushes')
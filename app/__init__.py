@@ -1,4 +1,5 @@
 import os
+import re
 import fcntl
 from flask import Flask, request
 from flask_apscheduler import APScheduler
@@ -25,12 +26,15 @@ from .routes.web_routes import web_bp
 from .routes.professional_routes import pro_bp
 from .routes.admin_pro_routes import admin_pro_bp
 from .routes.discover_routes import discover_bp
+from .routes.media_routes import media_bp, storage_static
 from flask import jsonify
 from .extensions import db, bcrypt, mail, socketio, limiter
 mail = Mail()
 
 scheduler = APScheduler() #obj
 
+HASHED_MEDIA_PATH = re.compile(r'/[0-9a-f]{64}\.[a-z0-9]+(\.[a-z0-9]+)?$')
+
 def create_app():
     flask_instance = Flask(__name__)
     flask_instance.config.from_object(Config)
@@ -65,13 +69,29 @@ def create_app():
     flask_instance.register_blueprint(pro_bp, url_prefix='/api/pro')
     flask_instance.register_blueprint(admin_pro_bp)
     flask_instance.register_blueprint(discover_bp, url_prefix='/api/discover')
+    flask_instance.register_blueprint(media_bp)
+
+    # Media di object storage: /static/<key> yang tidak ada di disk diarahkan ke bucket.
+    from .services.storage import STORAGE_BACKEND
+    if STORAGE_BACKEND != 'local':
+        flask_instance.view_functions['static'] = storage_static
 
     flask_instance.config['MAIL_DEBUG'] = False
 
     @flask_instance.after_request
     def add_header(response):
-        if request.path.startswith('/static/'):
-            response.headers['Cache-Control'] = 'public, max-age=31536000'
+        if response.status_code in (301, 302, 303, 307, 308):
+            # Redirect media ke object storage mengatur Cache-Control sendiri.
+            return response
+        if request.path.startswith(('/static/uploads/', '/static/variants/')):
+            # Nama file upload unik (hash isi untuk upload baru), jadi isinya tidak pernah berubah.
+            if HASHED_MEDIA_PATH.search(request.path):
+                response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            else:
+                response.headers['Cache-Control'] = 'public, max-age=31536000'
+        elif request.path.startswith('/static/'):
+            # JS/CSS/gambar aplikasi tidak berversi: cache pendek supaya perubahan cepat sampai.
+            response.headers['Cache-Control'] = 'public, max-age=3600'
         return response
 
     @flask_instance.context_processor
@@ -87,10 +107,33 @@ def create_app():
     
     from . import socket_events 
 
+    from .commands import register_commands
+    register_commands(flask_instance)
+
+    # Dengan gunicorn preload_app, scheduler dijalankan di worker (post_worker_init),
+    # bukan di master, karena thread scheduler tidak ikut ter-fork.
+    if os.environ.get('DEFER_SCHEDULER', 'false').lower() != 'true':
+        start_scheduler(flask_instance)
+
+    @flask_instance.errorhandler(429)
+    def ratelimit_handler(e):
+        return jsonify({
+           "error": "Terlalu banyak permintaan",
+            "message": "Tenang ya, server butuh istirahat sejenak. Coba lagi nanti.",
+            "retry_after": e.description
+        }), 429
+
+
+    return flask_instance
+
+
+def start_scheduler(flask_instance):
     if not flask_instance.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
         f = open("scheduler.lock", "wb")
         try:
             fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # Simpan handle-nya: lock lepas begitu file tertutup oleh garbage collector.
+            flask_instance.extensions['scheduler_lock'] = f
             scheduler.init_app(flask_instance)
             scheduler.start()
             
@@ -102,16 +145,48 @@ def create_app():
                 trigger='interval',
                 hours=1
             )
-        except BlockingIOError:
-            pass
 
-    @flask_instance.errorhandler(429)
-    def ratelimit_handler(e):
-        return jsonify({
-           "error": "Terlalu banyak permintaan",
-            "message": "Tenang ya, server butuh istirahat sejenak. Coba lagi nanti.",
-            "retry_after": e.description
-        }), 429
+            from app.tasks import flush_post_counters_task, reconcile_post_counters_task
+            scheduler.add_job(
+                id='flush_post_counters',
+                func=flush_post_counters_task,
+                args=[flask_instance],
+                trigger='interval',
+                seconds=10
+            )
+            scheduler.add_job(
+                id='reconcile_post_counters',
+                func=reconcile_post_counters_task,
+                args=[flask_instance],
+                trigger='interval',
+                hours=6
+            )
 
+            from app.tasks import rescore_hot_feed_task
+            scheduler.add_job(
+                id='rescore_hot_feed',
+                func=rescore_hot_feed_task,
+                args=[flask_instance],
+                trigger='interval',
+                minutes=10
+            )
 
-    return flask_instance
+            from app.tasks import evict_media_cache_task
+            scheduler.add_job(
+                id='evict_media_cache',
+                func=evict_media_cache_task,
+                args=[flask_instance],
+                trigger='interval',
+                minutes=10
+            )
+
+            from app.tasks import collect_media_garbage_task
+            scheduler.add_job(
+                id='collect_media_garbage',
+                func=collect_media_garbage_task,
+                args=[flask_instance],
+                trigger='interval',
+                hours=1
+            )
+        except BlockingIOError:
+            pass
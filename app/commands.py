@@ -0,0 +1,227 @@
+import click
+from flask.cli import AppGroup
+from .extensions import db
+from .models import Connection
+
+timeline_cli = AppGroup('timeline', help="Kelola timeline 'following' di Redis.")
+
+
+@timeline_cli.command('rebuild')
+@click.option('--user-id', 'user_ids', multiple=True, help="UUID user yang timeline-nya dibangun ulang (boleh berulang).")
+@click.option('--all', 'rebuild_all', is_flag=True, help="Bangun ulang untuk semua user yang mengikuti minimal satu akun.")
+def rebuild_timeline_command(user_ids, rebuild_all):
+    from .services.timeline_service import rebuild_timeline
+
+    if rebuild_all:
+        user_ids = [row.follower_id for row in db.session.query(Connection.follower_id).distinct()]
+
+    if not user_ids:
+        raise click.UsageError("Berikan --user-id atau --all.")
+
+    total = 0
+    for user_id in user_ids:
+        count = rebuild_timeline(user_id)
+        total += count
+        click.echo(f"{user_id}: {count} post")
+
+    click.echo(f"Selesai: {len(user_ids)} timeline, {total} entri.")
+
+
+counters_cli = AppGroup('counters', help="Kelola counter like/komentar post.")
+
+
+@counters_cli.command('flush')
+def flush_counters_command():
+    from .services.counter_service import flush_pending_counters
+
+    click.echo(f"Flush selesai: {flush_pending_counters()} post diperbarui.")
+
+
+@counters_cli.command('reconcile')
+@click.option('--post-id', 'post_ids', multiple=True, help="UUID post yang dihitung ulang (boleh berulang).")
+@click.option('--all', 'all_posts', is_flag=True, help="Hitung ulang semua post, bukan hanya 30 hari terakhir.")
+def reconcile_counters_command(post_ids, all_posts):
+    from .services.counter_service import reconcile_counters
+
+    click.echo(f"Rekonsiliasi selesai: {reconcile_counters(post_ids, all_posts)} post dihitung ulang.")
+
+
+ranking_cli = AppGroup('ranking', help="Kelola ranking feed 'for_you'.")
+
+
+@ranking_cli.command('rescore')
+def rescore_ranking_command():
+    from .services.ranking_service import rescore_hot_feed
+
+    click.echo(f"Rescore selesai: {rescore_hot_feed()} post di ranking.")
+
+
+models_cli = AppGroup('models', help="Kelola model ONNX (load lazy + warmup).")
+
+
+@models_cli.command('warmup')
+@click.option('--name', 'names', multiple=True, help="Nama model (boleh berulang); default semua.")
+def warmup_models_command(names):
+    from .services.model_registry import warmup
+
+    for status in warmup(list(names) or None):
+        _echo_model_status(status)
+
+
+@models_cli.command('status')
+def model_status_command():
+    from .services.model_registry import model_status
+
+    for status in model_status():
+        _echo_model_status(status)
+
+
+def _echo_model_status(status):
+    if status['error']:
+        click.echo(f"{status['name']}: GAGAL ({status['error']})")
+    elif status['loaded']:
+        click.echo(f"{status['name']}: load {status['load_ms']} ms, warmup {status['warmup_ms']} ms")
+    else:
+        click.echo(f"{status['name']}: belum dimuat")
+
+
+moderation_cli = AppGroup('moderation', help="Moderasi ulang post/komentar lama dengan model terbaru.")
+
+
+@moderation_cli.command('rescan')
+@click.option('--target', type=click.Choice(['posts', 'comments']), default='posts', show_default=True)
+@click.option('--dry-run', is_flag=True, help="Hanya hitung verdict yang akan berubah, tanpa menulis ke database.")
+@click.option('--batch-size', type=int, default=None, help="Jumlah baris per batch (default REMODERATION_BATCH_SIZE).")
+@click.option('--concurrency', type=int, default=None, help="Jumlah batch yang diklasifikasi paralel.")
+@click.option('--rate', 'target_rate', type=float, default=None, help="Target throughput item/detik (0 = tanpa batas).")
+@click.option('--restart', is_flag=True, help="Abaikan checkpoint dan mulai dari awal.")
+@click.option('--limit', type=int, default=None, help="Berhenti setelah N item (untuk uji coba).")
+def rescan_command(target, dry_run, batch_size, concurrency, target_rate, restart, limit):
+    from .services.remoderation_service import run_remoderation, RemoderationBusy
+
+    def progress(state):
+        click.echo(f"{state['processed']} item, {state['changed']} berubah, {state.get('rate', 0)} item/detik")
+
+    try:
+        state = run_remoderation(
+            target, dry_run=dry_run, batch_size=batch_size, concurrency=concurrency,
+            target_rate=target_rate, restart=restart, limit=limit, progress=progress
+        )
+    except RemoderationBusy as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f"Selesai ({state['status']}): {state['processed']} item, {state['changed']} verdict berubah.")
+    for transition, count in sorted(state.get('transitions', {}).items()):
+        click.echo(f"  {transition}: {count}")
+
+
+@moderation_cli.command('status')
+def rescan_status_command():
+    from .services.remoderation_service import job_status
+
+    for target, states in job_status().items():
+        for mode, state in states.items():
+            if state:
+                click.echo(f"{target} [{mode}]: {state.get('status')} - {state.get('processed', 0)} item, "
+                           f"{state.get('changed', 0)} berubah, model {state.get('model_version')}")
+
+
+@moderation_cli.command('cancel')
+@click.option('--target', type=click.Choice(['posts', 'comments']), required=True)
+def rescan_cancel_command(target):
+    from .services.remoderation_service import request_cancel
+
+    request_cancel(target)
+    click.echo(f"Permintaan pembatalan {target} dikirim.")
+
+
+media_cli = AppGroup('media', help="Kelola penyimpanan, varian, dan cache gambar upload.")
+
+
+@media_cli.command('backfill-variants')
+@click.option('--force', is_flag=True, help="Buat ulang varian walaupun sudah tercatat.")
+@click.option('--limit', type=int, default=None, help="Berhenti setelah N gambar diproses.")
+def backfill_variants_command(force, limit):
+    from .services.media_variant_service import backfill_variants
+
+    def progress(source, done, skipped, failed):
+        if (done + failed) % 100 == 0:
+            click.echo(f"{done} dibuat, {failed} gagal, {skipped} dilewati (terakhir: {source})")
+
+    done, skipped, failed = backfill_variants(force=force, limit=limit, progress=progress)
+    click.echo(f"Selesai: {done} gambar dibuatkan varian, {failed} gagal, {skipped} sudah ada.")
+
+
+@media_cli.command('evict-cache')
+@click.option('--max-mb', type=int, default=None, help="Kapasitas cache (default MEDIA_CACHE_MAX_MB).")
+def evict_media_cache_command(max_mb):
+    from .services.media_resize_service import evict_cache
+
+    result = evict_cache(max_bytes=max_mb * 1024 * 1024 if max_mb else None)
+    if result is None:
+        raise click.ClickException("Eviction lain sedang berjalan.")
+    click.echo(f"{result['removed']} file dihapus ({result['removed_bytes'] / 1024 / 1024:.1f} MB); "
+               f"sisa {result['files']} file, {result['bytes'] / 1024 / 1024:.1f} MB.")
+
+
+@media_cli.command('gc')
+@click.option('--limit', type=int, default=500, help="Maksimal blob yang dihapus per batch.")
+def media_gc_command(limit):
+    from .services.media_store import collect_garbage
+
+    total = total_bytes = 0
+    while True:
+        count, freed = collect_garbage(limit=limit)
+        total += count
+        total_bytes += freed
+        if count < limit:
+            break
+    click.echo(f"{total} blob tanpa referensi dihapus ({total_bytes / 1024 / 1024:.1f} MB).")
+
+
+@media_cli.command('migrate-storage')
+@click.option('--folder', 'folders', multiple=True,
+              default=['uploads', 'variants', 'reject', 'pending', 'quarantine', 'verifications'],
+              show_default=True, help="Folder static yang disalin (boleh berulang).")
+@click.option('--dry-run', is_flag=True, help="Hanya hitung file yang belum ada di storage tujuan.")
+def migrate_storage_command(folders, dry_run):
+    from .services.storage import get_storage, create_storage
+
+    source, target = create_storage('local'), get_storage()
+    if target.is_local:
+        raise click.ClickException("MEDIA_STORAGE masih 'local'; set ke 's3' untuk menyalin ke bucket.")
+
+    copied = skipped = total_bytes = 0
+    for folder in folders:
+        for key, size, _ in source.list(folder):
+            if target.exists(key):
+                skipped += 1
+                continue
+            if not dry_run:
+                with source.open(key) as f:
+                    target.put(key, f)
+            copied += 1
+            total_bytes += size
+            if copied % 500 == 0:
+                click.echo(f"{copied} file disalin (terakhir: {key})")
+    verb = "akan disalin" if dry_run else "disalin"
+    click.echo(f"Selesai: {copied} file {verb} ({total_bytes / 1024 / 1024:.1f} MB), {skipped} sudah ada.")
+
+
+@media_cli.command('recount')
+def media_recount_command():
+    from .services.media_store import recount
+
+    result = recount()
+    click.echo(f"ref_count diperbarui untuk {result['updated']} blob, {result['registered']} file tanpa row didaftarkan, "
+               f"{result['moved']} file dipindah ke folder statusnya, "
+               f"{result['missing_files']} referensi menunjuk file yang tidak ada.")
+
+
+def register_commands(app):
+    app.cli.add_command(timeline_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(ranking_cli)
+    app.cli.add_command(models_cli)
+    app.cli.add_command(moderation_cli)
+    app.cli.add_command(media_cli)
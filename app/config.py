@@ -24,4 +24,12 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_USERNAME')
 
     HF_SPACE_URL = os.environ.get('HF_SPACE_URL')
-    AMICA_API_KEY = os.environ.get('AMICA_API_KEY')
\ No newline at end of file
+    AMICA_API_KEY = os.environ.get('AMICA_API_KEY')
+
+    # Jika aktif, POST /api/posts menyimpan post sebagai 'pending' dan moderasi
+    # dijalankan oleh moderation_worker.py (lihat services/post_moderation_service.py).
+    ASYNC_POST_MODERATION = os.environ.get('ASYNC_POST_MODERATION', 'false').lower() == 'true'
+
+    # Muat dan panaskan model ONNX saat worker web start (run.py), bukan pada
+    # request pertama. Proses lain (CLI, Alembic, script) tetap memuat secara lazy.
+    WARMUP_MODELS = os.environ.get('WARMUP_MODELS', 'true').lower() == 'true'
@@ -54,6 +54,11 @@ class Post(db.Model):
     likes_count = db.Column(db.Integer, default=0)
     comments_count = db.Column(db.Integer, default=0)
 
+    __table_args__ = (
+        db.Index('ix_posts_moderation_status_created_at', 'moderation_status', 'created_at', 'id'),
+        db.Index('ix_posts_user_id_moderation_status', 'user_id', 'moderation_status', 'created_at'),
+    )
+
 
 class Comment(db.Model):
     __tablename__ = 'comments'
@@ -74,12 +79,16 @@ class Comment(db.Model):
         cascade="all, delete-orphan"
     )
 
+    __table_args__ = (db.Index('ix_comments_post_id_created_at', 'post_id', 'created_at'),)
+
 class Connection(db.Model):
     __tablename__ = 'connections'
     follower_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
     following_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (db.Index('ix_connections_following_id', 'following_id', 'created_at'),)
+
 class SavedPost(db.Model):
     __tablename__ = 'saved_posts'
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
@@ -98,6 +107,8 @@ class PostLike(db.Model):
     post_id = db.Column(UUID(as_uuid=True), db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (db.Index('ix_post_likes_post_id', 'post_id'),)
+
 class Article(db.Model):
     __tablename__ = 'articles'
     id = db.Column(db.Integer, primary_key=True)
@@ -136,7 +147,10 @@ class BlockedUser(db.Model):
     blocked_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
-    __table_args__ = (db.UniqueConstraint('blocker_id', 'blocked_id', name='_blocker_blocked_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('blocker_id', 'blocked_id', name='_blocker_blocked_uc'),
+        db.Index('ix_blocked_users_blocked_id', 'blocked_id'),
+    )
 
     blocker = db.relationship("User", foreign_keys=[blocker_id], backref="blocking_relationships")
     blocked_user = db.relationship("User", foreign_keys=[blocked_id], backref="blocked_by_relationships")
@@ -165,6 +179,8 @@ class Report(db.Model):
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (db.Index('ix_reports_status_created_at', 'status', 'created_at'),)
+
 class Appeal(db.Model):
     __tablename__ = 'appeals'
     id = db.Column(db.Integer, primary_key=True)
@@ -177,6 +193,8 @@ class Appeal(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     reviewed_at = db.Column(db.DateTime(timezone=True))
 
+    __table_args__ = (db.Index('ix_appeals_content_id', 'content_id'),)
+
 class Chat(db.Model):
     __tablename__ = 'chats'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -206,6 +224,8 @@ class ChatParticipant(db.Model):
         backref=db.backref('chat_participations', cascade="all, delete-orphan", passive_deletes=True)
     )
 
+    __table_args__ = (db.Index('ix_chat_participants_user_id', 'user_id'),)
+
 class GroupBannedUser(db.Model):
     __tablename__ = 'group_banned_users'
     group_id = db.Column(UUID(as_uuid=True), db.ForeignKey('chats.id', ondelete='CASCADE'), primary_key=True)
@@ -228,6 +248,8 @@ class Message(db.Model):
     
     sender = db.relationship('User', foreign_keys=[sender_id])
     reply_to = db.relationship('Message', remote_side=[id], backref='replies')
+
+    __table_args__ = (db.Index('ix_messages_chat_id_sent_at', 'chat_id', 'sent_at'),)
     
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
@@ -265,6 +287,8 @@ class BotMessage(db.Model):
     sent_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     sources = db.Column(JSONB, nullable=True)
 
+    __table_args__ = (db.Index('ix_bot_messages_bot_chat_id_sent_at', 'bot_chat_id', 'sent_at'),)
+
 class Notification(db.Model):
     __tablename__ = 'notifications'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -291,25 +315,46 @@ class Notification(db.Model):
         backref=db.backref('notifications_sent', cascade="all, delete-orphan", passive_deletes=True)
     )
 
-    def to_dict(self):
-        from flask import url_for
-        from app.utils.image_utils import generate_thumbnail
+    __table_args__ = (db.Index('ix_notifications_recipient_id_created_at', 'recipient_id', 'created_at'),)
 
-        is_moderation = self.type in ['post_rejected', 'appeal_approved', 'appeal_rejected', 'system']
+    @staticmethod
+    def related_images(notifications):
+        """URL thumbnail post untuk notifikasi like/komentar, {reference_id: url}.
+
+        Satu query untuk post dan satu untuk varian, dipakai oleh daftar notifikasi
+        (to_dict(related_images=...)) agar tidak ada query per notifikasi.
+        """
+        from flask import url_for
+        from app.services.media_variant_service import variant_static_path, prefetch_variants
+
+        reference_ids = set()
+        for notif in notifications:
+            if notif.type in ['like', 'comment'] and notif.reference_id:
+                try:
+                    reference_ids.add(uuid.UUID(notif.reference_id))
+                except ValueError:
+                    pass
+        if not reference_ids:
+            return {}
+
+        images = {
+            str(post_id): image_url
+            for post_id, image_url in db.session.query(Post.id, Post.image_url).filter(Post.id.in_(reference_ids))
+            if image_url
+        }
+        variants = prefetch_variants(images.values())
+        related = {}
+        for reference_id, image_url in images.items():
+            static_path = variant_static_path(image_url, 128, variants)
+            related[reference_id] = url_for('static', filename=static_path, _external=True) if static_path else image_url
+        return related
+
+    def to_dict(self, related_images=None):
+        is_moderation = self.type in ['post_rejected', 'moderation_delayed', 'appeal_approved', 'appeal_rejected', 'system']
     
-        related_image = None
-        if self.type in ['like', 'comment'] and self.reference_id:
-            from .models import Post
-            try:
-                post = Post.query.filter_by(id=self.reference_id).first()
-                if post and post.image_url:
-                    thumb_path = generate_thumbnail(post.image_url, size=(128, 128))
-                    if thumb_path:
-                        related_image = url_for('static', filename=thumb_path, _external=True)
-                    else:
-                        related_image = url_for('static', filename=f"uploads/{post.image_url}", _external=True)
-            except:
-                pass
+        if related_images is None:
+            related_images = Notification.related_images([self])
+        related_image = related_images.get(self.reference_id) if self.reference_id else None
 
         return {
             'id': str(self.id),
@@ -394,6 +439,47 @@ class QuarantinedItem(db.Model):
 
 
 
+class MediaBlob(db.Model):
+    __tablename__ = 'media_blobs'
+    # File upload disimpan sekali per isi: static/uploads/<sha256>.<ext>
+    sha256 = db.Column(db.String(64), primary_key=True)
+    ext = db.Column(db.String(10), nullable=False)
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    # Jumlah kolom (post, avatar, banner, grup, karantina) yang menunjuk ke file ini
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    # 'uploads', 'pending', 'reject' atau 'quarantine' (dulu berupa folder)
+    status = db.Column(db.String(20), nullable=False, default='uploads')
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (db.Index('ix_media_blobs_ref_count_updated_at', 'ref_count', 'updated_at'),)
+
+    @property
+    def name(self):
+        return f"{self.sha256}.{self.ext}"
+
+
+
+class MediaVariant(db.Model):
+    __tablename__ = 'media_variants'
+    # Nama file relatif terhadap static/uploads (mis. 'abc.jpg' atau 'articles/art_x.jpg')
+    source = db.Column(db.String(1024), primary_key=True)
+    format = db.Column(db.String(10), nullable=False) # 'webp' atau 'jpeg'
+    sizes = db.Column(ARRAY(db.Integer), nullable=False) # ukuran varian yang sudah ditulis
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+
+class CounterFlush(db.Model):
+    __tablename__ = 'counter_flushes'
+    # Id batch delta counter yang sudah diterapkan ke posts (lihat counter_service.flush_pending_counters)
+    id = db.Column(db.String(36), primary_key=True)
+    applied_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+
 class RAGTestCase(db.Model):
     __tablename__ = 'rag_test_cases'
     id = db.Column(db.Integer, primary_key=True)
@@ -1,6 +1,14 @@
-from flask import Blueprint, jsonify, request, Response, stream_with_context
+import os
+from flask import Blueprint, jsonify, request, Response, stream_with_context, current_app
 from app.services.ai_service import AIService
 from app.services.scoring_service import ScoringService
+from app.services.inference_executor import is_remote, local_stats, remote_stats, InferenceUnavailable
+from app.services.model_registry import model_status, warmup
+from app.services.worker_stats import worker_memory_report
+from app.services.media_resize_service import cache_stats as media_cache_stats
+from app.services import remoderation_service
+from app.services.post_moderation_service import dead_letters, retry_dead_letter
+from app.extensions import socketio
 from app.utils.decorators import admin_required
 from app.models import db, RAGTestCase, RAGBenchmarkResult
 from app.models import Article
@@ -18,6 +26,129 @@ def ingest_auto(current_user):
 def get_ai_stats(current_user):
     return jsonify(AIService.get_stats())
 
+@ai_bp.route('/inference-stats', methods=['GET'])
+@admin_required
+def get_inference_stats(current_user):
+    reset = request.args.get('reset') == 'true'
+    if is_remote():
+        try:
+            return jsonify({**remote_stats(reset=reset), "remote": True})
+        except InferenceUnavailable as e:
+            return jsonify({"error": str(e)}), 503
+    return jsonify(local_stats(reset=reset))
+
+@ai_bp.route('/models', methods=['GET'])
+@admin_required
+def get_model_status(current_user):
+    return jsonify({"models": model_status(), "remote": is_remote()})
+
+@ai_bp.route('/models/warmup', methods=['POST'])
+@admin_required
+def warmup_models(current_user):
+    return jsonify({"models": warmup()})
+
+@ai_bp.route('/workers/memory', methods=['GET'])
+@admin_required
+def get_worker_memory(current_user):
+    return jsonify(worker_memory_report())
+
+@ai_bp.route('/media-cache', methods=['GET'])
+@admin_required
+def get_media_cache_stats(current_user):
+    return jsonify(media_cache_stats(reset=request.args.get('reset') == 'true'))
+
+@ai_bp.route('/remoderation', methods=['GET'])
+@admin_required
+def get_remoderation_status(current_user):
+    return jsonify(remoderation_service.job_status())
+
+# (tipe, nilai minimum, nilai maksimum) untuk opsi job moderasi ulang; None = default service.
+REMODERATION_OPTIONS = {
+    'batch_size': (int, 1, 5000),
+    'concurrency': (int, 1, 16),
+    'target_rate': (float, 0, None),
+    'limit': (int, 1, None),
+}
+
+def _parse_remoderation_options(data):
+    """Validasi dan konversi opsi numerik dari body JSON. Mengembalikan (opsi, pesan error)."""
+    options = {}
+    for name, (cast, minimum, maximum) in REMODERATION_OPTIONS.items():
+        value = data.get(name)
+        if value is None:
+            options[name] = None
+            continue
+        if isinstance(value, bool):
+            return None, f"{name} harus berupa angka"
+        try:
+            number = cast(value)
+        except (TypeError, ValueError):
+            return None, f"{name} harus berupa angka"
+        if cast is int and isinstance(value, float) and not value.is_integer():
+            return None, f"{name} harus bilangan bulat"
+        if number != number or number < minimum or (maximum is not None and number > maximum):
+            bounds = f"{minimum}..{maximum}" if maximum is not None else f">= {minimum}"
+            return None, f"{name} harus dalam rentang {bounds}"
+        options[name] = number
+    return options, None
+
+@ai_bp.route('/remoderation', methods=['POST'])
+@admin_required
+def start_remoderation(current_user):
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body harus berupa objek JSON"}), 400
+    target = data.get('target', 'posts')
+    dry_run = bool(data.get('dry_run', False))
+    if target not in remoderation_service.TARGETS:
+        return jsonify({"error": f"target harus salah satu dari {', '.join(remoderation_service.TARGETS)}"}), 400
+    options, error = _parse_remoderation_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if remoderation_service.is_running(target, dry_run):
+        return jsonify({"error": f"Moderasi ulang {target} sedang berjalan"}), 409
+
+    app = current_app._get_current_object() # type: ignore
+
+    # Inferensi berjalan di proses ini (atau di sidecar jika INFERENCE_SOCKET_PATH
+    # di-set). Untuk backfill besar, lebih baik pakai CLI: flask moderation rescan.
+    def run():
+        with app.app_context():
+            try:
+                remoderation_service.run_remoderation(
+                    target, dry_run=dry_run, restart=bool(data.get('restart', False)), **options
+                )
+            except Exception as e:
+                print(f"[Remoderation] Job {target} gagal: {e}")
+            finally:
+                db.session.remove()
+
+    socketio.start_background_task(run)
+    return jsonify({"message": f"Moderasi ulang {target} dimulai", "dry_run": dry_run}), 202
+
+@ai_bp.route('/remoderation/<target>', methods=['DELETE'])
+@admin_required
+def cancel_remoderation(current_user, target):
+    if target not in remoderation_service.TARGETS:
+        return jsonify({"error": "Target tidak dikenal"}), 400
+    remoderation_service.request_cancel(target)
+    return jsonify({"message": f"Permintaan pembatalan {target} dikirim"})
+
+@ai_bp.route('/moderation/dead-letters', methods=['GET'])
+@admin_required
+def get_moderation_dead_letters(current_user):
+    return jsonify(dead_letters())
+
+@ai_bp.route('/moderation/dead-letters/<post_id>/retry', methods=['POST'])
+@admin_required
+def retry_moderation_dead_letter(current_user, post_id):
+    if not retry_dead_letter(post_id):
+        return jsonify({"error": "Post tidak ada di dead-letter"}), 404
+    return jsonify({"message": "Post dimasukkan kembali ke antrean moderasi"})
+
 @ai_bp.route('/rag-data', methods=['GET'])
 @admin_required
 def get_rag_data(current_user):
@@ -1,8 +1,8 @@
-import os
-from flask import Blueprint, jsonify, request, send_file, current_app, render_template
+from flask import Blueprint, jsonify, request, send_file, render_template
 import io
 from ..models import db, ProfessionalProfile, User
-from ..services.professional_service import ProfessionalService
+from ..services.professional_service import ProfessionalService, VERIFICATION_FOLDER
+from ..services.storage import get_storage, clean_key
 from ..utils.decorators import admin_required
 
 admin_pro_bp = Blueprint('admin_pro', __name__, url_prefix='/api/admin/pro')
@@ -57,15 +57,12 @@ def get_pending_applications(current_user):
 @admin_pro_bp.route('/view-document/<string:filename>', methods=['GET'])
 @admin_required
 def view_encrypted_document(current_user, filename):
-    upload_folder = os.path.join(current_app.root_path, 'static', 'verifications')
-    file_path = os.path.join(upload_folder, filename)
-
-    if not os.path.exists(file_path):
+    try:
+        encrypted_data = get_storage().read(clean_key(f"{VERIFICATION_FOLDER}/{filename}"))
+    except (FileNotFoundError, ValueError):
         return jsonify({"error": "File tidak ditemukan"}), 404
 
     try:
-        with open(file_path, 'rb') as f:
-            encrypted_data = f.read()
         decrypted_data = pro_service._decrypt(encrypted_data)
         return send_file(
             io.BytesIO(decrypted_data),
@@ -1,8 +1,6 @@
-import os
 import uuid
 from datetime import datetime, timezone, timedelta
-from flask import Blueprint, render_template, jsonify, request, current_app
-from werkzeug.utils import secure_filename
+from flask import Blueprint, render_template, jsonify, request
 from sqlalchemy import func
 from ..models import db, User, Report, Feedback, Post, Comment, AuditLog
 from ..utils.decorators import admin_required
@@ -10,7 +8,12 @@ from ..utils.logger import record_log
 from ..routes.auth_routes import bcrypt
 from firebase_admin import auth as firebase_auth
 from ..services.notif_manager import create_notification
-import shutil
+from ..services.timeline_service import fan_out_post, remove_post
+from ..services.feed_service import invalidate_feed_cache
+from ..services.ranking_service import index_post, unindex_post
+from ..services.post_detail_service import invalidate_post_detail, invalidate_author_post_details
+from ..services.media_variant_service import save_upload, ensure_variants, delete_variants
+from ..services.media_store import set_status, release, is_hashed
 from sqlalchemy import func, desc
 from ..models import QuarantinedItem
 
@@ -305,9 +308,12 @@ def delete_user_by_admin(current_user, user_id):
             'role': user_to_delete.role
         }
         username_backup = user_to_delete.username
+        deleted_user_id = user_to_delete.id
 
         db.session.delete(user_to_delete)
         db.session.commit()
+        invalidate_feed_cache()
+        invalidate_author_post_details(deleted_user_id)
 
         record_log(
             actor_id=current_user.id,
@@ -509,15 +515,12 @@ def update_profile(current_user):
         
         file = request.files.get('avatar')
         if file and file.filename:
-            filename = secure_filename(file.filename)
-            upload_folder = os.path.join(current_app.root_path, 'static/uploads')
-            if not os.path.exists(upload_folder): os.makedirs(upload_folder)
-            
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            file.save(os.path.join(upload_folder, unique_filename))
-            current_user.avatar_url = unique_filename
+            old_avatar = current_user.avatar_url
+            current_user.avatar_url = save_upload(file.read(), file.filename)
+            release(old_avatar)
 
         db.session.commit()
+        invalidate_author_post_details(current_user.id)
 
         user_data = {
             'id': str(current_user.id),
@@ -856,7 +859,6 @@ def revert_activity(current_user, log_id):
     
 
 
-import shutil
 
 @admin_bp.route('/appeals', methods=['GET'])
 @admin_required
@@ -904,32 +906,31 @@ def handle_appeal_action(current_user, appeal_id):
             db.session.commit()
             return jsonify({'error': 'Konten terkait sudah tidak ada'}), 404
 
-        reject_folder = os.path.join(current_app.root_path, 'static', 'reject')
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads')
         filename = post.image_url
 
         if action == 'approved':
             if filename:
-                src = os.path.join(reject_folder, filename)
-                dst = os.path.join(upload_folder, filename)
-                if os.path.exists(src):
-                    shutil.move(src, dst)
+                post.image_url = set_status(filename, 'uploads')
+                ensure_variants(post.image_url)
             post.moderation_status = 'approved'
             app.status = 'approved'
             notif_type = 'appeal_approved'
         else:
-            if filename:
-                path = os.path.join(reject_folder, filename)
-                if os.path.exists(path):
-                    os.remove(path)
             post.moderation_status = 'final_rejected'
             post.image_url = None
+            release(filename, legacy_folder='reject')
             app.status = 'rejected'
             notif_type = 'appeal_rejected'
 
         app.admin_note = admin_note
         app.reviewed_at = datetime.now(timezone.utc)
         db.session.commit()
+        invalidate_post_detail(post.id)
+
+        if action == 'approved':
+            fan_out_post(post)
+            index_post(post)
+            invalidate_feed_cache()
 
         create_notification(
             recipient_id=app.user_id,
@@ -946,24 +947,16 @@ def handle_appeal_action(current_user, appeal_id):
 
 
 def move_file_to_quarantine(filename):
+    # File hash tetap bernama sama: referensinya berpindah dari post/user ke
+    # QuarantinedItem (ref_count tetap). set_status memindahkannya ke folder
+    # quarantine beserta menghapus variannya, kecuali file yang sama masih
+    # dipakai konten lain yang publik.
     if not filename: return None
-    
-    upload_folder = os.path.join(current_app.root_path, 'static/uploads')
-    quarantine_folder = os.path.join(current_app.root_path, 'static/quarantine')
-    
-    if not os.path.exists(quarantine_folder):
-        os.makedirs(quarantine_folder)
-        
-    src = os.path.join(upload_folder, filename)
-    
-    ext = filename.split('.')[-1]
-    safe_name = f"{uuid.uuid4().hex}.{ext}"
-    dst = os.path.join(quarantine_folder, safe_name)
-    
-    if os.path.exists(src):
-        shutil.move(src, dst)
-        return safe_name
-    return None
+
+    quarantined = set_status(filename, 'quarantine')
+    if not is_hashed(filename):
+        delete_variants(filename)
+    return quarantined
 
 @admin_bp.route('/reports/action/quarantine-post', methods=['POST'])
 @admin_required
@@ -998,6 +991,10 @@ def action_quarantine_post(current_user):
             .update({Report.status: 'resolved'})
 
         db.session.commit()
+        remove_post(post.id, post.user_id)
+        unindex_post(post.id)
+        invalidate_post_detail(post.id)
+        invalidate_feed_cache()
 
         create_notification(
             recipient_id=post.user_id,
@@ -1140,6 +1137,7 @@ def action_sanitize_user(current_user):
             .update({Report.status: 'resolved'})
 
         db.session.commit()
+        invalidate_author_post_details(target_user.id)
 
         create_notification(
             recipient_id=target_user.id, sender_id=current_user.id, type='system', 
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from ..models import Article, User, db
 from ..extensions import limiter 
+from ..utils.pagination import keyset_paginate, InvalidCursor
 api_bp = Blueprint('public_api', __name__, url_prefix='/api')
 
 @api_bp.route('/articles', methods=['GET'])
@@ -24,14 +25,39 @@ def get_public_articles():
         if is_featured_param:
             query = query.filter(Article.is_featured == True)
 
-        pagination = query.order_by(Article.created_at.desc()).paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        cursor = request.args.get('cursor')
+        next_cursor = None
+        if cursor is not None:
+            try:
+                keyset_page = keyset_paginate(query, Article.created_at, Article.id, cursor, per_page)
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            articles = keyset_page.items
+            next_cursor = keyset_page.next_cursor
+            pagination_data = {
+                'total': None,
+                'pages': None,
+                'current_page': None,
+                'has_next': keyset_page.has_next,
+                'has_prev': bool(cursor)
+            }
+        else:
+            pagination = query.order_by(Article.created_at.desc()).paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            articles = pagination.items
+            pagination_data = {
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'current_page': page,
+                'has_next': pagination.has_next,
+                'has_prev': pagination.has_prev
+            }
 
         data = []
-        for a in pagination.items:
+        for a in articles:
             author = User.query.get(a.author_id)
             data.append({
                 'id': a.id,
@@ -50,13 +76,8 @@ def get_public_articles():
 
         return jsonify({
             'articles': data,
-            'pagination': {
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'current_page': page,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'pagination': pagination_data,
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -7,18 +7,15 @@ from ..models import db, Article, User
 from ..utils.decorators import admin_required
 from ..utils.logger import record_log 
 from ..extensions import db, limiter 
+from ..services.media_variant_service import save_upload
 
 article_bp = Blueprint('article_admin', __name__, url_prefix='/admin/articles')
 
 def save_article_image(file):
     if not file: return None
     filename = secure_filename(file.filename)
-    upload_path = os.path.join(current_app.root_path, 'static/uploads/articles')
-    if not os.path.exists(upload_path): os.makedirs(upload_path)
-    
     unique_filename = f"art_{uuid.uuid4().hex}_{filename}"
-    file.save(os.path.join(upload_path, unique_filename))
-    return unique_filename
+    return save_upload(file.read(), unique_filename, subfolder='articles')
 
 @article_bp.route('/', methods=['GET'])
 @limiter.limit("60 per minute")
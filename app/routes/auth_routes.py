@@ -3,6 +3,7 @@ from firebase_admin import credentials, auth as firebase_auth
 from flask import Blueprint, request, jsonify
 from ..models import User
 from ..extensions import db, limiter
+from ..services.post_detail_service import invalidate_author_post_details
 from flask_bcrypt import Bcrypt
 from datetime import datetime, timezone
 import os
@@ -226,6 +227,7 @@ def google_login():
                 updated = True
             if updated:
                 db.session.commit()
+                invalidate_author_post_details(user.id)
         else:
             base_username = email.split('@')[0]
             clean_username = "".join(c for c in base_username if c.isalnum() or c == '_')[:20]
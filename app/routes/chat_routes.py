@@ -1,12 +1,13 @@
-from flask import Blueprint, current_app, request, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Chat, ChatParticipant, Message, User, GroupBannedUser, GroupInvite
 from sqlalchemy import desc, func
-from werkzeug.utils import secure_filename
 from ..extensions import socketio, limiter
+from ..services import block_graph
+from ..services.media_variant_service import save_upload
+from ..services.media_store import release
 
 import uuid
-import os
 import json
 import secrets
 from datetime import datetime, timezone, timedelta
@@ -38,9 +39,7 @@ def get_inbox():
     
     chats = Chat.query.filter(Chat.id.in_(chat_ids)).order_by(desc(Chat.last_message_time)).all()
     
-    from ..models import BlockedUser
-    blocked_ids = [str(b.blocked_id) for b in BlockedUser.query.filter_by(blocker_id=user_id).all()]
-    i_am_blocked_by = [str(b.blocker_id) for b in BlockedUser.query.filter_by(blocked_id=user_id).all()]
+    blocked_ids, i_am_blocked_by = block_graph.get_block_sets(user_id)
     
     results = []
     for chat in chats:
@@ -145,12 +144,7 @@ def get_messages(chat_id):
     if participant and participant.last_cleared_at:
         query = query.filter(Message.sent_at > participant.last_cleared_at)
 
-    from ..models import BlockedUser
-    blocked_users = BlockedUser.query.filter_by(blocker_id=user_id).all()
-    blocked_ids = [b.blocked_id for b in blocked_users]
-    
-    if blocked_ids:
-        query = query.filter(Message.sender_id.notin_(blocked_ids))
+    query = block_graph.exclude_blocked(query, Message.sender_id, user_id)
         
     messages = query.order_by(desc(Message.sent_at)).limit(50).all()
 
@@ -233,11 +227,7 @@ def create_group():
     )
     
     if image_file:
-        filename = secure_filename(f"grp_{uuid.uuid4().hex[:8]}_{image_file.filename}")
-        path = os.path.join(current_app.root_path, 'static', 'uploads', filename)
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        image_file.save(path)
-        new_group.image_url = filename
+        new_group.image_url = save_upload(image_file.read(), image_file.filename)
 
     db.session.add(new_group)
     db.session.add(ChatParticipant(chat_id=new_group.id, user_id=user_id, is_admin=True)) # type: ignore
@@ -397,11 +387,9 @@ def update_group_info(chat_id):
     if 'image' in request.files:
         file = request.files['image']
         if file:
-            filename = secure_filename(f"group_{chat_id}_{uuid.uuid4().hex[:6]}.jpg")
-            upload_folder = os.path.join(current_app.root_path, 'static', 'uploads')
-            os.makedirs(upload_folder, exist_ok=True)
-            file.save(os.path.join(upload_folder, filename))
-            chat.image_url = filename # type: ignore
+            old_image = chat.image_url
+            chat.image_url = save_upload(file.read(), file.filename) # type: ignore
+            release(old_image)
 
     db.session.commit()
     return jsonify({"message": "Info grup diperbarui", "name": chat.name}), 200 # type: ignore
@@ -4,6 +4,8 @@ from ..extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.post_classification_service import post_classifier
 from ..services.notif_manager import create_notification
+from ..services.counter_service import incr_comments
+from ..services.ranking_service import refresh_post
 from ..extensions import db, limiter 
 
 comment_bp = Blueprint('comment', __name__)
@@ -64,8 +66,9 @@ def create_comment(post_id):
     )
     
     db.session.add(new_comment)
-    post.comments_count += 1 
     db.session.commit()
+    incr_comments(post.id)
+    refresh_post(post)
 
     create_notification(
         recipient_id=post.user_id,    
@@ -126,6 +129,13 @@ def serialize_comment(comment):
     }
 
 
+def _count_approved(comment):
+    count = 1 if comment.moderation_status == 'approved' else 0
+    for reply in comment.replies:
+        count += _count_approved(reply)
+    return count
+
+
 @comment_bp.route('/<uuid:comment_id>', methods=['DELETE'])
 @limiter.limit("20 per minute")
 @jwt_required()
@@ -144,12 +154,14 @@ def delete_comment(comment_id):
         return jsonify({"error": "Anda tidak memiliki izin untuk menghapus komentar ini"}), 403
 
     try:
+        # Balasan ikut terhapus lewat cascade, jadi ikut dikurangi dari counter.
+        removed = _count_approved(comment)
         db.session.delete(comment)
-        
-        if post and post.comments_count > 0:
-            post.comments_count -= 1 
-
         db.session.commit()
+
+        if post and removed:
+            incr_comments(post.id, -removed)
+            refresh_post(post)
         return jsonify({"message": "Komentar berhasil dihapus"}), 200
     except Exception as e:
         db.session.rollback()
@@ -4,7 +4,9 @@ from sqlalchemy import func, desc, or_, cast, String, case
 from datetime import datetime, timedelta, timezone
 from ..models import Post, User, Connection, db, Article
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..routes.user_routes import user_to_dict, serialize_post
+from ..routes.user_routes import users_to_dicts, serialize_posts
+from sqlalchemy.orm import joinedload
+from ..utils.pagination import keyset_paginate, InvalidCursor
 import random
 from ..extensions import limiter 
 from ..extensions import redis_client, db, limiter
@@ -73,7 +75,7 @@ def get_discover_dashboard():
     articles = Article.query.order_by(Article.created_at.desc()).limit(5).all()
     return jsonify({
         'tags': tags,
-        'users': [user_to_dict(u) for u in verified],
+        'users': users_to_dicts(verified),
         'articles': [serialize_article(a) for a in articles]
     }), 200
 
@@ -86,7 +88,7 @@ def get_user_list():
     if current_id:
         query = query.filter(User.id != current_id)
     p = query.paginate(page=page, per_page=20, error_out=False)
-    return jsonify({'users': [user_to_dict(u) for u in p.items], 'has_next': p.has_next}), 200
+    return jsonify({'users': users_to_dicts(p.items), 'has_next': p.has_next}), 200
 
 @discover_bp.route('/posts/list', methods=['GET'])
 @jwt_required(optional=True)
@@ -94,15 +96,22 @@ def get_post_list():
     t = request.args.get('type', 'all')
     page = request.args.get('page', 1, type=int)
     current_id = get_jwt_identity()
-    query = Post.query.filter_by(moderation_status='approved')
+    query = Post.query.options(joinedload(Post.author)).filter_by(moderation_status='approved')
     if current_id:
         query = query.filter(Post.user_id != current_id)
     if t == 'image':
         query = query.filter(Post.image_url != None)
     elif t == 'text':
         query = query.filter(or_(Post.image_url == None, Post.image_url == ''))
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            p = keyset_paginate(query, Post.created_at, Post.id, cursor, 20)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'posts': serialize_posts(p.items, current_id), 'has_next': p.has_next, 'next_cursor': p.next_cursor}), 200
     p = query.order_by(Post.created_at.desc()).paginate(page=page, per_page=20)
-    return jsonify({'posts': [serialize_post(post, current_id) for post in p.items], 'has_next': p.has_next}), 200
+    return jsonify({'posts': serialize_posts(p.items, current_id), 'has_next': p.has_next}), 200
 
 @discover_bp.route('/articles/list', methods=['GET'])
 def get_article_list():
@@ -131,11 +140,11 @@ def search_content():
         return jsonify({'users':[], 'posts':[], 'articles':[]}), 200
     current_id = get_jwt_identity()
     users = User.query.filter(or_(User.username.ilike(f'%{q}%'), User.display_name.ilike(f'%{q}%'))).limit(10).all()
-    posts = Post.query.filter(Post.moderation_status == 'approved', or_(Post.caption.ilike(f'%{q}%'), cast(Post.tags, String).ilike(f'%{q}%'))).limit(20).all()
+    posts = Post.query.options(joinedload(Post.author)).filter(Post.moderation_status == 'approved', or_(Post.caption.ilike(f'%{q}%'), cast(Post.tags, String).ilike(f'%{q}%'))).limit(20).all()
     articles = Article.query.filter(or_(Article.title.ilike(f'%{q}%'), Article.category.ilike(f'%{q}%'), cast(Article.tags, String).ilike(f'%{q}%'), Article.content.ilike(f'%{q}%'))).order_by(case((Article.title.ilike(f'%{q}%'), 1), (cast(Article.tags, String).ilike(f'%{q}%'), 2), else_=3)).limit(10).all()
     return jsonify({
-        'users': [user_to_dict(u) for u in users if str(u.id) != str(current_id)],
-        'posts': [serialize_post(p, current_id) for p in posts if str(p.user_id) != str(current_id)],
+        'users': users_to_dicts([u for u in users if str(u.id) != str(current_id)]),
+        'posts': serialize_posts([p for p in posts if str(p.user_id) != str(current_id)], current_id),
         'articles': [serialize_article(a) for a in articles]
     }), 200
 
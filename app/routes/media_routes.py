@@ -0,0 +1,54 @@
+import os
+from flask import Blueprint, jsonify, send_file, current_app, redirect, abort
+from werkzeug.security import safe_join
+from ..extensions import limiter
+from ..services.media_resize_service import get_resized, SizeNotAllowed, MediaNotFound
+from ..services.storage import get_storage, PRIVATE_PREFIXES
+
+media_bp = Blueprint('media', __name__)
+
+# Sama seperti /static: file asli bernama unik dan tidak pernah ditimpa, jadi aman di-cache lama.
+MEDIA_MAX_AGE = 31536000
+# Folder static yang isinya disimpan di storage media (bukan aset aplikasi).
+STORAGE_PREFIXES = ('uploads/', 'variants/', 'reject/', 'pending/', 'quarantine/')
+
+
+@media_bp.route('/media/<int:width>x<int:height>/<path:filename>', methods=['GET'])
+@limiter.exempt
+def resized_media(width, height, filename):
+    try:
+        path = get_resized(width, height, filename)
+    except SizeNotAllowed as e:
+        return jsonify({"error": str(e)}), 400
+    except MediaNotFound:
+        return jsonify({"error": "File tidak ditemukan"}), 404
+    except Exception as e:
+        print(f"[Media] Gagal resize {filename} ke {width}x{height}: {e}")
+        return jsonify({"error": "Gagal memproses gambar"}), 500
+    return send_file(path, max_age=MEDIA_MAX_AGE, conditional=True)
+
+
+def storage_static(filename):
+    """Pengganti view /static bawaan jika media disimpan di object storage.
+
+    Aset aplikasi (JS/CSS/gambar) tetap dilayani dari disk node ini; media upload
+    yang tidak ada di disk di-redirect ke URL bucket (langsung atau presigned),
+    sehingga URL static/uploads/<nama> yang dipakai klien tetap berlaku.
+    """
+    local_path = safe_join(current_app.static_folder, filename) # type: ignore
+    if local_path and os.path.isfile(local_path):
+        return current_app.send_static_file(filename)
+    # Dokumen verifikasi tidak pernah dilayani lewat /static.
+    if not filename.startswith(STORAGE_PREFIXES):
+        abort(404)
+    storage = get_storage()
+    try:
+        response = redirect(storage.url(filename), code=302)
+    except ValueError:
+        abort(404)
+    if storage.public_url and not filename.startswith(PRIVATE_PREFIXES):
+        response.headers['Cache-Control'] = f'public, max-age={MEDIA_MAX_AGE}'
+    else:
+        # Presigned URL kedaluwarsa: redirect jangan di-cache lebih lama dari masa berlakunya.
+        response.headers['Cache-Control'] = f'private, max-age={storage.url_expires // 2}'
+    return response
@@ -15,7 +15,8 @@ def get_notifications():
         .limit(50)\
         .all()
         
-    return jsonify([n.to_dict() for n in notifs]), 200
+    related_images = Notification.related_images(notifs)
+    return jsonify([n.to_dict(related_images) for n in notifs]), 200
 
 @notif_bp.route('/read-all', methods=['POST'])
 @limiter.limit("10 per minute")
@@ -1,19 +1,29 @@
 from flask import Blueprint, request, jsonify, current_app
-from ..models import Post, User, PostLike, Connection, SavedPost, db
+from ..models import Post, User, PostLike, Connection, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..services.post_classification_service import post_classifier 
-from ..services.image_moderation_service import image_moderator
 from ..services.post_services import toggle_save_post 
+from ..services.post_moderation_service import classify_post, apply_moderation_result, enqueue_post_moderation
+from ..services import block_graph
+from ..services.counter_service import incr_likes, live_counts
+from ..services.post_detail_service import get_post_detail, invalidate_post_detail
+from ..services.ranking_service import read_for_you, index_post, refresh_post, unindex_post
+from ..services.seen_service import record_impressions, seen_mask, MAX_IMPRESSIONS_PER_CALL
+from ..services.feed_service import (
+    hydrate_viewer_state, overlay_viewer_state, viewer_flags_for_post, get_cached_feed_page,
+    set_cached_feed_page, invalidate_feed_cache, FEED_CACHE_MAX_PAGE, FEED_CACHE_PER_PAGE
+)
 import uuid
-import os
 from ..services.notif_manager import create_notification
-from werkzeug.utils import secure_filename
 from datetime import datetime, timezone 
 from ..extensions import limiter
+from ..utils.pagination import keyset_paginate, encode_cursor, InvalidCursor
+from ..utils.image_utils import check_image_pixels, ImageTooLarge
+from ..services.media_variant_service import ensure_variants, prefetch_variants, variant_paths
+from ..services.media_store import store_upload, static_path, release
+from ..services.timeline_service import read_timeline, load_timeline_posts, rebuild_timeline, remove_post
 post_bp = Blueprint('post', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif'}
-ALLOWED_TEXT_CATEGORIES = {'SAFE', 'Bersih'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -38,58 +48,49 @@ def create_post():
     if len(caption) > MAX_CAPTION_LENGTH:
         return jsonify({"error": f"Caption tidak boleh lebih dari {MAX_CAPTION_LENGTH} karakter"}), 400
 
-    text_category, text_confidence = post_classifier.predict(caption)
-    text_is_unsafe = text_category not in ALLOWED_TEXT_CATEGORIES
+    if image_file and not allowed_file(image_file.filename):
+        return jsonify({"error": "Invalid image file type"}), 400
 
-    image_url_to_save = None
-    image_is_unsafe = False
-    
-    moderation_details = {
-        'text_status': 'unsafe' if text_is_unsafe else 'safe',
-        'text_category': text_category,
-    }
-
-    if image_file:
-        if not allowed_file(image_file.filename):
-            return jsonify({"error": "Invalid image file type"}), 400
-        
-        image_bytes = image_file.read()
-        image_status, image_category = image_moderator.predict(image_bytes)
-        image_is_unsafe = (image_status == 'unsafe')
-        
-        filename = secure_filename(f"{uuid.uuid4().hex}_{image_file.filename}")
-        
-        target_folder = 'reject' if (image_is_unsafe or text_is_unsafe) else 'uploads'
-        upload_path = os.path.join(current_app.root_path, 'static', target_folder)
-        os.makedirs(upload_path, exist_ok=True)
-        
-        with open(os.path.join(upload_path, filename), 'wb') as f:
-            f.write(image_bytes)
-            
-        image_url_to_save = filename
-        moderation_details['image_status'] = image_status
-        moderation_details['image_category'] = image_category # type: ignore
+    image_bytes = image_file.read() if image_file else None
+    if image_bytes is not None:
+        try:
+            check_image_pixels(image_bytes)
+        except ImageTooLarge as e:
+            return jsonify({"error": str(e)}), 413
 
     new_post = Post()
     new_post.user_id = current_user.id
     new_post.caption = caption
     new_post.tags = tags
-    new_post.image_url = image_url_to_save
-    new_post.moderation_details = moderation_details
-    
-    if text_is_unsafe or image_is_unsafe:
-        new_post.moderation_status = 'rejected'
+
+    if current_app.config.get('ASYNC_POST_MODERATION'):
+        # Simpan dulu sebagai 'pending'; feed hanya menampilkan 'approved', jadi post
+        # tetap tersembunyi sampai moderation_worker.py selesai memprosesnya.
+        if image_bytes is not None:
+            new_post.image_url, _ = store_upload(image_bytes, image_file.filename, status='pending') # type: ignore
+
+        new_post.moderation_status = 'pending'
         db.session.add(new_post)
         db.session.commit()
+        enqueue_post_moderation(new_post.id)
 
-        create_notification(
-            recipient_id=current_user.id, 
-            sender_id=current_user.id,    
-            type='post_rejected',        
-            reference_id=str(new_post.id),
-            text="Postingan Anda ditolak karena melanggar aturan komunitas."
-        )
-        
+        return jsonify({
+            "message": "Postingan sedang diperiksa. Status akhir akan dikirim lewat notifikasi.",
+            "post_id": str(new_post.id),
+            "status": "pending"
+        }), 202
+
+    moderation_details, is_unsafe = classify_post(caption, image_bytes)
+
+    if image_bytes is not None:
+        new_post.image_url, _ = store_upload(image_bytes, image_file.filename, # type: ignore
+                                             status='reject' if is_unsafe else 'uploads')
+        if not is_unsafe:
+            ensure_variants(new_post.image_url, image_bytes)
+
+    apply_moderation_result(new_post, moderation_details, is_unsafe)
+
+    if is_unsafe:
         return jsonify({
             "message": "Postingan ditolak oleh moderasi otomatis, Anda dapat mengajukan banding di menu Pengaturan.",
             "post_id": str(new_post.id),
@@ -97,10 +98,6 @@ def create_post():
             "is_moderated": True,
             "moderation_details": moderation_details
         }), 200
-    
-    new_post.moderation_status = 'approved' 
-    db.session.add(new_post)
-    db.session.commit()
 
     return jsonify({
         "message": "Post created successfully", 
@@ -109,76 +106,18 @@ def create_post():
     }), 201
 
 
-@post_bp.route('/', methods=['GET'])
-@limiter.limit("60 per minute")
-@jwt_required(optional=True) 
-def get_posts():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    target_user_id = request.args.get('user_id')
-    filter_type = request.args.get('filter', 'latest') 
-    
-    current_user_id = get_jwt_identity() 
-
-    query = db.session.query(Post, User)\
-        .join(User, Post.user_id == User.id)\
-        .filter(Post.moderation_status == 'approved')
-    
-    if current_user_id:
-        from ..models import BlockedUser
-        blocked_users = BlockedUser.query.filter_by(blocker_id=current_user_id).all()
-        blocked_ids = [b.blocked_id for b in blocked_users]
-        if blocked_ids:
-            query = query.filter(Post.user_id.notin_(blocked_ids))
-
+def serialize_feed_items(page_items, current_user_id):
+    viewer_state = hydrate_viewer_state([post for post, _ in page_items], current_user_id)
+    counts = live_counts([post for post, _ in page_items])
+    variants = prefetch_variants(
+        [post.image_url for post, _ in page_items] + [author.avatar_url for _, author in page_items]
+    )
 
-    if target_user_id:
-        try:
-            uuid_obj = uuid.UUID(target_user_id)
-            query = query.filter(Post.user_id == uuid_obj)
-        except ValueError:
-            return jsonify({
-                "posts": [],
-                "pagination": {"has_next": False}
-            }), 200
-    else:
-        if filter_type == 'following':
-            if current_user_id:
-                query = query.join(Connection, Connection.following_id == Post.user_id)\
-                             .filter(Connection.follower_id == current_user_id)
-            else:
-                return jsonify({
-                    "posts": [],
-                    "pagination": {"has_next": False}
-                }), 200
-            
-    query = query.order_by(Post.created_at.desc())
-    paginated_posts = query.paginate(page=page, per_page=per_page, error_out=False) # type: ignore
-    
     results = []
     
-    for post, post_author in paginated_posts.items:
-        is_liked = False
-        is_following = False
-        is_saved = False
-        
-        if current_user_id:
-            # Cek Like
-            if PostLike.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-                is_liked = True
-
-            # Cek Save
-            if SavedPost.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-                is_saved = True
-
-            # Cek Follow
-            if str(post_author.id) != str(current_user_id):
-                follow_exists = Connection.query.filter_by(
-                    follower_id=current_user_id,
-                    following_id=post_author.id
-                ).first()
-                if follow_exists:
-                    is_following = True
+    for post, post_author in page_items:
+        flags = viewer_state[str(post.id)]
+        post_counts = counts[str(post.id)]
         
         image_url = post.image_url
         if image_url and not image_url.startswith('http'):
@@ -205,29 +144,274 @@ def get_posts():
             "caption": post.caption,
             "tags": post.tags if post.tags else [],
             "image_url": image_url, 
+            "image_variants": variant_paths(post.image_url, variants),
             "created_at": created_at_str,
-            "likes_count": post.likes_count,
-            "comments_count": post.comments_count,
-            "is_liked": is_liked,
-            "is_saved": is_saved,
+            "likes_count": post_counts['likes_count'],
+            "comments_count": post_counts['comments_count'],
+            "is_liked": flags['is_liked'],
+            "is_saved": flags['is_saved'],
             "author": {
                 "id": str(post_author.id),
                 "display_name": post_author.display_name,
                 "username": post_author.username,
                 "avatar_url": avatar_url,
-                "is_following": is_following,
+                "avatar_variants": variant_paths(post_author.avatar_url, variants),
+                "is_following": flags['is_following'],
                 "is_verified": post_author.is_verified,
 
             }
         })
     
-    return jsonify({
-        "posts": results,
-        "pagination": { 
+    return results
+
+
+def _build_latest_feed_page(page, per_page, cursor):
+    """Render halaman feed 'latest' netral-viewer untuk cache. None jika cursor rusak."""
+    query = db.session.query(Post, User)\
+        .join(User, Post.user_id == User.id)\
+        .filter(Post.moderation_status == 'approved')
+
+    next_cursor = None
+    if cursor is not None:
+        try:
+            keyset_page = keyset_paginate(
+                query, Post.created_at, Post.id, cursor, per_page,
+                key=lambda row: (row[0].created_at, row[0].id)
+            )
+        except InvalidCursor:
+            return None
+        page_items = keyset_page.items
+        next_cursor = keyset_page.next_cursor
+        pagination = {"total_pages": None, "current_page": None, "has_next": keyset_page.has_next}
+    else:
+        paginated_posts = query.order_by(Post.created_at.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False) # type: ignore
+        page_items = paginated_posts.items
+        pagination = {
+            "total_pages": paginated_posts.pages,
+            "current_page": paginated_posts.page,
+            "has_next": paginated_posts.has_next
+        }
+
+    return {
+        "posts": serialize_feed_items(page_items, None),
+        "pagination": pagination,
+        "next_cursor": next_cursor
+    }
+
+
+UNSEEN_SCAN_BATCHES = 5
+
+
+def _build_unseen_page(current_user_id, per_page, cursor):
+    """Feed terbaru tanpa post yang sudah dilihat viewer, selalu mode cursor.
+
+    Kandidat diambil per batch dengan keyset lalu disaring lewat bloom filter,
+    bukan NOT IN ke seen_posts. Cursor menunjuk baris terakhir yang *dipindai*,
+    jadi halaman bisa kurang dari per_page bila batas pindai tercapai.
+    """
+    query = db.session.query(Post, User)\
+        .join(User, Post.user_id == User.id)\
+        .filter(Post.moderation_status == 'approved', Post.user_id != current_user_id)
+    query = block_graph.exclude_blocked(query, Post.user_id, current_user_id)
+    row_key = lambda row: (row[0].created_at, row[0].id)
+
+    page_items = []
+    scan_cursor = cursor or ''
+    last_scanned = None
+    has_next = False
+    for _ in range(UNSEEN_SCAN_BATCHES):
+        batch = keyset_paginate(query, Post.created_at, Post.id, scan_cursor, per_page * 2, key=row_key)
+        mask = seen_mask(current_user_id, [post.id for post, _ in batch.items])
+        scanned = 0
+        for row, seen in zip(batch.items, mask):
+            scanned += 1
+            last_scanned = row
+            if not seen:
+                page_items.append(row)
+            if len(page_items) == per_page:
+                break
+        has_next = batch.has_next or scanned < len(batch.items)
+        if len(page_items) == per_page or not batch.has_next:
+            break
+        scan_cursor = batch.next_cursor
+
+    next_cursor = encode_cursor(*row_key(last_scanned)) if has_next and last_scanned else None
+    return page_items, has_next, next_cursor
+
+
+@post_bp.route('/impressions', methods=['POST'])
+@limiter.limit("30 per minute")
+@jwt_required()
+def record_post_impressions():
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get('post_ids')
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({"error": "post_ids wajib berupa list"}), 400
+    if len(raw_ids) > MAX_IMPRESSIONS_PER_CALL:
+        return jsonify({"error": f"Maksimal {MAX_IMPRESSIONS_PER_CALL} post per request"}), 400
+
+    try:
+        post_ids = list({uuid.UUID(str(pid)) for pid in raw_ids})
+    except ValueError:
+        return jsonify({"error": "post_ids berisi UUID tidak valid"}), 400
+
+    try:
+        inserted = record_impressions(uuid.UUID(user_id), post_ids)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Gagal menyimpan impression", "details": str(e)}), 500
+
+    return jsonify({"message": "Success", "recorded": inserted}), 200
+
+
+@post_bp.route('/', methods=['GET'])
+@limiter.limit("60 per minute")
+@jwt_required(optional=True) 
+def get_posts():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    target_user_id = request.args.get('user_id')
+    filter_type = request.args.get('filter', 'latest') 
+    cursor = request.args.get('cursor')
+    
+    current_user_id = get_jwt_identity() 
+
+    if not target_user_id and filter_type == 'following' and current_user_id:
+        try:
+            timeline = read_timeline(current_user_id, page, per_page, cursor)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+
+        if timeline is not None:
+            page_items = load_timeline_posts(timeline.post_ids)
+            next_cursor = None
+            if cursor is not None and timeline.has_next and page_items:
+                last_post = page_items[-1][0]
+                next_cursor = encode_cursor(last_post.created_at, last_post.id)
+            return jsonify({
+                "posts": serialize_feed_items(page_items, current_user_id),
+                "pagination": {
+                    "total_pages": timeline.total_pages,
+                    "current_page": None if cursor is not None else page,
+                    "has_next": timeline.has_next
+                },
+                "next_cursor": next_cursor
+            }), 200
+
+    if not target_user_id and filter_type == 'for_you':
+        ranked = read_for_you(current_user_id, page, per_page)
+        if ranked is not None:
+            return jsonify({
+                "posts": serialize_feed_items(load_timeline_posts(ranked.post_ids), current_user_id),
+                "pagination": {
+                    "total_pages": ranked.total_pages,
+                    "current_page": page,
+                    "has_next": ranked.has_next
+                },
+                "next_cursor": None
+            }), 200
+        # Ranking belum siap (sedang dibangun worker lain): layani feed terbaru.
+        filter_type = 'latest'
+
+    if not target_user_id and filter_type == 'unseen' and current_user_id:
+        try:
+            page_items, has_next, next_cursor = _build_unseen_page(current_user_id, per_page, cursor)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "posts": serialize_feed_items(page_items, current_user_id),
+            "pagination": {"total_pages": None, "current_page": None, "has_next": has_next},
+            "next_cursor": next_cursor
+        }), 200
+
+    # Halaman 'latest' disimpan sebagai kartu tanpa flag viewer; flag ditempel setelah cache hit.
+    # Hanya halaman awal dengan per_page default, supaya cursor/per_page dari klien
+    # (termasuk anonim) tidak bisa membuat key cache tanpa batas.
+    is_cacheable = not target_user_id and filter_type == 'latest' and per_page == FEED_CACHE_PER_PAGE and (
+        cursor == '' or (cursor is None and 1 <= page <= FEED_CACHE_MAX_PAGE)
+    )
+    if is_cacheable:
+        page_token = "c:" if cursor is not None else f"p:{page}"
+        cached_payload, cache_version = get_cached_feed_page(filter_type, page_token, per_page)
+        if cached_payload is None:
+            cached_payload = _build_latest_feed_page(page, per_page, cursor)
+            if cached_payload is None:
+                return jsonify({"error": "Cursor tidak valid"}), 400
+            set_cached_feed_page(cache_version, filter_type, page_token, per_page, cached_payload)
+
+        if current_user_id:
+            blocked = block_graph.blocked_ids(current_user_id)
+            cards = [c for c in cached_payload['posts'] if c['author']['id'] not in blocked]
+            cached_payload['posts'] = overlay_viewer_state(cards, current_user_id)
+        return jsonify(cached_payload), 200
+
+    query = db.session.query(Post, User)\
+        .join(User, Post.user_id == User.id)\
+        .filter(Post.moderation_status == 'approved')
+    
+    if current_user_id:
+        query = block_graph.exclude_blocked(query, Post.user_id, current_user_id)
+
+
+    if target_user_id:
+        try:
+            uuid_obj = uuid.UUID(target_user_id)
+            query = query.filter(Post.user_id == uuid_obj)
+        except ValueError:
+            return jsonify({
+                "posts": [],
+                "pagination": {"has_next": False}
+            }), 200
+    else:
+        if filter_type == 'following':
+            if current_user_id:
+                query = query.join(Connection, Connection.following_id == Post.user_id)\
+                             .filter(Connection.follower_id == current_user_id)
+            else:
+                return jsonify({
+                    "posts": [],
+                    "pagination": {"has_next": False}
+                }), 200
+            
+    next_cursor = None
+    if cursor is not None:
+        try:
+            keyset_page = keyset_paginate(
+                query, Post.created_at, Post.id, cursor, per_page,
+                key=lambda row: (row[0].created_at, row[0].id)
+            )
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        page_items = keyset_page.items
+        next_cursor = keyset_page.next_cursor
+        pagination = {
+            "total_pages": None,
+            "current_page": None,
+            "has_next": keyset_page.has_next
+        }
+    else:
+        query = query.order_by(Post.created_at.desc())
+        paginated_posts = query.paginate(page=page, per_page=per_page, error_out=False) # type: ignore
+        page_items = paginated_posts.items
+        pagination = {
             "total_pages": paginated_posts.pages,
             "current_page": paginated_posts.page,
             "has_next": paginated_posts.has_next
         }
+
+    if not target_user_id and filter_type == 'following' and page == 1 and not cursor:
+        # Timeline belum ada (user dingin): hangatkan supaya request berikutnya lewat Redis.
+        try:
+            rebuild_timeline(current_user_id)
+        except Exception as e:
+            print(f"[Timeline] Gagal membangun timeline {current_user_id}: {e}")
+
+    return jsonify({
+        "posts": serialize_feed_items(page_items, current_user_id),
+        "pagination": pagination,
+        "next_cursor": next_cursor
     }), 200
 
 @post_bp.route('/<uuid:post_id>/like', methods=['POST'])
@@ -248,17 +432,17 @@ def toggle_like(post_id):
     try:
         if like:
             db.session.delete(like)
-            post.likes_count = max(0, post.likes_count - 1)
             liked = False
         else:
             new_like = PostLike()
             new_like.user_id = current_user.id
             new_like.post_id = post_id
             db.session.add(new_like)
-            post.likes_count += 1
             liked = True
         
         db.session.commit()
+        incr_likes(post.id, 1 if liked else -1)
+        refresh_post(post)
         
         if liked:
             create_notification(
@@ -271,7 +455,7 @@ def toggle_like(post_id):
         return jsonify({
             "message": "Success",
             "liked": liked,
-            "likes_count": post.likes_count
+            "likes_count": live_counts([post])[str(post.id)]['likes_count']
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -295,8 +479,15 @@ def delete_post(post_id):
         return jsonify({"error": "Forbidden. You do not own this post."}), 403
 
     try:
+        author_id = post.user_id
+        image_url = post.image_url
         db.session.delete(post)
+        release(image_url)
         db.session.commit()
+        remove_post(post_id, author_id)
+        unindex_post(post_id)
+        invalidate_post_detail(post_id)
+        invalidate_feed_cache()
         return jsonify({"message": f"Post {post_id} deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -320,70 +511,14 @@ def save_post(post_id):
 @jwt_required(optional=True)
 def get_single_post(post_id):
     current_user_id = get_jwt_identity()
-    post = Post.query.get(post_id)
-    if not post:
+    result = get_post_detail(post_id)
+    if not result:
         return jsonify({"error": "Post not found"}), 404
-    post_author = User.query.get(post.user_id)
-
-    from app.models import Appeal
-    from datetime import timedelta
 
-    appeal = Appeal.query.filter_by(content_id=post.id).first()
-    is_liked = False
-    is_following = False
-    is_saved = False
-    if current_user_id:
-        if PostLike.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-            is_liked = True
-        if SavedPost.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-            is_saved = True
-        if str(post_author.id) != str(current_user_id):# type: ignore
-            follow_exists = Connection.query.filter_by(
-                follower_id=current_user_id,
-                following_id=post_author.id# type: ignore
-            ).first()
-            if follow_exists:
-                is_following = True
-    image_url = post.image_url
-    if image_url and not image_url.startswith('http'):
-        folder = 'reject' if post.moderation_status in ['rejected', 'appealing', 'final_rejected'] else 'uploads'
-        image_url = f"static/{folder}/{image_url}"
-    avatar_url = post_author.avatar_url# type: ignore
-    if avatar_url and not avatar_url.startswith('http'):
-        avatar_url = f"static/uploads/{avatar_url}"
-    dt = post.created_at
-    if dt is not None:
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        else:
-            dt = dt.astimezone(timezone.utc)
-        created_at_str = dt.isoformat().replace('+00:00', 'Z')
-    else:
-        created_at_str = datetime.now(timezone.utc).isoformat()
-    result = {
-        "id": str(post.id),
-        "caption": post.caption,
-        "tags": post.tags if post.tags else [],
-        "image_url": image_url,
-        "created_at": created_at_str,
-        "likes_count": post.likes_count,
-        "comments_count": post.comments_count,
-        "is_liked": is_liked,
-        "is_saved": is_saved,
-        "status": post.moderation_status,
-        "moderation_details": post.moderation_details,
-        "expires_at": (post.created_at + timedelta(hours=24)).isoformat(),
-        "appeal_status": appeal.status if appeal else None,
-        "admin_note": appeal.admin_note if appeal else None,
-        "author": {
-            "id": str(post_author.id),# type: ignore
-            "display_name": post_author.display_name, # type: ignore
-            "username": post_author.username,# type: ignore
-            "avatar_url": avatar_url,
-            "is_following": is_following,
-            "is_verified": post_author.is_verified,# type: ignore
-        }
-    }
+    flags = viewer_flags_for_post(post_id, result['author']['id'], current_user_id)
+    result['is_liked'] = flags['is_liked']
+    result['is_saved'] = flags['is_saved']
+    result['author']['is_following'] = flags['is_following']
     return jsonify(result), 200
 
 @post_bp.route('/my-moderation', methods=['GET'])
@@ -401,10 +536,8 @@ def get_my_moderation():
         from datetime import timedelta
         appeal = Appeal.query.filter_by(content_id=p.id).first()
         
-        image_path = p.image_url
-        if image_path:
-            folder = 'reject' if p.moderation_status in ['rejected', 'appealing', 'final_rejected'] else 'uploads'
-            image_path = f"static/{folder}/{image_path}"
+        folder = 'reject' if p.moderation_status in ['rejected', 'appealing', 'final_rejected'] else 'uploads'
+        image_path = static_path(p.image_url, folder)
 
         results.append({
             "id": str(p.id),
@@ -453,6 +586,7 @@ def submit_appeal(post_id):
     post.moderation_status = 'appealing'
     db.session.add(new_appeal)
     db.session.commit()
+    invalidate_post_detail(post_id)
     
     return jsonify({"message": "Banding berhasil diajukan, mohon tunggu review admin"}), 201
 
@@ -470,17 +604,14 @@ def acknowledge_rejection(post_id):
         return jsonify({"error": "Postingan ini tidak dalam masa moderasi atau sudah selesai."}), 400
 
     try:
-        if post.image_url:
-            reject_folder = os.path.join(current_app.root_path, 'static', 'reject')
-            path = os.path.join(reject_folder, post.image_url)
-            if os.path.exists(path):
-                os.remove(path)
-        
         from ..models import Appeal
         Appeal.query.filter_by(content_id=post.id).delete()
         
+        image_url = post.image_url
         db.session.delete(post)
+        release(image_url, legacy_folder='reject')
         db.session.commit()
+        invalidate_post_detail(post_id)
         
         return jsonify({"message": "Postingan berhasil dihapus dan keputusan diterima."}), 200
     except Exception as e:
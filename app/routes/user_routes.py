@@ -1,14 +1,23 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request
 from ..services.user_action_service import UserActionService
-from ..models import User, Connection, Post, db, SavedPost, PostLike
+from ..models import User, Connection, Post, db, SavedPost
+from ..services.feed_service import hydrate_viewer_state
+from ..services import block_graph
+from ..services.counter_service import live_counts
+from ..services.post_detail_service import invalidate_author_post_details
+from ..services.timeline_service import add_author_to_timeline, remove_author_from_timeline
+from sqlalchemy.orm import joinedload
 from flask_jwt_extended import jwt_required, get_jwt_identity 
 from ..services.notif_manager import create_notification
 from ..services.image_moderation_service import image_moderator
+from ..utils.image_utils import check_image_pixels, ImageTooLarge
+from ..services.media_variant_service import save_upload, prefetch_variants, variant_paths
+from ..services.media_store import release
 import uuid
 import os
 import jwt
-from werkzeug.utils import secure_filename
 from ..extensions import limiter
+from ..utils.pagination import keyset_paginate, InvalidCursor
 
 user_bp = Blueprint('user', __name__) 
 
@@ -19,7 +28,7 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'avif', 'tif'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def user_to_dict(user):
+def user_to_dict(user, variants=None):
     from ..models import Post, Connection
     
     def get_only_filename(path):
@@ -29,6 +38,8 @@ def user_to_dict(user):
 
     avatar = get_only_filename(user.avatar_url)
     banner = get_only_filename(user.banner_url)
+    if variants is None:
+        variants = prefetch_variants([user.avatar_url, user.banner_url])
     
     posts_count = Post.query.filter_by(user_id=user.id, moderation_status='approved').count()
     followers_count = Connection.query.filter_by(following_id=user.id).count()
@@ -39,6 +50,8 @@ def user_to_dict(user):
         'display_name': user.display_name,
         'avatar_url': avatar,
         'banner_url': banner,
+        'avatar_variants': variant_paths(user.avatar_url, variants),
+        'banner_variants': variant_paths(user.banner_url, variants),
         'is_verified': user.is_verified,
         'is_ai_moderation_enabled': getattr(user, 'is_ai_moderation_enabled', False),
         'stats': {
@@ -72,13 +85,14 @@ def update_profile():
             return jsonify({"error": "Username sudah digunakan"}), 409
         current_user.username = username
 
-    upload_folder = os.path.join(current_app.root_path, 'static', 'uploads')
-    os.makedirs(upload_folder, exist_ok=True)
-
     if 'avatar' in request.files:
         file = request.files['avatar']
         if file and allowed_file(file.filename):
             file_bytes = file.read()
+            try:
+                check_image_pixels(file_bytes)
+            except ImageTooLarge as e:
+                return jsonify({"error": str(e)}), 413
             status, reason = image_moderator.predict(file_bytes)
             
             if status == "unsafe":
@@ -87,15 +101,18 @@ def update_profile():
                     "reason": reason
                 }), 400
             
-            file.seek(0)
-            filename = secure_filename(f"avatar_{current_user.id}_{uuid.uuid4().hex[:6]}.{file.filename.rsplit('.', 1)[1]}")  # type: ignore
-            file.save(os.path.join(upload_folder, filename))
-            current_user.avatar_url = filename 
+            old_avatar = current_user.avatar_url
+            current_user.avatar_url = save_upload(file_bytes, file.filename)
+            release(old_avatar)
 
     if 'banner' in request.files:
         file = request.files['banner']
         if file and allowed_file(file.filename):
             file_bytes = file.read()
+            try:
+                check_image_pixels(file_bytes)
+            except ImageTooLarge as e:
+                return jsonify({"error": str(e)}), 413
             status, reason = image_moderator.predict(file_bytes)
             
             if status == "unsafe":
@@ -104,13 +121,13 @@ def update_profile():
                     "reason": reason
                 }), 400
             
-            file.seek(0)
-            filename = secure_filename(f"banner_{current_user.id}_{uuid.uuid4().hex[:6]}.{file.filename.rsplit('.', 1)[1]}")  # type: ignore
-            file.save(os.path.join(upload_folder, filename))
-            current_user.banner_url = filename
+            old_banner = current_user.banner_url
+            current_user.banner_url = save_upload(file_bytes, file.filename)
+            release(old_banner)
 
     try:
         db.session.commit()
+        invalidate_author_post_details(current_user.id)
         
         resp_avatar = current_user.avatar_url
         if resp_avatar and not resp_avatar.startswith(('http://', 'https://')):
@@ -164,13 +181,14 @@ def get_user_profile(user_id):
     if not user:
         return jsonify({"error": "User tidak ditemukan"}), 404
 
-    from ..models import BlockedUser, Connection, Post, ProfessionalProfile
+    from ..models import Connection, Post, ProfessionalProfile
     is_blocked_by_me = False
     i_am_blocked = False
 
     if current_user_id:
-        is_blocked_by_me = BlockedUser.query.filter_by(blocker_id=current_user_id, blocked_id=target_uuid).first() is not None
-        i_am_blocked = BlockedUser.query.filter_by(blocker_id=target_uuid, blocked_id=current_user_id).first() is not None
+        blocked, blocked_by = block_graph.get_block_sets(current_user_id)
+        is_blocked_by_me = str(target_uuid) in blocked
+        i_am_blocked = str(target_uuid) in blocked_by
 
     resp_avatar = user.avatar_url
     if resp_avatar and not resp_avatar.startswith(('http://', 'https://')):
@@ -181,6 +199,7 @@ def get_user_profile(user_id):
     if resp_banner and not resp_banner.startswith(('http://', 'https://')):
         if 'static/' not in resp_banner:
             resp_banner = f"static/uploads/{resp_banner}"
+    variants = prefetch_variants([user.avatar_url, user.banner_url])
 
     if is_blocked_by_me or i_am_blocked:
         return jsonify({
@@ -190,6 +209,8 @@ def get_user_profile(user_id):
             "bio": "Akun tidak tersedia" if i_am_blocked else "Anda telah memblokir akun ini",
             "avatar_url": resp_avatar,
             "banner_url": resp_banner,
+            "avatar_variants": variant_paths(user.avatar_url, variants),
+            "banner_variants": variant_paths(user.banner_url, variants),
             "is_verified": user.is_verified,
             "stats": {
                 "posts": 0,
@@ -246,6 +267,8 @@ def get_user_profile(user_id):
         "bio": user.bio or "",
         "avatar_url": resp_avatar,
         "banner_url": resp_banner,
+        "avatar_variants": variant_paths(user.avatar_url, variants),
+        "banner_variants": variant_paths(user.banner_url, variants),
         "is_verified": user.is_verified,
         "is_ai_moderation_enabled": getattr(user, 'is_ai_moderation_enabled', False) if is_me else False,
         "stats": {
@@ -311,6 +334,11 @@ def follow_user(user_id):
 
         db.session.commit()
 
+        if is_following:
+            add_author_to_timeline(current_user.id, target_uuid)
+        else:
+            remove_author_from_timeline(current_user.id, target_uuid)
+
         if is_following:
             create_notification(
                     recipient_id=target_uuid,     
@@ -392,11 +420,16 @@ def get_blocked_list():
     blocker_id = current_user.id
     blocked_users = user_action_service.get_blocked_users(blocker_id)
     
-    blocked_data = [user_to_dict(u) for u in blocked_users]
+    blocked_data = users_to_dicts(blocked_users)
     
     return jsonify(blocked_data), 200
 
-def serialize_post(post, current_user_id=None):
+def users_to_dicts(users):
+    """user_to_dict untuk daftar user, dengan varian avatar/banner dimuat sekaligus."""
+    variants = prefetch_variants([path for u in users for path in (u.avatar_url, u.banner_url)])
+    return [user_to_dict(u, variants) for u in users]
+
+def serialize_post(post, current_user_id=None, viewer_state=None, counts=None, variants=None):
     image_url = post.image_url
     if image_url and not image_url.startswith('http'):
         if 'static/uploads' not in image_url:
@@ -407,34 +440,42 @@ def serialize_post(post, current_user_id=None):
         if 'static/uploads' not in author_avatar:
             author_avatar = f"static/uploads/{author_avatar}"
 
-    is_liked = False
-    is_saved = False
-
-    if current_user_id:
-        if PostLike.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-            is_liked = True
-        if SavedPost.query.filter_by(user_id=current_user_id, post_id=post.id).first():
-            is_saved = True
+    if viewer_state is None:
+        viewer_state = hydrate_viewer_state([post], current_user_id)
+    flags = viewer_state[str(post.id)]
+    if counts is None:
+        counts = live_counts([post])
+    post_counts = counts[str(post.id)]
+    if variants is None:
+        variants = prefetch_variants([post.image_url, post.author.avatar_url])
 
     return {
         'id': str(post.id),
         'caption': post.caption,
         'image_url': image_url,
+        'image_variants': variant_paths(post.image_url, variants),
         'created_at': post.created_at.isoformat(),
-        'likes_count': post.likes_count,
-        'comments_count': post.comments_count,
+        'likes_count': post_counts['likes_count'],
+        'comments_count': post_counts['comments_count'],
         'tags': post.tags,
-        'is_liked': is_liked, 
-        'is_saved': is_saved,  
+        'is_liked': flags['is_liked'], 
+        'is_saved': flags['is_saved'],  
         'author': {
             'id': str(post.author.id),
             'username': post.author.username,
             'display_name': post.author.display_name,
             'avatar_url': author_avatar,
+            'avatar_variants': variant_paths(post.author.avatar_url, variants),
             'is_verified': post.author.is_verified,
         }
     }
 
+def serialize_posts(posts, current_user_id=None):
+    viewer_state = hydrate_viewer_state(posts, current_user_id)
+    counts = live_counts(posts)
+    variants = prefetch_variants([path for post in posts for path in (post.image_url, post.author.avatar_url)])
+    return [serialize_post(post, current_user_id, viewer_state, counts, variants) for post in posts]
+
 
 @user_bp.route('/<uuid:target_user_id>/saved-posts', methods=['GET'])
 @jwt_required()
@@ -460,7 +501,7 @@ def get_saved_posts(target_user_id):
                 'is_private': True
             }), 403
 
-        saved_posts = db.session.query(Post).join(
+        saved_posts = db.session.query(Post).options(joinedload(Post.author)).join(
             SavedPost, SavedPost.post_id == Post.id
         ).filter(
             SavedPost.user_id == target_user_id
@@ -468,7 +509,7 @@ def get_saved_posts(target_user_id):
             SavedPost.saved_at.desc()
         ).all()
 
-        results = [serialize_post(post, current_user.id) for post in saved_posts]
+        results = serialize_posts(saved_posts, current_user.id)
 
         return jsonify({
             'success': True,
@@ -550,10 +591,25 @@ def get_user_followers(user_id):
             )
         )
 
-    paginated_data = query.paginate(page=page, per_page=per_page, error_out=False)  # type: ignore
+    cursor = request.args.get('cursor')
+    next_cursor = None
+    if cursor is not None:
+        try:
+            paginated_data = keyset_paginate(
+                query.add_columns(Connection.created_at),
+                Connection.created_at, Connection.follower_id, cursor, per_page,
+                key=lambda row: (row[1], row[0].id)
+            )
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        followers = [row[0] for row in paginated_data.items]
+        next_cursor = paginated_data.next_cursor
+    else:
+        paginated_data = query.paginate(page=page, per_page=per_page, error_out=False)  # type: ignore
+        followers = paginated_data.items
 
     results = []
-    for follower in paginated_data.items:
+    for follower in followers:
         is_following_back = Connection.query.filter_by(
             follower_id=current_user_id,
             following_id=follower.id
@@ -576,7 +632,8 @@ def get_user_followers(user_id):
             
     return jsonify({
         "users": results,
-        "has_next": paginated_data.has_next
+        "has_next": paginated_data.has_next,
+        "next_cursor": next_cursor
     }), 200
 
 @user_bp.route('/<uuid:user_id>/following', methods=['GET'])
@@ -648,7 +705,7 @@ def get_mutual_friends():
         )
 
     users = query.limit(50).all()
-    return jsonify([user_to_dict(u) for u in users]), 200
+    return jsonify(users_to_dicts(users)), 200
 
 
 @user_bp.route('/settings/moderation', methods=['PATCH'])
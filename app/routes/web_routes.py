@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template_string, request # <--- Tambah request
-from ..models import Post, User
+import uuid
 from ..extensions import limiter
+from ..services.post_detail_service import get_post_detail
 web_bp = Blueprint('web', __name__)
 
 @web_bp.route('/join/<string:chat_id>')
@@ -27,21 +28,20 @@ def view_post_redirect(post_id):
     author_name = "Pengguna Amica"
     
     try:
-        post = Post.query.filter_by(id=str(post_id)).first()
+        post = get_post_detail(uuid.UUID(post_id))
         if post:
-            author = User.query.get(post.user_id)
-            author_name = author.display_name if author else "User"
+            author_name = post['author']['display_name'] or "User"
             
             meta_title = f"Postingan dari {author_name}"
-            caption = post.caption if post.caption else "Lihat konten ini di Amica"
+            caption = post['caption'] if post['caption'] else "Lihat konten ini di Amica"
             meta_desc = (caption[:150] + '...') if len(caption) > 150 else caption
             
-            if post.image_url:
-                if post.image_url.startswith('http'):
-                    meta_image = post.image_url
+            if post['image_url']:
+                if post['image_url'].startswith('http'):
+                    meta_image = post['image_url']
                 else:
 
-                    clean_path = post.image_url.lstrip('/')
+                    clean_path = post['image_url'].lstrip('/')
                     meta_image = f"{base_url}/{clean_path}"
                     
     except Exception as e:
@@ -0,0 +1,167 @@
+from sqlalchemy import exists, and_
+from ..extensions import db, redis_client
+from ..models import BlockedUser
+
+# Set kosong tidak bisa disimpan di Redis, jadi setiap set yang sudah dimuat
+# selalu berisi sentinel ini untuk membedakan "tidak memblokir siapa pun" dari "belum dimuat".
+_SENTINEL = '_'
+BLOCK_GRAPH_TTL = 24 * 3600
+
+_ADD_IF_LOADED = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('SADD', KEYS[1], ARGV[1])
+end
+return 0
+""")
+
+# _load membaca DB lalu menulis set ke Redis. Blokir yang di-commit di antara
+# keduanya tidak boleh hilang: setiap perubahan menaikkan versi user (INCR di
+# record_block/record_unblock), dan set hanya ditulis jika versinya masih sama
+# dengan saat _load mulai membaca. Jika berubah, hasil dipakai untuk request ini
+# saja dan pembacaan berikutnya memuat ulang.
+# ARGV: versi, ttl, sentinel, jumlah member set pertama, member set pertama..., member set kedua...
+_STORE_IF_VERSION = redis_client.register_script("""
+if (redis.call('GET', KEYS[1]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[2], KEYS[3])
+redis.call('SADD', KEYS[2], ARGV[3])
+redis.call('SADD', KEYS[3], ARGV[3])
+local split = 4 + tonumber(ARGV[4])
+for i = 5, #ARGV do
+    redis.call('SADD', i <= split and KEYS[2] or KEYS[3], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return 1
+""")
+
+
+def _blocked_key(user_id):
+    return f"blocks:out:{user_id}"
+
+
+def _blocked_by_key(user_id):
+    return f"blocks:in:{user_id}"
+
+
+def _version_key(user_id):
+    return f"blocks:ver:{user_id}"
+
+
+def _bump_versions(pipe, *user_ids):
+    for user_id in user_ids:
+        pipe.incr(_version_key(user_id))
+        pipe.expire(_version_key(user_id), BLOCK_GRAPH_TTL * 2)
+
+
+def _decode_members(members):
+    decoded = {m.decode() if isinstance(m, bytes) else m for m in members}
+    decoded.discard(_SENTINEL)
+    return decoded
+
+
+def _load(user_id):
+    version = redis_client.get(_version_key(user_id))
+    version = version.decode() if isinstance(version, bytes) else (version or '')
+    blocked = [str(r.blocked_id) for r in db.session.query(BlockedUser.blocked_id).filter(BlockedUser.blocker_id == user_id)]
+    blocked_by = [str(r.blocker_id) for r in db.session.query(BlockedUser.blocker_id).filter(BlockedUser.blocked_id == user_id)]
+
+    _STORE_IF_VERSION(
+        keys=[_version_key(user_id), _blocked_key(user_id), _blocked_by_key(user_id)],
+        args=[version, BLOCK_GRAPH_TTL, _SENTINEL, len(blocked), *blocked, *blocked_by]
+    )
+    return set(blocked), set(blocked_by)
+
+
+def get_block_sets(user_id):
+    """(user yang diblokir user_id, user yang memblokir user_id) sebagai set string UUID."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.smembers(_blocked_key(user_id))
+        pipe.smembers(_blocked_by_key(user_id))
+        blocked_raw, blocked_by_raw = pipe.execute()
+        if blocked_raw and blocked_by_raw:
+            return _decode_members(blocked_raw), _decode_members(blocked_by_raw)
+        return _load(user_id)
+    except Exception as e:
+        print(f"[BlockGraph] Redis tidak tersedia, fallback ke database: {e}")
+        blocked = {str(r.blocked_id) for r in db.session.query(BlockedUser.blocked_id).filter(BlockedUser.blocker_id == user_id)}
+        blocked_by = {str(r.blocker_id) for r in db.session.query(BlockedUser.blocker_id).filter(BlockedUser.blocked_id == user_id)}
+        return blocked, blocked_by
+
+
+def blocked_ids(user_id):
+    return get_block_sets(user_id)[0]
+
+
+def blocked_by_ids(user_id):
+    return get_block_sets(user_id)[1]
+
+
+def is_blocked(blocker_id, blocked_id):
+    """True jika blocker_id memblokir blocked_id (SISMEMBER, O(1))."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(_blocked_key(blocker_id))
+        pipe.sismember(_blocked_key(blocker_id), str(blocked_id))
+        is_loaded, is_member = pipe.execute()
+        if is_loaded:
+            return bool(is_member)
+    except Exception:
+        pass
+    return str(blocked_id) in blocked_ids(blocker_id)
+
+
+def record_block(blocker_id, blocked_id):
+    """Panggil setelah commit."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        _bump_versions(pipe, blocker_id, blocked_id)
+        pipe.execute()
+        _ADD_IF_LOADED(keys=[_blocked_key(blocker_id)], args=[str(blocked_id)])
+        _ADD_IF_LOADED(keys=[_blocked_by_key(blocked_id)], args=[str(blocker_id)])
+    except Exception as e:
+        print(f"[BlockGraph] Gagal memperbarui graph blokir: {e}")
+        invalidate(blocker_id, blocked_id)
+
+
+def record_unblock(blocker_id, blocked_id):
+    try:
+        pipe = redis_client.pipeline()
+        _bump_versions(pipe, blocker_id, blocked_id)
+        pipe.srem(_blocked_key(blocker_id), str(blocked_id))
+        pipe.srem(_blocked_by_key(blocked_id), str(blocker_id))
+        pipe.execute()
+    except Exception as e:
+        print(f"[BlockGraph] Gagal memperbarui graph blokir: {e}")
+        invalidate(blocker_id, blocked_id)
+
+
+def invalidate(*user_ids):
+    try:
+        keys = []
+        for user_id in user_ids:
+            keys += [_blocked_key(user_id), _blocked_by_key(user_id)]
+        redis_client.delete(*keys)
+    except Exception:
+        pass
+
+
+def blocked_by_viewer_clause(viewer_id, user_column):
+    """EXISTS: viewer memblokir user pada kolom `user_column`."""
+    return exists().where(and_(
+        BlockedUser.blocker_id == viewer_id,
+        BlockedUser.blocked_id == user_column
+    ))
+
+
+def exclude_blocked(query, user_column, viewer_id, both_directions=False):
+    """Anti-join: buang baris yang user-nya diblokir viewer (dan sebaliknya bila diminta)."""
+    query = query.filter(~blocked_by_viewer_clause(viewer_id, user_column))
+    if both_directions:
+        query = query.filter(~exists().where(and_(
+            BlockedUser.blocker_id == user_column,
+            BlockedUser.blocked_id == viewer_id
+        )))
+    return query
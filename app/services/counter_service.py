@@ -0,0 +1,200 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import text
+from ..extensions import db, redis_client
+
+# Delta like/komentar ditampung di hash Redis (field "<post_id>:likes" / "<post_id>:comments")
+# dan diterapkan ke tabel posts secara batch, jadi like beruntun ke satu post
+# tidak saling menunggu row lock.
+PENDING_KEY = "post_counters:pending"
+FLUSHING_KEY = "post_counters:flushing"
+FIELDS = ('likes', 'comments')
+RECONCILE_WINDOW_DAYS = 30
+# Field khusus di hash flushing: id batch yang dicatat di tabel counter_flushes
+# dalam transaksi yang sama dengan UPDATE posts. Jika proses mati setelah commit
+# tetapi sebelum hash flushing dihapus, flush berikutnya melihat id ini sudah
+# tercatat dan hanya menghapus hash-nya (delta tidak diterapkan dua kali).
+FLUSH_ID_FIELD = '__flush_id'
+FLUSH_HISTORY_DAYS = 7
+
+# Serah-terima pending -> flushing secara atomik, sekaligus memberi id batch.
+# Hash flushing yang tertinggal dari flush gagal dikembalikan apa adanya (id lama).
+_CLAIM_FLUSH = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+redis.call('HSETNX', KEYS[2], ARGV[2], ARGV[1])
+return redis.call('HGETALL', KEYS[2])
+""")
+
+_MARK_FLUSH_SQL = text("""
+    INSERT INTO counter_flushes (id, applied_at) VALUES (:id, now())
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+""")
+
+_APPLY_SQL = text("""
+    UPDATE posts
+    SET likes_count = GREATEST(COALESCE(likes_count, 0) + :likes, 0),
+        comments_count = GREATEST(COALESCE(comments_count, 0) + :comments, 0)
+    WHERE id = :id
+""")
+
+_RECONCILE_SQL = """
+    UPDATE posts p
+    SET likes_count = (SELECT COUNT(*) FROM post_likes l WHERE l.post_id = p.id),
+        comments_count = (
+            SELECT COUNT(*) FROM comments c
+            WHERE c.post_id = p.id AND c.moderation_status = 'approved'
+        )
+    WHERE {where}
+"""
+
+
+def _field(post_id, name):
+    return f"{post_id}:{name}"
+
+
+def _incr(post_id, name, delta):
+    try:
+        redis_client.hincrby(PENDING_KEY, _field(post_id, name), delta)
+    except Exception as e:
+        # Tanpa Redis tetap pakai UPDATE atomik di database, bukan read-modify-write di Python.
+        print(f"[Counter] Redis tidak tersedia, update langsung ke database: {e}")
+        params = {'id': str(post_id), 'likes': 0, 'comments': 0}
+        params[name] = delta
+        db.session.execute(_APPLY_SQL, params)
+        db.session.commit()
+
+
+def incr_likes(post_id, delta=1):
+    _incr(post_id, 'likes', delta)
+
+
+def incr_comments(post_id, delta=1):
+    _incr(post_id, 'comments', delta)
+
+
+def pending_deltas(post_ids):
+    """Delta yang belum di-flush: str(post_id) -> {'likes': n, 'comments': n}."""
+    deltas = {str(pid): dict.fromkeys(FIELDS, 0) for pid in post_ids}
+    if not deltas:
+        return deltas
+
+    fields = [_field(pid, name) for pid in deltas for name in FIELDS]
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hmget(PENDING_KEY, fields)
+        pipe.hmget(FLUSHING_KEY, fields)
+        pending, flushing = pipe.execute()
+    except Exception as e:
+        print(f"[Counter] Gagal membaca delta counter: {e}")
+        return deltas
+
+    for field, a, b in zip(fields, pending, flushing): # type: ignore
+        pid, name = field.rsplit(':', 1)
+        deltas[pid][name] += int(a or 0) + int(b or 0)
+    return deltas
+
+
+def live_counts(posts):
+    """Nilai counter di tabel posts ditambah delta yang masih di Redis."""
+    deltas = pending_deltas([p.id for p in posts])
+    counts = {}
+    for p in posts:
+        delta = deltas[str(p.id)]
+        counts[str(p.id)] = {
+            'likes_count': max((p.likes_count or 0) + delta['likes'], 0),
+            'comments_count': max((p.comments_count or 0) + delta['comments'], 0),
+        }
+    return counts
+
+
+def flush_pending_counters():
+    """Pindahkan hash pending ke hash flushing (atomik) lalu terapkan ke posts.
+
+    Increment baru langsung masuk ke hash pending yang baru. Jika flush sebelumnya
+    gagal, hash flushing yang tertinggal diproses dulu; jika ternyata sudah
+    diterapkan (id batch ada di counter_flushes), hash itu hanya dihapus.
+    Mengembalikan jumlah post yang diperbarui.
+    """
+    raw = _CLAIM_FLUSH(keys=[PENDING_KEY, FLUSHING_KEY], args=[str(uuid.uuid4()), FLUSH_ID_FIELD])
+    if not raw:
+        return 0
+
+    flush_id = None
+    per_post = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    for field, value in zip(raw[::2], raw[1::2]): # type: ignore
+        field = field.decode() if isinstance(field, bytes) else field
+        if field == FLUSH_ID_FIELD:
+            flush_id = value.decode() if isinstance(value, bytes) else value
+            continue
+        pid, name = field.rsplit(':', 1)
+        per_post[pid][name] += int(value)
+
+    rows = [
+        {'id': pid, 'likes': d['likes'], 'comments': d['comments']}
+        for pid, d in per_post.items() if d['likes'] or d['comments']
+    ]
+    if db.session.execute(_MARK_FLUSH_SQL, {'id': flush_id}).first() is None:
+        db.session.rollback()
+        print(f"[Counter] Batch {flush_id} sudah diterapkan sebelumnya, hanya dihapus dari Redis.")
+        rows = []
+    else:
+        if rows:
+            db.session.execute(_APPLY_SQL, rows)
+        db.session.commit()
+        if rows:
+            # Detail post yang di-cache menyimpan nilai kolom lama; buang supaya tidak kurang hitung.
+            from .post_detail_service import invalidate_post_detail
+            invalidate_post_detail(*[row['id'] for row in rows])
+
+    redis_client.delete(FLUSHING_KEY)
+    return len(rows)
+
+
+def _post_ids_with_pending():
+    ids = set()
+    for key in (PENDING_KEY, FLUSHING_KEY):
+        for field in redis_client.hkeys(key): # type: ignore
+            field = field.decode() if isinstance(field, bytes) else field
+            if field != FLUSH_ID_FIELD:
+                ids.add(field.rsplit(':', 1)[0])
+    return ids
+
+
+def reconcile_counters(post_ids=None, all_posts=False):
+    """Hitung ulang likes_count/comments_count dari post_likes dan comments.
+
+    Default-nya hanya post RECONCILE_WINDOW_DAYS hari terakhir. Post yang masih
+    punya delta di Redis dilewati supaya delta itu tidak terhitung dua kali.
+    """
+    flush_pending_counters()
+
+    params = {}
+    clauses = []
+    if post_ids:
+        clauses.append("p.id = ANY(CAST(:ids AS uuid[]))")
+        params['ids'] = [str(pid) for pid in post_ids]
+    elif not all_posts:
+        clauses.append("p.created_at >= :since")
+        params['since'] = datetime.now(timezone.utc) - timedelta(days=RECONCILE_WINDOW_DAYS)
+
+    skipped = _post_ids_with_pending()
+    if skipped:
+        clauses.append("NOT (p.id = ANY(CAST(:skipped AS uuid[])))")
+        params['skipped'] = list(skipped)
+
+    where = " AND ".join(clauses) or "TRUE"
+    result = db.session.execute(text(_RECONCILE_SQL.format(where=where)), params)
+    # Id batch hanya perlu diingat selama hash flushing-nya mungkin masih tertinggal.
+    db.session.execute(
+        text("DELETE FROM counter_flushes WHERE applied_at < :before"),
+        {'before': datetime.now(timezone.utc) - timedelta(days=FLUSH_HISTORY_DAYS)}
+    )
+    db.session.commit()
+    return result.rowcount # type: ignore
@@ -0,0 +1,128 @@
+import json
+import uuid
+from collections import namedtuple
+from sqlalchemy import select, exists
+from ..models import PostLike, SavedPost, Connection
+from ..extensions import db, redis_client
+
+
+def hydrate_viewer_state(posts, viewer_id):
+    """Resolve is_liked / is_saved / is_following untuk satu halaman post sekaligus.
+
+    Satu query per relasi (bukan per post), hasilnya dict: str(post.id) -> flags.
+    """
+    state = {
+        str(p.id): {'is_liked': False, 'is_saved': False, 'is_following': False}
+        for p in posts
+    }
+    if not viewer_id or not state:
+        return state
+
+    post_ids = [p.id for p in posts]
+    viewer_str = str(viewer_id)
+    author_ids = {p.user_id for p in posts if str(p.user_id) != viewer_str}
+
+    liked = {
+        str(row.post_id) for row in db.session.query(PostLike.post_id).filter(
+            PostLike.user_id == viewer_id,
+            PostLike.post_id.in_(post_ids)
+        )
+    }
+    saved = {
+        str(row.post_id) for row in db.session.query(SavedPost.post_id).filter(
+            SavedPost.user_id == viewer_id,
+            SavedPost.post_id.in_(post_ids)
+        )
+    }
+    following = set()
+    if author_ids:
+        following = {
+            str(row.following_id) for row in db.session.query(Connection.following_id).filter(
+                Connection.follower_id == viewer_id,
+                Connection.following_id.in_(author_ids)
+            )
+        }
+
+    for p in posts:
+        flags = state[str(p.id)]
+        flags['is_liked'] = str(p.id) in liked
+        flags['is_saved'] = str(p.id) in saved
+        flags['is_following'] = str(p.user_id) in following
+
+    return state
+
+
+def viewer_flags_for_post(post_id, author_id, viewer_id):
+    """Versi satu-post dari hydrate_viewer_state: tiga EXISTS dalam satu SELECT."""
+    flags = {'is_liked': False, 'is_saved': False, 'is_following': False}
+    if not viewer_id:
+        return flags
+
+    row = db.session.execute(select(
+        exists().where(PostLike.user_id == viewer_id, PostLike.post_id == post_id),
+        exists().where(SavedPost.user_id == viewer_id, SavedPost.post_id == post_id),
+        exists().where(Connection.follower_id == viewer_id, Connection.following_id == author_id),
+    )).one()
+    flags['is_liked'], flags['is_saved'], is_following = row
+    flags['is_following'] = is_following and str(author_id) != str(viewer_id)
+    return flags
+
+
+PostRef = namedtuple('PostRef', 'id user_id')
+
+FEED_CACHE_TTL = 30
+FEED_CACHE_MAX_PAGE = 3
+# Hanya per_page default yang di-cache: nilai dari klien tidak boleh membuat key baru tanpa batas.
+FEED_CACHE_PER_PAGE = 10
+FEED_CACHE_VERSION_KEY = "feed:cache:version"
+
+
+def overlay_viewer_state(cards, viewer_id):
+    """Tempel flag milik viewer ke kartu post yang berasal dari cache bersama."""
+    if not viewer_id or not cards:
+        return cards
+    refs = [PostRef(uuid.UUID(c['id']), uuid.UUID(c['author']['id'])) for c in cards]
+    state = hydrate_viewer_state(refs, viewer_id)
+    for card in cards:
+        flags = state[card['id']]
+        card['is_liked'] = flags['is_liked']
+        card['is_saved'] = flags['is_saved']
+        card['author']['is_following'] = flags['is_following']
+    return cards
+
+
+def _feed_cache_key(version, filter_type, page_token, per_page):
+    return f"feed:cache:{version}:{filter_type}:{page_token}:{per_page}"
+
+
+def get_cached_feed_page(filter_type, page_token, per_page):
+    """Kembalikan (payload, version). Simpan `version` untuk set_cached_feed_page,
+    supaya halaman yang dirender sebelum invalidasi tidak tersimpan di versi baru."""
+    try:
+        version = int(redis_client.get(FEED_CACHE_VERSION_KEY) or 0) # type: ignore
+        raw = redis_client.get(_feed_cache_key(version, filter_type, page_token, per_page))
+        return (json.loads(raw) if raw else None), version # type: ignore
+    except Exception as e:
+        print(f"[FeedCache] Gagal membaca cache: {e}")
+        return None, None
+
+
+def set_cached_feed_page(version, filter_type, page_token, per_page, payload):
+    if version is None:
+        return
+    try:
+        redis_client.set(
+            _feed_cache_key(version, filter_type, page_token, per_page),
+            json.dumps(payload),
+            ex=FEED_CACHE_TTL
+        )
+    except Exception as e:
+        print(f"[FeedCache] Gagal menyimpan cache: {e}")
+
+
+def invalidate_feed_cache():
+    """Naikkan versi; key lama tidak terbaca lagi dan kedaluwarsa sendiri lewat TTL."""
+    try:
+        redis_client.incr(FEED_CACHE_VERSION_KEY)
+    except Exception as e:
+        print(f"[FeedCache] Gagal invalidasi cache: {e}")
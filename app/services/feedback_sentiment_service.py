@@ -1,9 +1,12 @@
 import onnxruntime
 import re
 import os
+import threading
 import numpy as np
-import pandas as pd
 from ..utils.text_utils import preprocess_text
+from .inference_batcher import MicroBatcher, model_batch_limit, run_in_chunks, DEFAULT_BULK_BATCH_SIZE
+from .inference_executor import is_remote, remote_predict
+from . import model_registry
 
 class FeedbackSentimentService:
     _instance = None
@@ -17,24 +20,55 @@ class FeedbackSentimentService:
     def __init__(self, max_len=150):
         if self._initialized:
             return
+        if is_remote():
+            # Model dimuat di sidecar inference; worker ini hanya meneruskan input.
+            self._initialized = True
+            return
             
-        model_path = "models_ml/text/feedback/feedback_sentiment.onnx"
+        self.model_path = "models_ml/text/feedback/feedback_sentiment.onnx"
         vocab_path = "models_ml/text/feedback/feedback_vocab.csv"
         
-        if not os.path.exists(model_path) or not os.path.exists(vocab_path):
+        if not os.path.exists(self.model_path) or not os.path.exists(vocab_path):
             raise FileNotFoundError(
                 "Feedback sentiment files (model/vocab) not found."
             )
 
-        self.session = onnxruntime.InferenceSession(model_path)
+        # Byte model dan vocab dimuat di sini (bisa di master gunicorn sebelum
+        # fork); session ONNX dibuat di proses yang memakainya (_ensure_sessions).
+        self._model_bytes, _ = model_registry.read_model_file(self.model_path)
+        self._sessions_lock = threading.Lock()
+        self._sessions_ready = False
+        self._batcher = None
 
+        import pandas as pd
         vocab_df = pd.read_csv(vocab_path)
         self.word_index = pd.Series(vocab_df['index'].values, index=vocab_df['word']).to_dict()
 
-        self.input_name = self.session.get_inputs()[0].name
         self.max_len = max_len
         self._initialized = True
 
+    def _create_sessions(self):
+        self.session = onnxruntime.InferenceSession(self._model_bytes)
+        self.input_name = self.session.get_inputs()[0].name
+        if self._batcher is None:
+            self._batcher = MicroBatcher(
+                'feedback_sentiment', self._predict_batch,
+                max_batch_size=model_batch_limit(self.session, None)
+            )
+        self._sessions_ready = True
+
+    def _ensure_sessions(self):
+        if not self._sessions_ready:
+            with self._sessions_lock:
+                if not self._sessions_ready:
+                    self._create_sessions()
+
+    def reload_sessions(self):
+        """Buat session ONNX di proses ini (setelah fork; thread pool runtime tidak ikut ter-fork)."""
+        if not is_remote():
+            with self._sessions_lock:
+                self._create_sessions()
+
     def _texts_to_sequences(self, texts: list[str]) -> list[list[int]]:
         sequences = []
         for text in texts:
@@ -63,17 +97,37 @@ class FeedbackSentimentService:
         
         return np.array(padded, dtype=np.int64) 
 
-    def predict(self, text: str) -> str:
-        processed_text = preprocess_text(text, remove_stopwords=False)
-        
-        sequence = self._texts_to_sequences([processed_text])
+    def _predict_batch(self, processed_texts: list[str]) -> list[str]:
+        sequences = self._texts_to_sequences(processed_texts)
         
-        input_data = self._manual_pad_sequences(sequence, maxlen=self.max_len)
+        input_data = self._manual_pad_sequences(sequences, maxlen=self.max_len)
         
+        self._ensure_sessions()
         result = self.session.run(None, {self.input_name: input_data})
         
-        probability = result[0][0][0] # type: ignore
+        probabilities = result[0][:, 0] # type: ignore
         
-        return "positive" if probability > 0.5 else "negative"
+        return ["positive" if probability > 0.5 else "negative" for probability in probabilities]
+
+    def predict(self, text: str) -> str:
+        if is_remote():
+            return remote_predict('feedback_sentiment', text)
+        processed_text = preprocess_text(text, remove_stopwords=False)
+        self._ensure_sessions()
+        return self._batcher.submit(processed_text)
+
+    def predict_batch(self, texts: list[str], chunk_size=None) -> list[str]:
+        """Versi list dari predict(): satu inferensi ONNX per chunk, hasil identik per item."""
+        if is_remote():
+            return remote_predict('feedback_sentiment_batch', list(texts))
+        processed_texts = [preprocess_text(text, remove_stopwords=False) for text in texts]
+        self._ensure_sessions()
+        chunk_size = model_batch_limit(self.session, chunk_size or DEFAULT_BULK_BATCH_SIZE)
+        return run_in_chunks(self._predict_batch, processed_texts, chunk_size)
+
+    def warmup(self):
+        if is_remote():
+            return
+        self.predict("aplikasi ini sangat membantu")
 
-feedback_analyzer = FeedbackSentimentService()
+feedback_analyzer = model_registry.register('feedback_sentiment', FeedbackSentimentService)
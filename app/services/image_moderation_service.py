@@ -1,10 +1,37 @@
 import onnxruntime
 import numpy as np
 import cv2
+import hashlib
 import os
+import threading
+import time
+from .inference_batcher import MicroBatcher, model_batch_limit, run_in_chunks, DEFAULT_BULK_BATCH_SIZE
+from .inference_executor import is_remote, remote_predict
+from . import model_registry
+from .verdict_cache import VerdictCache, version_tag
+from ..utils.image_utils import check_image_pixels
+
+# Verdict di-cache per sha256 byte file (dicek sebelum decode, jadi repost identik
+# tidak di-decode ulang). Verdict 'unsafe' juga di-cache per dHash 16x16 (256 bit)
+# + dimensi asli, supaya re-encode gambar yang sama tetap tertolak; hit dHash
+# 'safe' tidak pernah dipakai karena dHash sama belum berarti isinya sama.
+DHASH_SIZE = 16
+
+# Decode JPEG langsung di resolusi 1/2, 1/4 atau 1/8 (skala DCT libjpeg) selama
+# sisi terpanjangnya masih >= ukuran input model, jadi foto 12 MP tidak pernah
+# di-decode penuh hanya untuk dikecilkan ke 320x320.
+REDUCED_DECODE = os.environ.get('IMAGE_REDUCED_DECODE', 'true').lower() == 'true'
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
 
 class ImageModerationService:
     _instance = None
+    GATEKEEPER_PATH = "models_ml/image/gatekeeper.onnx"
+    SPECIALIST_PATH = "models_ml/image/specialist.onnx"
+    MODEL_FILES = (GATEKEEPER_PATH, SPECIALIST_PATH)
 
     def __new__(cls):
         if cls._instance is None:
@@ -15,23 +42,52 @@ class ImageModerationService:
     def __init__(self, image_size=(320, 320)):
         if self._initialized:
             return
+        if is_remote():
+            # Model dimuat di sidecar inference; worker ini hanya meneruskan input.
+            self._initialized = True
+            return
 
-        gatekeeper_path = "models_ml/image/gatekeeper.onnx"
-        specialist_path = "models_ml/image/specialist.onnx"
+        self.gatekeeper_path = self.GATEKEEPER_PATH
+        self.specialist_path = self.SPECIALIST_PATH
         
-        if not os.path.exists(gatekeeper_path) or not os.path.exists(specialist_path):
+        if not os.path.exists(self.gatekeeper_path) or not os.path.exists(self.specialist_path):
             raise FileNotFoundError("Image moderation ONNX models not found.")
 
-        self.gatekeeper_session = onnxruntime.InferenceSession(gatekeeper_path)
-        self.specialist_session = onnxruntime.InferenceSession(specialist_path)
+        # Hanya aset read-only yang dimuat di sini (bisa di master gunicorn sebelum
+        # fork); session ONNX dibuat di proses yang memakainya (_ensure_sessions).
+        self._gatekeeper_bytes, gatekeeper_version = model_registry.read_model_file(self.gatekeeper_path)
+        self._specialist_bytes, specialist_version = model_registry.read_model_file(self.specialist_path)
+        self._sessions_lock = threading.Lock()
+        self._sessions_ready = False
+        self._batcher = None
+        self._verdicts = VerdictCache('image_moderation', version_tag([gatekeeper_version, specialist_version]))
         
         self.image_size = image_size
         self.gatekeeper_classes = ['safe', 'unsafe']
         self.specialist_classes = ['disturbing', 'nsfw', 'violence', 'weapon']
-        
+        self._initialized = True
+
+    def _create_sessions(self):
+        self.gatekeeper_session = onnxruntime.InferenceSession(self._gatekeeper_bytes)
+        self.specialist_session = onnxruntime.InferenceSession(self._specialist_bytes)
         self.gatekeeper_input_name = self.gatekeeper_session.get_inputs()[0].name
         self.specialist_input_name = self.specialist_session.get_inputs()[0].name
-        self._initialized = True
+        if self._batcher is None:
+            batch_limit = model_batch_limit(self.gatekeeper_session, model_batch_limit(self.specialist_session, None))
+            self._batcher = MicroBatcher('image_moderation', self._predict_batch, max_batch_size=batch_limit)
+        self._sessions_ready = True
+
+    def _ensure_sessions(self):
+        if not self._sessions_ready:
+            with self._sessions_lock:
+                if not self._sessions_ready:
+                    self._create_sessions()
+
+    def reload_sessions(self):
+        """Buat session ONNX di proses ini (setelah fork; thread pool runtime tidak ikut ter-fork)."""
+        if not is_remote():
+            with self._sessions_lock:
+                self._create_sessions()
 
     def _letterbox(self, img):
         shape = img.shape[:2]
@@ -50,35 +106,142 @@ class ImageModerationService:
         img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(0, 0, 0))
         return img
 
-    def _preprocess(self, image_bytes):
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    def _dhash(self, img, size=None):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        width, height = size or (img.shape[1], img.shape[0])
+        return f"{width}x{height}:{np.packbits(bits).tobytes().hex()}"
 
+    def _decode(self, image_bytes):
+        size = check_image_pixels(image_bytes)
+        flags = cv2.IMREAD_COLOR
+        if REDUCED_DECODE and size:
+            longest, target = max(size), max(self.image_size)
+            flags = next((flag for factor, flag in REDUCED_DECODE_FLAGS if longest // factor >= target), flags)
+
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flags)
         if img is None:
             raise ValueError("Could not decode image from bytes.")
-        img_bgr = np.array(img, dtype=np.uint8)
-        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-        
-        img_letterboxed = self._letterbox(img_rgb)
-        img_array = np.expand_dims(img_letterboxed, axis=0).astype(np.float32)
-        return img_array
+        return img, size
+
+    def _preprocess(self, image_bytes):
+        img_bgr, size = self._decode(image_bytes)
+        image_hash = self._dhash(img_bgr, size)
+
+        # Konversi warna setelah letterbox: resize dan border per kanal, jadi hasilnya
+        # sama dengan konversi di awal tetapi hanya pada 320x320 piksel.
+        img_letterboxed = cv2.cvtColor(self._letterbox(img_bgr), cv2.COLOR_BGR2RGB)
+        img_array = img_letterboxed[np.newaxis].astype(np.float32)
+        return img_array, image_hash
+
+    def _infer(self, batch):
+        """Gatekeeper untuk seluruh batch, specialist hanya untuk baris yang 'unsafe'."""
+        self._ensure_sessions()
+        gatekeeper_result = self.gatekeeper_session.run(None, {self.gatekeeper_input_name: batch})
+        gatekeeper_scores = gatekeeper_result[0] # type: ignore
+
+        verdicts = [None] * len(batch)
+        unsafe_rows = []
+        for row in range(len(batch)):
+            gatekeeper_prediction = self.gatekeeper_classes[int(np.argmax(gatekeeper_scores[row]))]
+            if gatekeeper_prediction == 'safe':
+                verdicts[row] = ("safe", None)
+            else:
+                unsafe_rows.append(row)
+
+        if unsafe_rows:
+            specialist_result = self.specialist_session.run(None, {self.specialist_input_name: batch[unsafe_rows]})
+            specialist_scores = specialist_result[0] # type: ignore
+            for k, row in enumerate(unsafe_rows):
+                specialist_prediction = self.specialist_classes[int(np.argmax(specialist_scores[k]))]
+                verdicts[row] = ("unsafe", specialist_prediction)
+
+        return verdicts
+
+    def _predict_batch(self, images):
+        results = [None] * len(images)
+        digests = [f"sha256:{hashlib.sha256(image_bytes).hexdigest()}" for image_bytes in images]
+
+        # Tahap 1: byte identik (sha256), verdict apa pun dipakai; repost tidak
+        # perlu di-decode sama sekali. Miss di sini belum dicatat karena masih
+        # dicari lewat dHash, jadi statistik tetap satu hit/miss per gambar.
+        remaining = []
+        for i, verdict in enumerate(self._verdicts.get_many(digests, count_misses=False)):
+            if verdict is not None:
+                results[i] = verdict
+            else:
+                remaining.append(i)
+        if not remaining:
+            return results
+
+        arrays, hashes, positions = [], [], []
+        for i in remaining:
+            try:
+                img_array, image_hash = self._preprocess(images[i])
+                arrays.append(img_array)
+                hashes.append(image_hash)
+                positions.append(i)
+            except Exception as e:
+                results[i] = e
+        if not arrays:
+            return results
+
+        # Tahap 2: dHash, hanya verdict 'unsafe' yang dipercaya.
+        cached = self._verdicts.get_many(hashes, accept=lambda verdict: verdict[0] == 'unsafe')
+        pending = []
+        for k, verdict in enumerate(cached):
+            if verdict is not None:
+                results[positions[k]] = verdict
+            else:
+                pending.append(k)
+        if not pending:
+            return results
+
+        started = time.perf_counter()
+        verdicts = self._infer(np.concatenate([arrays[k] for k in pending], axis=0))
+        self._verdicts.record_inference(len(pending), (time.perf_counter() - started) * 1000)
+
+        for k, verdict in zip(pending, verdicts):
+            results[positions[k]] = verdict
+        items = []
+        for k, verdict in zip(pending, verdicts):
+            items.append((digests[positions[k]], verdict))
+            if verdict[0] == 'unsafe':
+                items.append((hashes[k], verdict))
+        self._verdicts.set_many(items)
+        return results
 
     def predict(self, image_bytes):
-        processed_image = self._preprocess(image_bytes)
-        
-        gatekeeper_result = self.gatekeeper_session.run(None, {self.gatekeeper_input_name: processed_image})
-        gatekeeper_scores = gatekeeper_result[0][0] # type: ignore
-        gatekeeper_prediction_index = np.argmax(gatekeeper_scores)
-        gatekeeper_prediction = self.gatekeeper_classes[gatekeeper_prediction_index]
-
-        if gatekeeper_prediction == 'safe':
-            return "safe", None
-
-        specialist_result = self.specialist_session.run(None, {self.specialist_input_name: processed_image})
-        specialist_scores = specialist_result[0][0] # type: ignore
-        specialist_prediction_index = np.argmax(specialist_scores)
-        specialist_prediction = self.specialist_classes[specialist_prediction_index]
-        
-        return "unsafe", specialist_prediction
+        if is_remote():
+            return remote_predict('image_moderation', image_bytes)
+        self._ensure_sessions()
+        return self._batcher.submit(image_bytes)
+
+    def predict_batch(self, images, chunk_size=None):
+        """Versi list dari predict() untuk job massal. Gambar yang gagal di-decode
+        tidak menghentikan batch: posisinya berisi Exception, bukan tuple hasil."""
+        if is_remote():
+            return remote_predict('image_moderation_batch', list(images))
+        self._ensure_sessions()
+        chunk_size = model_batch_limit(
+            self.gatekeeper_session,
+            model_batch_limit(self.specialist_session, chunk_size or DEFAULT_BULK_BATCH_SIZE)
+        )
+        return run_in_chunks(self._predict_batch, list(images), chunk_size)
+
+    def model_version(self):
+        """Tag versi model yang benar-benar dimuat (dari byte yang dibaca, bukan file di disk saat ini)."""
+        if is_remote():
+            return remote_predict('image_moderation_version', None)
+        return self._verdicts.version
+
+    def warmup(self):
+        if is_remote():
+            return
+        # Langsung ke model (tanpa cache verdict) supaya session benar-benar terpanaskan.
+        _, blank = cv2.imencode('.jpg', np.zeros((self.image_size[0], self.image_size[1], 3), dtype=np.uint8))
+        img_array, _ = self._preprocess(blank.tobytes())
+        self._infer(img_array)
 
-image_moderator = ImageModerationService()
\ No newline at end of file
+image_moderator = model_registry.register('image_moderation', ImageModerationService)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+# Default global; per model bisa dioverride dengan INFERENCE_MAX_BATCH_SIZE_<NAME>
+# dan INFERENCE_MAX_WAIT_MS_<NAME> (mis. INFERENCE_MAX_BATCH_SIZE_IMAGE_MODERATION=4).
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 8))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))
+# Ukuran chunk untuk predict_batch (job massal), terpisah dari micro-batching request.
+DEFAULT_BULK_BATCH_SIZE = int(os.environ.get('INFERENCE_BULK_BATCH_SIZE', 64))
+
+_registry = {}
+
+
+class MicroBatcher:
+    """Kumpulkan panggilan predict yang datang bersamaan menjadi satu inferensi.
+
+    `run_batch(items)` menerima list input dan harus mengembalikan list hasil
+    dengan urutan yang sama; elemen yang berupa Exception diteruskan hanya ke
+    pemanggil item tersebut. Permintaan pertama menunggu paling lama
+    `max_wait_ms` agar permintaan lain sempat ikut dalam batch yang sama.
+    Dengan gevent, thread pengumpul berjalan sebagai greenlet.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=None, max_wait_ms=None):
+        self.name = name
+        self.run_batch = run_batch
+        env_suffix = name.upper()
+        env_batch = os.environ.get(f'INFERENCE_MAX_BATCH_SIZE_{env_suffix}')
+        env_wait = os.environ.get(f'INFERENCE_MAX_WAIT_MS_{env_suffix}')
+        if env_batch:
+            max_batch_size = min(int(env_batch), max_batch_size or int(env_batch))
+        if env_wait:
+            max_wait_ms = float(env_wait)
+
+        self.max_batch_size = max(int(max_batch_size or DEFAULT_MAX_BATCH_SIZE), 1)
+        self.max_wait = (DEFAULT_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._reset_stats()
+        _registry[name] = self
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = Counter()
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _ensure_worker(self):
+        # Thread tidak ikut ter-fork: cek pid supaya setiap worker gunicorn punya pengumpulnya sendiri.
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, item):
+        if self.max_batch_size == 1:
+            return self._run([(item, None, time.perf_counter())])[0]
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        try:
+            results = self.run_batch([item for item, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        finished = time.perf_counter()
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._run_total += finished - started
+            for _, _, enqueued in batch:
+                wait = started - enqueued
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+        for (_, future, _), result in zip(batch, results):
+            if future is None:
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        if batch[0][1] is None and isinstance(results[0], Exception):
+            raise results[0]
+        return results
+
+    def stats(self):
+        with self._lock:
+            batches = self._batches or 1
+            items = self._items or 1
+            return {
+                'name': self.name,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self._batches,
+                'items': self._items,
+                'avg_batch_size': round(self._items / batches, 2),
+                'batch_size_histogram': {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                'avg_queue_wait_ms': round(self._wait_total / items * 1000, 3),
+                'max_queue_wait_ms': round(self._wait_max * 1000, 3),
+                'avg_inference_ms': round(self._run_total / batches * 1000, 3),
+            }
+
+
+def model_batch_limit(session, requested):
+    """Batasi ukuran batch ke 1 jika dimensi batch input model bernilai tetap (bukan dinamis)."""
+    dim = session.get_inputs()[0].shape[0]
+    if isinstance(dim, int) and dim > 0:
+        return min(requested or DEFAULT_MAX_BATCH_SIZE, dim)
+    return requested
+
+
+def run_in_chunks(run_batch, items, chunk_size):
+    """Jalankan `run_batch` per potongan `chunk_size` item dan gabungkan hasilnya sesuai urutan."""
+    results = []
+    for start in range(0, len(items), chunk_size):
+        results.extend(run_batch(items[start:start + chunk_size]))
+    return results
+
+
+def all_batcher_stats():
+    return [batcher.stats() for batcher in _registry.values()]
+
+
+def reset_batcher_stats():
+    for batcher in _registry.values():
+        with batcher._lock:
+            batcher._reset_stats()
@@ -0,0 +1,199 @@
+import os
+import pickle
+import socket
+import socketserver
+import struct
+import threading
+
+# Inferensi ONNX adalah kerja CPU murni: di worker gevent satu panggilan predict
+# menahan event loop (chat, socket, request lain) sampai selesai. Jika
+# INFERENCE_SOCKET_PATH di-set, ketiga service model tidak memuat model di
+# worker web, melainkan mengirim input ke sidecar `inference_server.py` lewat
+# Unix socket. Socket di-monkey-patch gevent, jadi worker hanya menunggu secara
+# kooperatif sementara greenlet lain tetap jalan.
+#
+# Protokol: frame = panjang 4 byte (big-endian) + pickle. Request (op, payload),
+# response ('ok', hasil) atau ('err', exception). Socket dibuat dengan mode 0600
+# karena pickle hanya aman antar proses milik user yang sama.
+SOCKET_PATH = os.environ.get('INFERENCE_SOCKET_PATH', '')
+SOCKET_TIMEOUT = float(os.environ.get('INFERENCE_SOCKET_TIMEOUT', 30))
+MAX_IDLE_CONNECTIONS = int(os.environ.get('INFERENCE_MAX_IDLE_CONNECTIONS', 16))
+
+STATS_OP = '__stats__'
+RESET_STATS_OP = '__reset_stats__'
+
+# Di-set oleh inference_server.py sebelum paket app di-import, supaya service di
+# proses sidecar memuat model secara lokal walau INFERENCE_SOCKET_PATH ada.
+SIDECAR_ENV = 'INFERENCE_SIDECAR'
+
+_HEADER = struct.Struct('!I')
+
+
+class InferenceUnavailable(RuntimeError):
+    pass
+
+
+def is_remote():
+    return bool(SOCKET_PATH) and os.environ.get(SIDECAR_ENV) != '1'
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Koneksi inference ditutup")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_frame(sock, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_frame(sock):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return pickle.loads(_recv_exact(sock, size))
+
+
+class InferenceClient:
+    """Pool koneksi persisten ke sidecar; satu koneksi dipakai satu request pada satu waktu."""
+
+    def __init__(self, socket_path, timeout=SOCKET_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _acquire(self):
+        with self._lock:
+            # Koneksi tidak boleh dipakai bersama parent setelah fork.
+            if self._pid != os.getpid():
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _release(self, sock):
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < MAX_IDLE_CONNECTIONS:
+                self._idle.append(sock)
+                return
+        sock.close()
+
+    def call(self, op, payload=None):
+        last_error = None
+        # Satu kali ulang: koneksi idle bisa sudah putus jika sidecar di-restart.
+        for _ in range(2):
+            try:
+                sock = self._acquire()
+            except OSError as e:
+                last_error = e
+                continue
+            try:
+                _send_frame(sock, (op, payload))
+                status, result = _recv_frame(sock)
+            except (OSError, ConnectionError, EOFError, pickle.UnpicklingError) as e:
+                sock.close()
+                last_error = e
+                continue
+            self._release(sock)
+            if status == 'err':
+                raise result
+            return result
+        raise InferenceUnavailable(f"Sidecar inference tidak dapat dihubungi ({self.socket_path}): {last_error}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(SOCKET_PATH)
+    return _client
+
+
+def remote_predict(model_name, payload):
+    return _get_client().call(model_name, payload)
+
+
+def remote_stats(reset=False):
+    return _get_client().call(RESET_STATS_OP if reset else STATS_OP)
+
+
+class _InferenceHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        handlers = self.server.handlers # type: ignore
+        while True:
+            try:
+                op, payload = _recv_frame(self.request)
+            except (ConnectionError, EOFError):
+                return
+
+            try:
+                handler = handlers.get(op)
+                if handler is None:
+                    raise ValueError(f"Model inference tidak dikenal: {op}")
+                response = ('ok', handler(payload))
+            except Exception as e:
+                response = ('err', e)
+
+            try:
+                _send_frame(self.request, response)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                _send_frame(self.request, ('err', RuntimeError(repr(response[1]))))
+
+
+class _InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def local_stats(reset=False):
+    """Statistik batcher dan cache verdict di proses ini."""
+    from .inference_batcher import all_batcher_stats, reset_batcher_stats
+    from .verdict_cache import all_cache_stats, reset_cache_stats
+
+    stats = {"batchers": all_batcher_stats(), "verdict_caches": all_cache_stats()}
+    if reset:
+        reset_batcher_stats()
+        reset_cache_stats()
+    return stats
+
+
+def serve(socket_path, handlers):
+    """Jalankan sidecar. Setiap koneksi ditangani thread sendiri, jadi panggilan
+    dari banyak worker web tetap dikumpulkan oleh MicroBatcher masing-masing model."""
+    handlers = dict(handlers)
+    handlers.setdefault(STATS_OP, lambda _: local_stats())
+    handlers.setdefault(RESET_STATS_OP, lambda _: local_stats(reset=True))
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    old_umask = os.umask(0o177)
+    try:
+        server = _InferenceServer(socket_path, _InferenceHandler)
+    finally:
+        os.umask(old_umask)
+    server.handlers = handlers # type: ignore
+
+    print(f"[InferenceServer] Mendengarkan di {socket_path} ({', '.join(sorted(handlers))})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -0,0 +1,274 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import safe_join
+from .media_variant_service import (
+    open_image, render, output_format, output_mode, normalize_source, VARIANT_QUALITY
+)
+from .media_store import is_hashed
+from .storage import get_storage, clean_key
+
+# Resize on-demand lewat /media/<w>x<h>/<file>. Ukuran dibatasi allowlist (h=0
+# berarti perkecil mengikuti lebar, selain itu dipotong tepat w x h). Hasil
+# render disimpan di cache disk berkapasitas tetap; saat melewati batas, file
+# yang paling lama tidak diakses (atime, diperbarui sendiri saat hit) dihapus
+# sampai tersisa LOW_WATER dari kapasitas.
+#
+# Render berjalan di thread pool OS (di bawah gevent memakai threadpool gevent)
+# supaya event loop tidak tertahan. Permintaan bersamaan untuk varian yang sama
+# di satu proses menunggu satu render yang sama; antar-proses, file ditulis ke
+# .tmp lalu os.replace, jadi render ganda paling buruk hanya membuang kerja.
+#
+# File asli dibaca lewat storage (bisa object storage); cache hasil render tetap
+# di disk lokal tiap node. Isi file hash tidak pernah berubah, tetapi file bisa
+# keluar dari uploads (ditolak/dikarantina): keberadaannya dicek paling lama
+# setiap SOURCE_CHECK_TTL detik per proses, bukan HEAD ke bucket per request.
+DEFAULT_SIZES = "64x64,128x128,256x256,512x512,640x0,1080x0"
+ALLOWED_SIZES = frozenset(
+    tuple(int(part) for part in size.strip().lower().split('x'))
+    for size in os.environ.get('MEDIA_RESIZE_SIZES', DEFAULT_SIZES).split(',') if size.strip()
+)
+CACHE_MAX_BYTES = int(os.environ.get('MEDIA_CACHE_MAX_MB', 1024)) * 1024 * 1024
+LOW_WATER = 0.9
+RENDER_WORKERS = int(os.environ.get('MEDIA_RENDER_WORKERS', 2))
+RENDER_TIMEOUT = float(os.environ.get('MEDIA_RENDER_TIMEOUT', 30))
+# atime hanya diperbarui jika lebih lama dari ini, supaya hit beruntun tidak selalu menulis metadata.
+ATIME_RESOLUTION = 60
+STALE_TMP_SECONDS = 3600
+SOURCE_CHECK_TTL = float(os.environ.get('MEDIA_SOURCE_CHECK_TTL', 60))
+SOURCE_CHECK_MAX_ENTRIES = 10000
+
+_executor = None
+_executor_pid = None
+_inflight = {}
+# source file hash -> waktu (monotonic) sampai keberadaannya perlu dicek ulang.
+_source_checked = {}
+_lock = threading.Lock()
+_evicting = False
+_bytes_since_evict = 0
+
+
+class SizeNotAllowed(ValueError):
+    pass
+
+
+class MediaNotFound(LookupError):
+    pass
+
+
+def _reset_stats():
+    global _stats
+    _stats = {
+        'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0,
+        'render_ms_total': 0.0, 'render_ms_max': 0.0, 'bytes_written': 0,
+        'evictions': 0, 'evicted_bytes': 0, 'last_evict_at': None,
+    }
+
+
+_reset_stats()
+
+
+def cache_dir():
+    return os.environ.get('MEDIA_CACHE_DIR') or os.path.join(current_app.root_path, 'media_cache')
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # Pool tidak ikut ter-fork: setiap worker gunicorn membuat pool sendiri.
+    if _executor is None or _executor_pid != os.getpid():
+        executor_cls = ThreadPoolExecutor
+        try:
+            from gevent import monkey
+            if monkey.is_module_patched('threading'):
+                from gevent.threadpool import ThreadPoolExecutor as executor_cls
+        except ImportError:
+            pass
+        _executor = executor_cls(max_workers=RENDER_WORKERS)
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _render_to_cache(data, target_path, width, height, fmt):
+    """Dijalankan di thread pool. Mengembalikan (durasi ms, ukuran file)."""
+    started = time.perf_counter()
+    with open_image(data, max(width, height)) as img:
+        img = img.convert(output_mode(img, fmt))
+        variant = render(img, width, height or None)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        variant.save(tmp_path, format=fmt.upper(), quality=VARIANT_QUALITY, method=4)
+    os.replace(tmp_path, target_path)
+    return (time.perf_counter() - started) * 1000, os.path.getsize(target_path)
+
+
+def get_resized(width, height, filename):
+    """Path file varian di cache (render dulu jika belum ada). Harus di dalam app context."""
+    global _bytes_since_evict
+    if (width, height) not in ALLOWED_SIZES:
+        raise SizeNotAllowed(f"Ukuran {width}x{height} tidak diizinkan")
+    source = normalize_source(filename)
+    try:
+        source_key = clean_key(f"uploads/{source}") if source else None
+    except ValueError:
+        source_key = None
+    if source_key is None:
+        raise MediaNotFound(filename)
+
+    fmt = output_format()
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    target_path = safe_join(cache_dir(), f"{width}x{height}", f"{source}.{ext}")
+    storage = get_storage()
+    source_mtime = 0
+    hashed = is_hashed(source)
+    if not hashed or _source_checked.get(source, 0) < time.monotonic():
+        source_stat = storage.stat(source_key)
+        if source_stat is None:
+            # File asli sudah dihapus/ditolak/dikarantina: varian lama jangan ikut tersaji.
+            _source_checked.pop(source, None)
+            if os.path.exists(target_path): # type: ignore
+                os.remove(target_path) # type: ignore
+            raise MediaNotFound(filename)
+        if hashed:
+            # Isi file hash tidak berubah: yang dicek hanya keberadaannya di uploads.
+            if len(_source_checked) >= SOURCE_CHECK_MAX_ENTRIES:
+                _source_checked.clear()
+            _source_checked[source] = time.monotonic() + SOURCE_CHECK_TTL
+        else:
+            source_mtime = source_stat[1]
+
+    try:
+        st = os.stat(target_path) # type: ignore
+        if st.st_mtime >= source_mtime:
+            now = time.time()
+            if now - st.st_atime > ATIME_RESOLUTION:
+                os.utime(target_path, (now, st.st_mtime)) # type: ignore
+            with _lock:
+                _stats['hits'] += 1
+            return target_path
+    except FileNotFoundError:
+        pass
+
+    key = (width, height, source)
+    with _lock:
+        future = _inflight.get(key)
+    data = None
+    if future is None:
+        # File asli dibaca di sini (I/O kooperatif di bawah gevent), hanya decode +
+        # resize yang dikirim ke thread pool. Dua miss yang bersamaan bisa sama-sama
+        # membaca file asli, tetapi render tetap satu.
+        try:
+            data = storage.read(source_key)
+        except FileNotFoundError:
+            raise MediaNotFound(filename)
+    with _lock:
+        future = future or _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _get_executor().submit(_render_to_cache, data, target_path, width, height, fmt)
+            _inflight[key] = future
+            _stats['misses'] += 1
+        else:
+            _stats['coalesced'] += 1
+
+    try:
+        elapsed_ms, size = future.result(timeout=RENDER_TIMEOUT)
+    except Exception:
+        if owner:
+            with _lock:
+                _stats['errors'] += 1
+        raise
+    finally:
+        if owner:
+            with _lock:
+                _inflight.pop(key, None)
+
+    if owner:
+        with _lock:
+            _stats['render_ms_total'] += elapsed_ms
+            _stats['render_ms_max'] = max(_stats['render_ms_max'], elapsed_ms)
+            _stats['bytes_written'] += size
+            _bytes_since_evict += size
+            start_evict = not _evicting and _bytes_since_evict > CACHE_MAX_BYTES * (1 - LOW_WATER)
+        if start_evict:
+            # Thread biasa (greenlet di bawah gevent) yang menunggu scan di pool; request tidak ikut menunggu.
+            threading.Thread(target=evict_cache, args=(cache_dir(),), daemon=True).start()
+    return target_path
+
+
+def _scan_and_evict(directory, max_bytes):
+    """Dijalankan di thread pool: os.walk + stat bisa lama untuk cache besar."""
+    entries, total, now = [], 0, time.time()
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith('.tmp'):
+                # Sisa render yang prosesnya mati di tengah jalan.
+                if now - st.st_mtime > STALE_TMP_SECONDS:
+                    os.remove(path)
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+            total += st.st_size
+
+    removed = removed_bytes = 0
+    if total > max_bytes:
+        entries.sort()
+        target = max_bytes * LOW_WATER
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            removed_bytes += size
+    return {'files': len(entries) - removed, 'bytes': total, 'removed': removed, 'removed_bytes': removed_bytes}
+
+
+def evict_cache(directory=None, max_bytes=None):
+    """Hapus file paling lama tidak diakses sampai total cache <= LOW_WATER * max_bytes."""
+    global _evicting, _bytes_since_evict
+    directory = directory or cache_dir()
+    with _lock:
+        if _evicting:
+            return None
+        _evicting = True
+    try:
+        result = _get_executor().submit(_scan_and_evict, directory, max_bytes or CACHE_MAX_BYTES).result()
+        with _lock:
+            _bytes_since_evict = 0
+            _stats['evictions'] += result['removed']
+            _stats['evicted_bytes'] += result['removed_bytes']
+            _stats['last_evict_at'] = time.time()
+        if result['removed']:
+            print(f"[MediaCache] {result['removed']} file dihapus ({result['removed_bytes'] / 1024 / 1024:.1f} MB), "
+                  f"sisa {result['bytes'] / 1024 / 1024:.1f} MB")
+        return result
+    finally:
+        with _lock:
+            _evicting = False
+
+
+def cache_stats(reset=False):
+    """Statistik cache di proses ini (hit rate dan waktu render)."""
+    with _lock:
+        stats = dict(_stats)
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        renders = stats['misses'] - stats['errors']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['avg_render_ms'] = round(stats['render_ms_total'] / renders, 1) if renders > 0 else 0.0
+        stats['render_ms_total'] = round(stats['render_ms_total'], 1)
+        stats['render_ms_max'] = round(stats['render_ms_max'], 1)
+        stats['inflight'] = len(_inflight)
+        stats['max_bytes'] = CACHE_MAX_BYTES
+        stats['allowed_sizes'] = sorted(f"{w}x{h}" for w, h in ALLOWED_SIZES)
+        if reset:
+            _reset_stats()
+    return stats
@@ -0,0 +1,307 @@
+import hashlib
+import io
+import os
+import re
+import uuid
+from datetime import datetime, timezone, timedelta
+from PIL import Image
+from sqlalchemy import update, select, case, or_, literal, literal_column, func, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from ..extensions import db
+from ..models import MediaBlob, Post, User, Chat, QuarantinedItem
+from .storage import get_storage, IMMUTABLE_CACHE
+
+# Penyimpanan upload berbasis isi (content-addressed). File disimpan sekali per
+# SHA-256 sebagai static/uploads/<sha256>.<ext>, jadi nilai kolom (image_url,
+# avatar_url, ...) tetap berupa nama file biasa dan semua serializer/klien lama
+# tetap jalan. Upload dengan isi yang sudah ada hanya menambah ref_count.
+#
+# Status file dicatat di kolom media_blobs.status dan menentukan foldernya:
+# <status>/<sha256>.<ext>. Hanya folder uploads yang publik (dan di-cache
+# immutable), jadi file pending/reject/quarantine tidak bisa diakses lewat
+# URL uploads walaupun hash-nya diketahui. Satu file bisa dipakai banyak post,
+# jadi status mengikuti pemakai yang paling terbuka: 'uploads' selalu menang,
+# dan status lain hanya bisa menimpa 'uploads' jika file tidak dipakai bersama
+# (ref_count <= 1). Saat referensi dilepas, status dihitung ulang dari pemakai
+# yang tersisa. Jika pemindahan file tidak sempat mengikuti status (transaksi
+# dibatalkan, proses mati), `flask media recount` merapikannya.
+#
+# File dengan ref_count 0 dihapus oleh collect_garbage setelah masa tenggang,
+# bukan saat itu juga, supaya tidak berebut dengan upload isi yang sama.
+STATUSES = ('uploads', 'pending', 'reject', 'quarantine')
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+GC_GRACE = timedelta(hours=int(os.environ.get('MEDIA_GC_GRACE_HOURS', 1)))
+EXT_BY_FORMAT = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif', 'AVIF': 'avif', 'TIFF': 'tif'}
+
+
+def is_hashed(name):
+    return bool(name) and HASHED_NAME.match(name) is not None
+
+
+def storage_key(name, status='uploads'):
+    """Key storage file: file hash maupun file lama berada di folder sesuai statusnya."""
+    return f"{status}/{name}"
+
+
+def locate(name, storage=None):
+    """Key storage file yang benar-benar ada (cek semua folder status, uploads lebih dulu), atau None.
+
+    `storage` bisa diberikan oleh pemanggil di thread tanpa app context."""
+    if not name or name.startswith('http'):
+        return None
+    storage = storage or get_storage()
+    for folder in STATUSES:
+        key = f"{folder}/{name}"
+        if storage.exists(key):
+            return key
+    return None
+
+
+def static_path(name, status='uploads'):
+    """Path relatif untuk klien ('static/...'); URL eksternal dikembalikan apa adanya.
+
+    File hash yang dipakai bersama bisa tetap di uploads walau post ini ditolak,
+    jadi untuk status non-publik folder diambil dari status blob-nya.
+    """
+    if not name or name.startswith('http') or name.startswith('static/'):
+        return name
+    if is_hashed(name) and status != 'uploads':
+        status = blob_status(name) or status
+    return f"static/{status}/{name}"
+
+
+def _detect_ext(data, filename=None):
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            ext = EXT_BY_FORMAT.get(img.format or '')
+            if ext:
+                return ext
+    except Exception:
+        pass
+    if filename and '.' in filename:
+        return filename.rsplit('.', 1)[1].lower()[:10]
+    return 'bin'
+
+
+def store_upload(data, filename=None, status='uploads'):
+    """Simpan bytes upload, kembalikan (nama file, is_new).
+
+    Jika isi yang sama sudah ada, hanya ref_count yang bertambah (tanpa menulis
+    file). Perubahan ref_count ikut transaksi pemanggil.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(MediaBlob).values(
+        sha256=sha256, ext=_detect_ext(data, filename), size_bytes=len(data),
+        ref_count=1, status=status, created_at=now, updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MediaBlob.sha256],
+        set_={
+            'ref_count': MediaBlob.ref_count + 1,
+            'status': case((stmt.excluded.status == 'uploads', 'uploads'), else_=MediaBlob.status),
+            'updated_at': now,
+        }
+    ).returning(MediaBlob.ext, MediaBlob.status, literal_column('xmax = 0').label('inserted'))
+    ext, current_status, inserted = db.session.execute(stmt).one()
+
+    name = f"{sha256}.{ext}"
+    storage = get_storage()
+    key = storage_key(name, current_status)
+    # Upload paralel dengan isi sama: pihak yang kalah tetap menulis jika file belum
+    # ada, supaya URL tidak sempat 404. Isinya identik, jadi menimpa aman.
+    if inserted or not storage.exists(key):
+        storage.put(key, data, cache_control=IMMUTABLE_CACHE if current_status == 'uploads' else None)
+        if not inserted:
+            # Status berubah (mis. isi yang sama kini diunggah publik): salinan lama dihapus.
+            for folder in STATUSES:
+                if folder != current_status:
+                    storage.delete(storage_key(name, folder))
+    return name, bool(inserted)
+
+
+def _place_blob(name, status):
+    """Pindahkan file hash ke folder `status`; varian (publik) dihapus jika tidak lagi di uploads."""
+    from .media_variant_service import delete_variants
+
+    storage = get_storage()
+    target = storage_key(name, status)
+    source = locate(name, storage)
+    if source is not None and source != target:
+        storage.move(source, target)
+    if status != 'uploads':
+        delete_variants(name)
+
+
+def set_status(name, status):
+    """Pindahkan file ke status lain. Mengembalikan nama file (bisa berubah untuk file lama).
+
+    File hash: kolom status diubah (kecuali file publik yang dipakai bersama) dan
+    file dipindah ke folder status barunya. File lama (nama acak) dipindah, dan
+    diberi nama baru saat dikarantina.
+    """
+    if status not in STATUSES:
+        raise ValueError(f"Status media tidak dikenal: {status}")
+    if not name or name.startswith('http'):
+        return name
+    if is_hashed(name):
+        stmt = update(MediaBlob).where(MediaBlob.sha256 == name.split('.', 1)[0])
+        if status != 'uploads':
+            stmt = stmt.where(or_(MediaBlob.status != 'uploads', MediaBlob.ref_count <= 1))
+        updated = db.session.execute(
+            stmt.values(status=status, updated_at=datetime.now(timezone.utc)).returning(MediaBlob.status)
+        ).scalar()
+        if updated is not None:
+            _place_blob(name, updated)
+        return name
+
+    src = locate(name)
+    if src is None:
+        return None if status == 'quarantine' else name
+    if status == 'quarantine':
+        # Nama acak supaya file karantina lama tidak bisa ditebak dari URL aslinya.
+        new_name = f"{uuid.uuid4().hex}.{name.rsplit('.', 1)[-1]}"
+    else:
+        new_name = name
+    get_storage().move(src, f"{status}/{new_name}")
+    return new_name
+
+
+def blob_status(name):
+    if not is_hashed(name):
+        return None
+    return db.session.execute(
+        select(MediaBlob.status).where(MediaBlob.sha256 == name.split('.', 1)[0])
+    ).scalar()
+
+
+def _reference_status(name):
+    """Status yang seharusnya dari pemakai file saat ini (yang paling terbuka), atau None."""
+    post_status = case(
+        (Post.moderation_status == 'approved', 'uploads'),
+        (Post.moderation_status == 'pending', 'pending'),
+        else_='reject'
+    )
+    rows = db.session.execute(union_all(
+        select(post_status.label('status')).where(Post.image_url == name),
+        select(literal('uploads')).where(or_(User.avatar_url == name, User.banner_url == name)),
+        select(literal('uploads')).where(Chat.image_url == name),
+        select(literal('quarantine')).where(QuarantinedItem.file_path == name),
+    ))
+    statuses = {status for (status,) in rows}
+    return min(statuses, key=STATUSES.index) if statuses else None
+
+
+def release(name, legacy_folder=None):
+    """Lepas satu referensi. File hash dihapus belakangan oleh collect_garbage;
+    file lama hanya dihapus (langsung) jika `legacy_folder` diberikan.
+
+    Dipanggil setelah referensinya dilepas dari baris pemakai (kolom diganti
+    atau baris dihapus di session), karena status file hash dihitung ulang dari
+    pemakai yang tersisa: file bersama yang kehilangan pemakai publik terakhirnya
+    keluar dari uploads.
+    """
+    if not name or name.startswith('http'):
+        return
+    if is_hashed(name):
+        sha256 = name.split('.', 1)[0]
+        db.session.execute(
+            update(MediaBlob)
+            .where(MediaBlob.sha256 == sha256)
+            .values(ref_count=func.greatest(MediaBlob.ref_count - 1, 0), updated_at=datetime.now(timezone.utc))
+        )
+        status = _reference_status(name)
+        if status is not None:
+            updated = db.session.execute(
+                update(MediaBlob)
+                .where(MediaBlob.sha256 == sha256, MediaBlob.status != status)
+                .values(status=status, updated_at=datetime.now(timezone.utc))
+                .returning(MediaBlob.status)
+            ).scalar()
+            if updated is not None:
+                _place_blob(name, updated)
+        return
+    if legacy_folder:
+        get_storage().delete(f"{legacy_folder}/{name}")
+
+
+def collect_garbage(limit=500):
+    """Hapus file + varian untuk blob tanpa referensi yang lebih tua dari GC_GRACE."""
+    from .media_variant_service import delete_variants
+
+    cutoff = datetime.now(timezone.utc) - GC_GRACE
+    blobs = db.session.execute(
+        select(MediaBlob)
+        .where(MediaBlob.ref_count <= 0, MediaBlob.updated_at < cutoff)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    storage = get_storage()
+    freed = 0
+    for blob in blobs:
+        # File dihapus sebelum commit: upload isi yang sama menunggu row lock ini,
+        # lalu menyisipkan row baru dan menulis ulang file setelah kita selesai.
+        # Semua folder dicek: file bisa tertinggal di folder status lama.
+        if any([storage.delete(storage_key(blob.name, folder)) for folder in STATUSES]):
+            freed += blob.size_bytes or 0
+        delete_variants(blob.name)
+        db.session.delete(blob)
+    db.session.commit()
+    return len(blobs), freed
+
+
+def _referenced_names():
+    columns = (Post.image_url, User.avatar_url, User.banner_url, Chat.image_url, QuarantinedItem.file_path)
+    pattern = r'^[0-9a-f]{64}\.[a-z0-9]+$'
+    names = union_all(*[
+        select(column.label('name')).where(column.op('~')(pattern)) for column in columns
+    ]).subquery()
+    rows = db.session.execute(select(names.c.name, func.count()).group_by(names.c.name))
+    return {name.split('.', 1)[0]: count for name, count in rows}
+
+
+def recount():
+    """Hitung ulang ref_count dari kolom pemakai, daftarkan file hash tanpa row, dan
+    pindahkan file hash yang berada di folder yang tidak sesuai statusnya.
+
+    Dipakai setelah penghapusan yang tidak lewat release() (mis. cascade hapus user).
+    """
+    counts = _referenced_names()
+    changed = 0
+    statuses = {}
+    for blob in db.session.execute(select(MediaBlob)).scalars():
+        statuses[blob.sha256] = blob.status
+        expected = counts.pop(blob.sha256, 0)
+        if blob.ref_count != expected:
+            blob.ref_count = expected
+            blob.updated_at = datetime.now(timezone.utc)
+            changed += 1
+
+    # File hash di storage yang tidak punya row (mis. transaksi upload di-rollback)
+    # didaftarkan dengan ref_count sebenarnya supaya bisa dibersihkan GC; file yang
+    # foldernya tidak cocok dengan status (pemindahan yang tertinggal) dipindah.
+    registered = moved = 0
+    storage = get_storage()
+    for folder in STATUSES:
+        for key, size, _ in list(storage.list(folder)):
+            name = key[len(folder) + 1:]
+            if not is_hashed(name):
+                continue
+            sha256, ext = name.split('.', 1)
+            status = statuses.get(sha256)
+            if status is None:
+                db.session.add(MediaBlob(
+                    sha256=sha256, ext=ext, size_bytes=size, # type: ignore
+                    ref_count=counts.pop(sha256, 0), status=folder # type: ignore
+                ))
+                statuses[sha256] = folder
+                registered += 1
+            elif status != folder:
+                target = storage_key(name, status)
+                if storage.exists(target):
+                    storage.delete(key)
+                else:
+                    storage.move(key, target)
+                moved += 1
+    db.session.commit()
+    return {'updated': changed, 'registered': registered, 'moved': moved, 'missing_files': len(counts)}
@@ -0,0 +1,242 @@
+import io
+import os
+import time
+from PIL import Image, ImageOps, features
+from ..extensions import db
+from ..models import MediaVariant
+from .media_store import store_upload, is_hashed
+from .storage import get_storage, IMMUTABLE_CACHE
+
+# Setiap gambar yang diunggah ke static/uploads langsung dibuatkan beberapa varian
+# ukuran saat upload, jadi serializer/notifikasi tidak perlu lagi me-resize di
+# dalam request. 128 & 256 dipotong persegi (ikon, thumbnail notifikasi),
+# 640 & 1080 diperkecil mengikuti lebar (feed/detail). Serializer post dan user
+# menyertakannya sebagai image_variants/avatar_variants/banner_variants.
+#
+# File varian: static/variants/<ukuran>/<nama asli>.<format>. Daftar ukuran yang
+# sudah dibuat dicatat di tabel media_variants supaya URL bisa dibentuk tanpa
+# memeriksa filesystem.
+SQUARE_SIZES = (128, 256)
+WIDTH_SIZES = (640, 1080)
+VARIANT_SIZES = SQUARE_SIZES + WIDTH_SIZES
+
+VARIANT_FORMAT = os.environ.get('MEDIA_VARIANT_FORMAT', 'webp').lower()
+VARIANT_QUALITY = int(os.environ.get('MEDIA_VARIANT_QUALITY', 82))
+VARIANT_FOLDER = 'variants'
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif'}
+
+
+def output_format():
+    if VARIANT_FORMAT == 'webp' and features.check('webp'):
+        return 'webp'
+    return 'jpeg'
+
+
+def normalize_source(path):
+    """Nama file relatif terhadap static/uploads dari nilai kolom DB; None untuk URL eksternal."""
+    if not path or path.startswith('http'):
+        return None
+    path = path.lstrip('/')
+    for prefix in ('static/uploads/', 'uploads/'):
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    if path.startswith('static/'):
+        return None
+    return path
+
+
+def variant_path(source, size, fmt):
+    """Path relatif terhadap folder static."""
+    ext = 'jpg' if fmt == 'jpeg' else fmt
+    return f"{VARIANT_FOLDER}/{size}/{source}.{ext}"
+
+
+def render(img, width, height=None):
+    """Potong tepat `width`x`height`, atau perkecil mengikuti lebar jika `height` kosong (tanpa upscale)."""
+    if height:
+        return ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
+    if img.width <= width:
+        return img
+    height = max(round(img.height * width / img.width), 1)
+    return img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def open_image(data, min_size):
+    img = Image.open(io.BytesIO(data))
+    # JPEG besar di-decode langsung pada skala 1/2, 1/4, atau 1/8 selama hasilnya
+    # masih >= `min_size`; ukuran hasil akhir tetap sama, decode jauh lebih murah.
+    img.draft('RGB', (min_size, min_size))
+    return ImageOps.exif_transpose(img)
+
+
+def output_mode(img, fmt):
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    return 'RGBA' if has_alpha and fmt == 'webp' else 'RGB'
+
+
+def generate_variants(source, data=None):
+    """Tulis semua varian untuk `source` (relatif terhadap static/uploads) dan catat di DB.
+
+    `data` boleh diisi bytes gambar yang baru diunggah supaya file asli tidak dibaca ulang.
+    Record hanya di-add ke session; commit mengikuti transaksi pemanggil (upload
+    dibatalkan = record ikut batal). Mengembalikan record MediaVariant, atau None
+    jika gambar tidak bisa diproses.
+    """
+    source = normalize_source(source)
+    if not source:
+        return None
+    storage = get_storage()
+    if data is None:
+        data = storage.read(f"uploads/{source}")
+
+    fmt = output_format()
+    # Varian file hash ikut immutable; varian file lama bisa dibuat ulang (--force).
+    cache_control = IMMUTABLE_CACHE if is_hashed(source) else None
+    started = time.perf_counter()
+    written = []
+    try:
+        with open_image(data, max(VARIANT_SIZES)) as img:
+            original_size = img.size
+            img = img.convert(output_mode(img, fmt))
+            for size in VARIANT_SIZES:
+                variant = render(img, size, size if size in SQUARE_SIZES else None)
+                buffer = io.BytesIO()
+                variant.save(buffer, format=fmt.upper(), quality=VARIANT_QUALITY, method=4)
+                key = variant_path(source, size, fmt)
+                storage.put(key, buffer.getvalue(), cache_control=cache_control)
+                written.append(key)
+    except Exception as e:
+        print(f"[MediaVariant] Gagal membuat varian {source}: {e}")
+        # Tanpa record, varian yang sudah tertulis tidak akan pernah dipakai atau dihapus.
+        for key in written:
+            try:
+                storage.delete(key)
+            except Exception as cleanup_error:
+                print(f"[MediaVariant] Gagal menghapus varian {key}: {cleanup_error}")
+        return None
+
+    record = db.session.get(MediaVariant, source) or MediaVariant(source=source) # type: ignore
+    record.format = fmt
+    record.sizes = list(VARIANT_SIZES)
+    record.width, record.height = original_size
+    db.session.add(record)
+    print(f"[MediaVariant] {source}: {len(VARIANT_SIZES)} varian {fmt} "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return record
+
+
+def ensure_variants(source, data=None):
+    """generate_variants, kecuali varian untuk file ini sudah tercatat (isi yang sama diunggah ulang)."""
+    source = normalize_source(source)
+    if not source:
+        return None
+    return db.session.get(MediaVariant, source) or generate_variants(source, data)
+
+
+def save_upload(data, filename, subfolder=None):
+    """Simpan upload beserta variannya, kembalikan nama file yang disimpan di kolom DB.
+
+    Tanpa `subfolder`, file masuk ke penyimpanan content-addressed (media_store):
+    isi yang sudah pernah diunggah tidak ditulis ulang. `filename` asli hanya
+    dipakai sebagai petunjuk ekstensi. Dengan `subfolder` (gambar artikel),
+    file ditulis apa adanya dengan nama `filename`.
+    """
+    if subfolder is None:
+        name, _ = store_upload(data, filename)
+        ensure_variants(name, data)
+        return name
+
+    get_storage().put(f"uploads/{subfolder}/{filename}", data)
+    generate_variants(f"{subfolder}/{filename}", data)
+    return filename
+
+
+def delete_variants(source):
+    """Hapus file varian dan record-nya (mis. saat file asli dikarantina/dihapus)."""
+    source = normalize_source(source)
+    if not source:
+        return
+    record = db.session.get(MediaVariant, source)
+    if record is None:
+        return
+    storage = get_storage()
+    for size in record.sizes or []:
+        storage.delete(variant_path(source, size, record.format))
+    db.session.delete(record)
+
+
+def prefetch_variants(paths):
+    """Record MediaVariant untuk banyak path sekaligus (satu query IN), {source: record}.
+
+    Dipakai sebagai `variants` di variant_static_path saat membentuk daftar
+    (mis. notifikasi), supaya tidak ada satu SELECT per item.
+    """
+    sources = {normalize_source(path) for path in paths if path}
+    sources.discard(None)
+    if not sources:
+        return {}
+    return {
+        record.source: record
+        for record in db.session.query(MediaVariant).filter(MediaVariant.source.in_(sources))
+    }
+
+
+def variant_static_path(path, size, variants=None):
+    """Path static varian terkecil yang >= `size`; fallback ke file asli di uploads.
+
+    Tidak menyentuh filesystem. Tanpa `variants` (hasil prefetch_variants), setiap
+    panggilan menjalankan satu SELECT ke media_variants kecuali record-nya sudah
+    ada di identity map session. None jika `path` adalah URL eksternal atau kosong.
+    """
+    if not path or path.startswith('http'):
+        return None
+    source = normalize_source(path)
+    if not source:
+        # File static lain (mis. static/images/...): tidak punya varian.
+        return path.lstrip('/')[len('static/'):]
+    record = variants.get(source) if variants is not None else db.session.get(MediaVariant, source)
+    if record and record.sizes:
+        candidates = sorted(s for s in record.sizes if s >= size)
+        if size in SQUARE_SIZES:
+            candidates = [s for s in candidates if s in SQUARE_SIZES] or candidates
+        if candidates:
+            return variant_path(source, candidates[0], record.format)
+    return f"uploads/{source}"
+
+
+def variant_paths(path, variants):
+    """Semua varian tercatat untuk `path` sebagai {"<ukuran>": "static/variants/..."}.
+
+    `variants` hasil prefetch_variants; {} jika file belum/tidak punya varian
+    (URL eksternal, file non-publik, atau varian belum dibuat). Dipakai serializer
+    sebagai field tambahan di samping URL file asli.
+    """
+    source = normalize_source(path)
+    record = variants.get(source) if source else None
+    if not record or not record.sizes:
+        return {}
+    return {str(size): f"static/{variant_path(source, size, record.format)}" for size in sorted(record.sizes)}
+
+
+def backfill_variants(force=False, limit=None, progress=None):
+    """Buat varian untuk semua gambar di uploads yang belum punya. Harus di dalam app context."""
+    existing = set() if force else {row.source for row in db.session.query(MediaVariant.source)}
+    done = skipped = failed = 0
+    for key, _, _ in get_storage().list('uploads'):
+        source = key[len('uploads/'):]
+        # Dokumen RAG bukan gambar publik.
+        if source.startswith('rag/') or source.rsplit('.', 1)[-1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        if source in existing:
+            skipped += 1
+            continue
+        if generate_variants(source) is None:
+            failed += 1
+        else:
+            db.session.commit()
+            done += 1
+        if progress:
+            progress(source, done, skipped, failed)
+        if limit and done + failed >= limit:
+            return done, skipped, failed
+    return done, skipped, failed
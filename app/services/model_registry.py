@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+
+# Service model (ONNX + vocab) tidak lagi dibuat saat modul di-import. Setiap
+# service didaftarkan di sini dan baru dimuat pada pemakaian pertama, atau lewat
+# warmup() di entry point yang melayani traffic (run.py, moderation_worker.py,
+# inference_server.py). Proses lain (Alembic, CLI, seed/clean script) tidak
+# pernah membayar biaya muat model. SKIP_MODELS=true membuat pemakaian model
+# langsung gagal, sebagai pengaman untuk proses yang memang tidak boleh memuatnya.
+#
+# Memuat service hanya membaca aset read-only (byte file ONNX, vocab); session
+# ONNX Runtime dibuat saat inferensi pertama atau lewat warmup(). Dengan gunicorn
+# preload_app, master cukup memanggil preload() sehingga aset dibagi
+# copy-on-write, dan session (beserta thread pool-nya) hanya pernah ada di worker.
+SKIP_MODELS_ENV = 'SKIP_MODELS'
+
+_registry = {}
+
+
+class ModelsDisabled(RuntimeError):
+    pass
+
+
+def models_disabled():
+    return os.environ.get(SKIP_MODELS_ENV, 'false').lower() == 'true'
+
+
+class LazyModel:
+    """Proxy untuk service model: atribut diteruskan ke instance yang dimuat saat pertama diakses."""
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self.load_ms = None
+        self.warmup_ms = None
+        self.error = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def load(self):
+        if self._instance is not None:
+            return self._instance
+        if models_disabled():
+            raise ModelsDisabled(f"Model '{self._name}' tidak dimuat karena {SKIP_MODELS_ENV}=true")
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+                self.error = None
+                self._instance = instance
+                print(f"[ModelRegistry] {self._name} dimuat dalam {self.load_ms} ms")
+        return self._instance
+
+    def warmup(self):
+        instance = self.load()
+        started = time.perf_counter()
+        warm = getattr(instance, 'warmup', None)
+        if warm is not None:
+            warm()
+        self.warmup_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self.warmup_ms
+
+    def status(self):
+        return {
+            'name': self._name,
+            'loaded': self.loaded,
+            'load_ms': self.load_ms,
+            'warmup_ms': self.warmup_ms,
+            'error': self.error,
+        }
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModel {self._name} loaded={self.loaded}>"
+
+
+def read_model_file(path):
+    """(byte file model, bagian tag versinya). stat diambil dari handle yang sama
+    dengan yang dibaca, jadi tag cocok dengan byte walau file diganti bersamaan."""
+    from .verdict_cache import file_version_part
+
+    with open(path, 'rb') as f:
+        return f.read(), file_version_part(path, os.fstat(f.fileno()))
+
+
+def register(name, factory):
+    model = LazyModel(name, factory)
+    _registry[name] = model
+    return model
+
+
+def get(name):
+    return _registry[name].load()
+
+
+def _ensure_registered():
+    # Service mendaftarkan diri saat modulnya di-import.
+    from . import image_moderation_service, post_classification_service, feedback_sentiment_service # noqa: F401
+
+
+def warmup(names=None):
+    """Muat dan panaskan model (satu inferensi dummy). Mengembalikan status per model;
+    kegagalan satu model dicatat di status dan tidak menghentikan model lain."""
+    _ensure_registered()
+    for name in (names or list(_registry)):
+        model = _registry[name]
+        try:
+            model.warmup()
+            print(f"[ModelRegistry] {name} siap (load {model.load_ms} ms, warmup {model.warmup_ms} ms)")
+        except Exception as e:
+            model.error = str(e)
+            print(f"[ModelRegistry] Gagal warmup {name}: {e}")
+    return model_status()
+
+
+def preload(names=None):
+    """Muat aset read-only model (byte ONNX, vocab) tanpa membuat session. Dipakai di
+    master gunicorn sebelum fork; session dibuat di worker oleh reload_after_fork()."""
+    _ensure_registered()
+    for name in (names or list(_registry)):
+        model = _registry[name]
+        try:
+            model.load()
+        except Exception as e:
+            model.error = str(e)
+            print(f"[ModelRegistry] Gagal preload {name}: {e}")
+    return model_status()
+
+
+def reload_after_fork():
+    """Dipanggil di setiap worker setelah fork (gunicorn preload_app). Aset read-only
+    (byte model, vocab, kamus, kode) tetap dibagi copy-on-write dengan master;
+    session ONNX dibuat (dan dipanaskan) di sini, jadi thread pool runtime-nya
+    tidak pernah ada di master."""
+    for model in _registry.values():
+        if not model.loaded:
+            continue
+        started = time.perf_counter()
+        try:
+            model.load().reload_sessions()
+            model.warmup()
+        except Exception as e:
+            model.error = str(e)
+            print(f"[ModelRegistry] Gagal membuat session {model.name} di pid {os.getpid()}: {e}")
+            continue
+        print(f"[ModelRegistry] Session {model.name} dibuat di pid {os.getpid()} "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def model_status():
+    _ensure_registered()
+    return [model.status() for model in _registry.values()]
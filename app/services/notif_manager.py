@@ -2,7 +2,7 @@ from ..models import db, Notification, User
 from ..services.notification_service import NotificationService 
 
 def create_notification(recipient_id, sender_id, type, reference_id=None, text=None):
-    if recipient_id == sender_id and type not in ['post_rejected', 'appeal_approved', 'appeal_rejected']:
+    if recipient_id == sender_id and type not in ['post_rejected', 'moderation_delayed', 'appeal_approved', 'appeal_rejected']:
         return
 
     new_notif = Notification(
@@ -42,13 +42,16 @@ def create_notification(recipient_id, sender_id, type, reference_id=None, text=N
             )
             return
 
-        is_mod = type in ['post_rejected', 'appeal_approved', 'appeal_rejected']
+        is_mod = type in ['post_rejected', 'moderation_delayed', 'appeal_approved', 'appeal_rejected']
         title = "Pemberitahuan Amica"
         content = "Seseorang berinteraksi dengan Anda."
 
         if type == 'post_rejected':
             title = "AMICA Moderasi"
             content = "Postingan Anda ditahan karena melanggar pedoman komunitas."
+        elif type == 'moderation_delayed':
+            title = "AMICA Moderasi"
+            content = "Postingan Anda sedang ditinjau manual oleh tim kami."
         elif type == 'appeal_approved':
             title = "AMICA Update"
             content = "Banding diterima! Postingan Anda kini telah tayang."
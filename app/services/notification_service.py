@@ -2,7 +2,7 @@ import requests
 import json
 import os
 from flask import url_for
-from ..utils.image_utils import generate_thumbnail
+from .media_variant_service import variant_static_path
 
 class NotificationService:
     def send_push_notification(self, player_ids, title, content, data=None, group_key=None, large_icon=None):
@@ -44,11 +44,8 @@ class NotificationService:
     def send_post_notification(self, recipient_ids, sender_name, text, post_id, post_image_path=None):
         image_url = None
         if post_image_path:
-            thumb_path = generate_thumbnail(post_image_path, size=(256, 256))
-            if thumb_path:
-                image_url = url_for('static', filename=thumb_path, _external=True)
-            else:
-                image_url = url_for('static', filename=post_image_path, _external=True)
+            static_path = variant_static_path(post_image_path, 256)
+            image_url = url_for('static', filename=static_path, _external=True) if static_path else post_image_path
 
         click_data = {
             "type": "post",
@@ -66,11 +63,8 @@ class NotificationService:
     def send_chat_notification(self, recipient_ids, title, content, chat_id, is_group, sender_avatar_path=None, message_id=None):
         icon_url = None
         if sender_avatar_path:
-            thumb_path = generate_thumbnail(sender_avatar_path, size=(128, 128))
-            if thumb_path:
-                icon_url = url_for('static', filename=thumb_path, _external=True)
-            else:
-                icon_url = url_for('static', filename=sender_avatar_path, _external=True)
+            static_path = variant_static_path(sender_avatar_path, 128)
+            icon_url = url_for('static', filename=static_path, _external=True) if static_path else sender_avatar_path
 
         click_data = {
             "type": "chat",
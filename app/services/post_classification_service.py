@@ -1,10 +1,19 @@
 import onnxruntime
 import numpy as np
 import os
+import threading
+import time
+import hashlib
 from ..utils.text_utils import post_preprocess_text
+from .inference_batcher import MicroBatcher, model_batch_limit, run_in_chunks, DEFAULT_BULK_BATCH_SIZE
+from .inference_executor import is_remote, remote_predict
+from . import model_registry
+from .verdict_cache import VerdictCache, version_tag
 
 class PostClassificationService:
     _instance = None
+    MODEL_PATH = "models_ml/text/post/post_classifier.onnx"
+    MODEL_FILES = (MODEL_PATH,)
     
     def __new__(cls):
         if cls._instance is None:
@@ -15,29 +24,124 @@ class PostClassificationService:
     def __init__(self):
         if self._initialized:
             return
+        if is_remote():
+            # Model dimuat di sidecar inference; worker ini hanya meneruskan input.
+            self._initialized = True
+            return
         
-        model_path = "models_ml/text/post/post_classifier.onnx"
+        self.model_path = self.MODEL_PATH
         
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Post classification ONNX model not found at {model_path}")
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Post classification ONNX model not found at {self.model_path}")
 
-        self.session = onnxruntime.InferenceSession(model_path)
-        self.input_name = self.session.get_inputs()[0].name
+        # Hanya byte model yang dimuat di sini (bisa di master gunicorn sebelum
+        # fork); session ONNX dibuat di proses yang memakainya (_ensure_sessions).
+        self._model_bytes, model_version = model_registry.read_model_file(self.model_path)
+        self._sessions_lock = threading.Lock()
+        self._sessions_ready = False
+        self._batcher = None
+        # Caption, komentar dan chat pendek ("wkwk", "ok") sangat sering berulang:
+        # verdict di-cache per hasil post_preprocess_text.
+        self._verdicts = VerdictCache('post_classification', version_tag([model_version]))
         self._initialized = True
+
+    def _create_sessions(self):
+        self.session = onnxruntime.InferenceSession(self._model_bytes)
+        self.input_name = self.session.get_inputs()[0].name
+        if self._batcher is None:
+            self._batcher = MicroBatcher(
+                'post_classification', self._predict_batch,
+                max_batch_size=model_batch_limit(self.session, None)
+            )
+        self._sessions_ready = True
+
+    def _ensure_sessions(self):
+        if not self._sessions_ready:
+            with self._sessions_lock:
+                if not self._sessions_ready:
+                    self._create_sessions()
+
+    def reload_sessions(self):
+        """Buat session ONNX di proses ini (setelah fork; thread pool runtime tidak ikut ter-fork)."""
+        if not is_remote():
+            with self._sessions_lock:
+                self._create_sessions()
+
+    def _infer(self, processed_texts):
+        self._ensure_sessions()
+        input_data = np.array([[text] for text in processed_texts], dtype=object)
+        
+        outputs = self.session.run(None, {self.input_name: input_data})
+        
+        results = []
+        for predicted_label, prob_dict in zip(outputs[0], outputs[1]): # type: ignore
+            confidence = float(prob_dict.get(predicted_label, 0.0))
+            results.append((str(predicted_label), confidence))
+        return results
+
+    def _cache_key(self, processed_text):
+        return hashlib.blake2b(processed_text.encode(), digest_size=16).hexdigest()
+
+    def _predict_batch(self, processed_texts):
+        started = time.perf_counter()
+        results = self._infer(processed_texts)
+        self._verdicts.record_inference(len(processed_texts), (time.perf_counter() - started) * 1000)
+        self._verdicts.set_many([(self._cache_key(text), result) for text, result in zip(processed_texts, results)])
+        return results
         
     def predict(self, text):
         if not text or str(text).strip() == "":
             return "SAFE", 0.0
+        if is_remote():
+            return remote_predict('post_classification', text)
 
         processed_text = post_preprocess_text(text)
-        input_data = np.array([[processed_text]], dtype=object)
-        
-        outputs = self.session.run(None, {self.input_name: input_data})
-        
-        predicted_label = outputs[0][0] # type: ignore
-        prob_dict = outputs[1][0] # type: ignore
-        confidence = float(prob_dict.get(predicted_label, 0.0))
-        
-        return str(predicted_label), confidence
+        cached = self._verdicts.get_many([self._cache_key(processed_text)])[0]
+        if cached is not None:
+            return cached
+        self._ensure_sessions()
+        return self._batcher.submit(processed_text)
+
+    def predict_batch(self, texts, chunk_size=None):
+        """Versi list dari predict() untuk job massal: hasil identik dengan memanggil
+        predict() per item, tetapi model dijalankan sekali per chunk."""
+        if is_remote():
+            return remote_predict('post_classification_batch', list(texts))
+
+        results = [None] * len(texts)
+        positions, processed_texts = [], []
+        for i, text in enumerate(texts):
+            if not text or str(text).strip() == "":
+                results[i] = ("SAFE", 0.0)
+            else:
+                positions.append(i)
+                processed_texts.append(post_preprocess_text(text))
+        if not positions:
+            return results
+
+        cached = self._verdicts.get_many([self._cache_key(text) for text in processed_texts])
+        pending = [k for k, verdict in enumerate(cached) if verdict is None]
+        for k, verdict in enumerate(cached):
+            if verdict is not None:
+                results[positions[k]] = verdict
+
+        self._ensure_sessions()
+        chunk_size = model_batch_limit(self.session, chunk_size or DEFAULT_BULK_BATCH_SIZE)
+        verdicts = run_in_chunks(self._predict_batch, [processed_texts[k] for k in pending], chunk_size)
+        for k, verdict in zip(pending, verdicts):
+            results[positions[k]] = verdict
+        return results
+
+    def model_version(self):
+        """Tag versi model yang benar-benar dimuat (dari byte yang dibaca, bukan file di disk saat ini)."""
+        if is_remote():
+            return remote_predict('post_classification_version', None)
+        return self._verdicts.version
+
+    def warmup(self):
+        if is_remote():
+            return
+        # Langsung ke model (tanpa cache verdict) supaya session benar-benar terpanaskan.
+        self._infer([post_preprocess_text("halo apa kabar")])
 
-post_classifier = PostClassificationService()
\ No newline at end of file
+post_classifier = model_registry.register('post_classification', PostClassificationService)
\ No newline at end of file
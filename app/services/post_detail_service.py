@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, timezone, timedelta
+from ..extensions import db, redis_client
+from ..models import Post, User, Appeal
+from .counter_service import pending_deltas
+from .media_store import static_path
+from .media_variant_service import prefetch_variants, variant_paths
+
+# Bagian publik detail post (tanpa flag viewer) di-cache per post. Setiap post
+# yang di-cache juga dicatat di set milik author-nya, supaya perubahan profil
+# author cukup menghapus semua detail post miliknya.
+POST_DETAIL_TTL = 300
+
+
+def _key(post_id):
+    return f"post:detail:{post_id}"
+
+
+def _author_key(user_id):
+    return f"post:detail:author:{user_id}"
+
+
+def _isoformat(dt):
+    if dt is None:
+        return datetime.now(timezone.utc).isoformat()
+    dt = dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+    return dt.isoformat().replace('+00:00', 'Z')
+
+
+def _load(post_id):
+    """Post + author + status banding terbaru dalam satu query."""
+    row = db.session.query(Post, User, Appeal.status, Appeal.admin_note)\
+        .join(User, Post.user_id == User.id)\
+        .outerjoin(Appeal, Appeal.content_id == Post.id)\
+        .filter(Post.id == post_id)\
+        .order_by(Appeal.created_at.desc().nullslast())\
+        .first()
+    if not row:
+        return None
+
+    post, author, appeal_status, admin_note = row
+    if post.moderation_status == 'pending':
+        folder = 'pending'
+    elif post.moderation_status in ['rejected', 'appealing', 'final_rejected']:
+        folder = 'reject'
+    else:
+        folder = 'uploads'
+    image_url = static_path(post.image_url, folder)
+    avatar_url = author.avatar_url
+    if avatar_url and not avatar_url.startswith('http'):
+        avatar_url = f"static/uploads/{avatar_url}"
+    # Varian hanya ada untuk file publik (uploads), jadi post pending/ditolak mendapat {}.
+    variants = prefetch_variants([post.image_url, author.avatar_url])
+
+    return {
+        "id": str(post.id),
+        "caption": post.caption,
+        "tags": post.tags if post.tags else [],
+        "image_url": image_url,
+        "image_variants": variant_paths(post.image_url, variants),
+        "created_at": _isoformat(post.created_at),
+        "likes_count": post.likes_count or 0,
+        "comments_count": post.comments_count or 0,
+        "status": post.moderation_status,
+        "moderation_details": post.moderation_details,
+        "expires_at": (post.created_at + timedelta(hours=24)).isoformat(),
+        "appeal_status": appeal_status,
+        "admin_note": admin_note,
+        "author": {
+            "id": str(author.id),
+            "display_name": author.display_name,
+            "username": author.username,
+            "avatar_url": avatar_url,
+            "avatar_variants": variant_paths(author.avatar_url, variants),
+            "is_verified": author.is_verified,
+        }
+    }
+
+
+def get_post_detail(post_id):
+    """Detail publik post (counter sudah termasuk delta yang belum di-flush). None jika tidak ada."""
+    detail = None
+    try:
+        raw = redis_client.get(_key(post_id))
+        if raw:
+            detail = json.loads(raw) # type: ignore
+    except Exception as e:
+        print(f"[PostDetail] Gagal membaca cache {post_id}: {e}")
+
+    if detail is None:
+        detail = _load(post_id)
+        if detail is None:
+            return None
+        try:
+            pipe = redis_client.pipeline()
+            pipe.set(_key(post_id), json.dumps(detail), ex=POST_DETAIL_TTL)
+            pipe.sadd(_author_key(detail['author']['id']), str(post_id))
+            pipe.expire(_author_key(detail['author']['id']), POST_DETAIL_TTL)
+            pipe.execute()
+        except Exception as e:
+            print(f"[PostDetail] Gagal menyimpan cache {post_id}: {e}")
+
+    delta = pending_deltas([detail['id']])[detail['id']]
+    detail['likes_count'] = max(detail['likes_count'] + delta['likes'], 0)
+    detail['comments_count'] = max(detail['comments_count'] + delta['comments'], 0)
+    return detail
+
+
+def invalidate_post_detail(*post_ids):
+    if not post_ids:
+        return
+    try:
+        redis_client.delete(*[_key(pid) for pid in post_ids])
+    except Exception as e:
+        print(f"[PostDetail] Gagal invalidasi cache: {e}")
+
+
+def invalidate_author_post_details(user_id):
+    """Hapus detail semua post milik user (dipanggil saat profil berubah)."""
+    try:
+        author_key = _author_key(user_id)
+        post_ids = [m.decode() if isinstance(m, bytes) else m for m in redis_client.smembers(author_key)] # type: ignore
+        redis_client.delete(author_key, *[_key(pid) for pid in post_ids])
+    except Exception as e:
+        print(f"[PostDetail] Gagal invalidasi cache author {user_id}: {e}")
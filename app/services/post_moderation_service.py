@@ -0,0 +1,224 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from ..extensions import db, redis_client, socketio
+from ..models import Post
+from .post_classification_service import post_classifier
+from .image_moderation_service import image_moderator
+from .notif_manager import create_notification
+from .timeline_service import fan_out_post
+from .ranking_service import index_post
+from .feed_service import invalidate_feed_cache
+from .post_detail_service import invalidate_post_detail
+from .media_variant_service import ensure_variants
+from .media_store import locate, set_status
+from .storage import get_storage
+
+ALLOWED_TEXT_CATEGORIES = {'SAFE', 'Bersih'}
+
+QUEUE_KEY = "moderation:queue"
+# Daftar processing bersama dari versi lama; hanya dikosongkan saat recovery.
+LEGACY_PROCESSING_KEY = "moderation:processing"
+WORKERS_KEY = "moderation:workers"
+ATTEMPTS_KEY = "moderation:attempts"
+# post_id -> JSON {error, attempts, failed_at}; ditampilkan di /admin/ai/moderation/dead-letters.
+DEAD_LETTER_KEY = "moderation:dead"
+MAX_ATTEMPTS = 3
+QUEUE_POLL_TIMEOUT = 5
+# Setiap worker punya daftar processing sendiri dan heartbeat ber-TTL. Job hanya
+# dikembalikan ke antrean dari worker yang heartbeat-nya sudah hilang, jadi worker
+# yang baru start tidak mengambil job yang sedang dikerjakan worker lain.
+# TTL harus lebih lama dari waktu proses satu post.
+WORKER_HEARTBEAT_TTL = 120
+RECOVERY_INTERVAL = 60
+
+
+def classify_post(caption, image_bytes=None):
+    """Jalankan model teks (dan gambar bila ada). Mengembalikan (moderation_details, is_unsafe)."""
+    text_category, _ = post_classifier.predict(caption)
+    text_is_unsafe = text_category not in ALLOWED_TEXT_CATEGORIES
+    details = {
+        'text_status': 'unsafe' if text_is_unsafe else 'safe',
+        'text_category': text_category,
+    }
+
+    image_is_unsafe = False
+    if image_bytes is not None:
+        image_status, image_category = image_moderator.predict(image_bytes)
+        image_is_unsafe = (image_status == 'unsafe')
+        details['image_status'] = image_status
+        details['image_category'] = image_category
+
+    return details, (text_is_unsafe or image_is_unsafe)
+
+
+def apply_moderation_result(post, details, is_unsafe):
+    """Set status final, commit, lalu jalankan efek samping approve/reject."""
+    post.moderation_details = details
+    post.moderation_status = 'rejected' if is_unsafe else 'approved'
+    if post not in db.session:
+        db.session.add(post)
+    db.session.commit()
+
+    if is_unsafe:
+        create_notification(
+            recipient_id=post.user_id,
+            sender_id=post.user_id,
+            type='post_rejected',
+            reference_id=str(post.id),
+            text="Postingan Anda ditolak karena melanggar aturan komunitas."
+        )
+    else:
+        fan_out_post(post)
+        index_post(post)
+        invalidate_feed_cache()
+    invalidate_post_detail(post.id)
+
+
+def enqueue_post_moderation(post_id):
+    redis_client.lpush(QUEUE_KEY, str(post_id))
+
+
+def process_pending_post(post_id):
+    """Moderasi satu post 'pending': klasifikasi, set status file, simpan status, kabari author."""
+    post = Post.query.get(post_id)
+    if not post or post.moderation_status != 'pending':
+        return None
+
+    image_bytes = None
+    if post.image_url:
+        # File lama (sebelum media_store) mungkin sudah sempat dipindah pada percobaan sebelumnya.
+        current_key = locate(post.image_url)
+        if current_key is None:
+            raise FileNotFoundError(f"File {post.image_url} tidak ditemukan")
+        image_bytes = get_storage().read(current_key)
+
+    details, is_unsafe = classify_post(post.caption, image_bytes)
+
+    if image_bytes is not None:
+        post.image_url = set_status(post.image_url, 'reject' if is_unsafe else 'uploads')
+        if not is_unsafe:
+            ensure_variants(post.image_url, image_bytes)
+
+    apply_moderation_result(post, details, is_unsafe)
+
+    socketio.emit('post_moderated', {
+        'post_id': str(post.id),
+        'status': post.moderation_status,
+        'moderation_details': details
+    }, to=str(post.user_id))
+    return post.moderation_status
+
+
+def _processing_key(worker_id):
+    return f"moderation:processing:{worker_id}"
+
+
+def _heartbeat_key(worker_id):
+    return f"moderation:worker:{worker_id}"
+
+
+def _heartbeat(worker_id):
+    redis_client.set(_heartbeat_key(worker_id), int(time.time()), ex=WORKER_HEARTBEAT_TTL)
+
+
+def requeue_stale_jobs():
+    """Kembalikan job milik worker yang sudah mati (heartbeat hilang) ke antrean."""
+    moved = 0
+    for raw in redis_client.smembers(WORKERS_KEY): # type: ignore
+        worker_id = raw.decode() if isinstance(raw, bytes) else raw
+        if redis_client.exists(_heartbeat_key(worker_id)):
+            continue
+        while redis_client.rpoplpush(_processing_key(worker_id), QUEUE_KEY):
+            moved += 1
+        redis_client.srem(WORKERS_KEY, worker_id)
+    while redis_client.rpoplpush(LEGACY_PROCESSING_KEY, QUEUE_KEY):
+        moved += 1
+    return moved
+
+
+def _dead_letter(post_id, attempts, error):
+    """Berhenti mencoba: catat untuk admin dan kabari author bahwa post ditinjau manual."""
+    redis_client.hset(DEAD_LETTER_KEY, post_id, json.dumps({
+        'error': str(error), 'attempts': attempts, 'failed_at': datetime.now(timezone.utc).isoformat()
+    }))
+    post = Post.query.get(post_id)
+    if not post or post.moderation_status != 'pending':
+        return
+    post.moderation_details = {**(post.moderation_details or {}), 'error': 'moderation_failed'}
+    db.session.commit()
+    create_notification(
+        recipient_id=post.user_id,
+        sender_id=post.user_id,
+        type='moderation_delayed',
+        reference_id=str(post.id),
+        text="Postingan Anda belum bisa diperiksa otomatis dan sedang ditinjau tim kami."
+    )
+
+
+def dead_letters():
+    """Daftar post yang gagal dimoderasi setelah MAX_ATTEMPTS percobaan."""
+    items = []
+    for post_id, raw in redis_client.hgetall(DEAD_LETTER_KEY).items(): # type: ignore
+        entry = json.loads(raw)
+        entry['post_id'] = post_id.decode() if isinstance(post_id, bytes) else post_id
+        items.append(entry)
+    return sorted(items, key=lambda item: item['failed_at'], reverse=True)
+
+
+def retry_dead_letter(post_id):
+    """Masukkan kembali ke antrean. False jika post tidak ada di dead-letter."""
+    if not redis_client.hdel(DEAD_LETTER_KEY, post_id):
+        return False
+    redis_client.hdel(ATTEMPTS_KEY, post_id)
+    enqueue_post_moderation(post_id)
+    return True
+
+
+def run_worker(app):
+    """Loop worker: BRPOPLPUSH ke daftar processing milik worker ini, proses, lalu hapus."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    processing_key = _processing_key(worker_id)
+    with app.app_context():
+        _heartbeat(worker_id)
+        redis_client.sadd(WORKERS_KEY, worker_id)
+        requeued = requeue_stale_jobs()
+        last_recovery = time.monotonic()
+        print(f"[ModerationWorker] {worker_id} siap. {requeued} job dikembalikan ke antrean.")
+
+        while True:
+            _heartbeat(worker_id)
+            if time.monotonic() - last_recovery > RECOVERY_INTERVAL:
+                # Job worker lain yang mati tanpa restart juga ikut dipulihkan.
+                requeue_stale_jobs()
+                last_recovery = time.monotonic()
+
+            raw = redis_client.brpoplpush(QUEUE_KEY, processing_key, timeout=QUEUE_POLL_TIMEOUT)
+            if raw is None:
+                continue
+            post_id = raw.decode() if isinstance(raw, bytes) else raw # type: ignore
+
+            started = time.perf_counter()
+            try:
+                status = process_pending_post(post_id)
+                print(f"[ModerationWorker] {post_id}: {status} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+                redis_client.hdel(ATTEMPTS_KEY, post_id)
+            except Exception as e:
+                db.session.rollback()
+                attempts = redis_client.hincrby(ATTEMPTS_KEY, post_id, 1)
+                if attempts < MAX_ATTEMPTS: # type: ignore
+                    redis_client.lpush(QUEUE_KEY, post_id)
+                    print(f"[ModerationWorker] Gagal memproses {post_id} (percobaan {attempts}), diulang: {e}")
+                else:
+                    redis_client.hdel(ATTEMPTS_KEY, post_id)
+                    print(f"[ModerationWorker] Menyerah pada {post_id} setelah {attempts} percobaan, masuk dead-letter: {e}")
+                    try:
+                        _dead_letter(post_id, attempts, e)
+                    except Exception as dl_error:
+                        db.session.rollback()
+                        print(f"[ModerationWorker] Gagal mencatat dead-letter {post_id}: {dl_error}")
+            finally:
+                db.session.remove()
+                redis_client.lrem(processing_key, 1, raw)
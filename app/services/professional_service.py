@@ -1,9 +1,12 @@
 import os
 import uuid
 from datetime import datetime, timezone
-from flask import current_app
 from cryptography.fernet import Fernet
 from ..models import db, ProfessionalProfile, User
+from .post_detail_service import invalidate_author_post_details
+from .storage import get_storage
+
+VERIFICATION_FOLDER = 'verifications'
 
 class ProfessionalService:
     def __init__(self):
@@ -19,9 +22,7 @@ class ProfessionalService:
         return self.cipher.decrypt(data)
 
     def submit_application(self, user_id, form_data, files):
-        upload_folder = os.path.join(current_app.root_path, 'static', 'verifications')
-        os.makedirs(upload_folder, exist_ok=True)
-
+        storage = get_storage()
         paths = {}
         for doc_type in ['str_image', 'ktp_image', 'selfie_image']:
             file = files.get(doc_type)
@@ -32,8 +33,7 @@ class ProfessionalService:
             encrypted_data = self._encrypt(file_bytes)
             
             filename = f"{doc_type}_{user_id}_{uuid.uuid4().hex[:8]}.enc"
-            with open(os.path.join(upload_folder, filename), 'wb') as f:
-                f.write(encrypted_data)
+            storage.put(f"{VERIFICATION_FOLDER}/{filename}", encrypted_data, content_type='application/octet-stream')
             paths[doc_type] = filename
 
         new_pro = ProfessionalProfile(
@@ -55,15 +55,12 @@ class ProfessionalService:
         pro = ProfessionalProfile.query.get(pro_id)
         if not pro: return False, "Data tidak ditemukan"
 
-        folder = os.path.join(current_app.root_path, 'static', 'verifications')
         files_to_delete = [pro.ktp_image_path, pro.selfie_image_path]
         
         for filename in files_to_delete:
             if filename:
-                path = os.path.join(folder, filename)
                 try:
-                    if os.path.exists(path):
-                        os.remove(path)
+                    get_storage().delete(f"{VERIFICATION_FOLDER}/{filename}")
                 except Exception as e:
                     print(f"Gagal hapus file: {e}")
 
@@ -77,20 +74,17 @@ class ProfessionalService:
         user.is_verified = True # type: ignore
         
         db.session.commit()
+        invalidate_author_post_details(pro.user_id)
         return True, "Disetujui"
 
     def reject_application(self, pro_id):
         pro = ProfessionalProfile.query.get(pro_id)
         if not pro: return False, "Data tidak ditemukan"
 
-        upload_folder = os.path.join(current_app.root_path, 'static', 'verifications')
-        
         for attr in ['str_image_path', 'ktp_image_path', 'selfie_image_path']:
             filename = getattr(pro, attr)
             if filename:
-                path = os.path.join(upload_folder, filename)
-                if os.path.exists(path):
-                    os.remove(path)
+                get_storage().delete(f"{VERIFICATION_FOLDER}/{filename}")
 
         db.session.delete(pro)
         db.session.commit()
@@ -100,20 +94,18 @@ class ProfessionalService:
         pro = ProfessionalProfile.query.get(pro_id)
         if not pro: return False, "Data tidak ditemukan"
 
-        upload_folder = os.path.join(current_app.root_path, 'static', 'verifications')
-
         if pro.str_image_path:
-            path = os.path.join(upload_folder, pro.str_image_path)
-            if os.path.exists(path):
-                os.remove(path)
+            get_storage().delete(f"{VERIFICATION_FOLDER}/{pro.str_image_path}")
         
         user = User.query.get(pro.user_id)
         if user:
             user.role = 'user'
             user.is_verified = False
         
+        user_id = pro.user_id
         db.session.delete(pro)
         db.session.commit()
+        invalidate_author_post_details(user_id)
         return True, "Status verifikasi dicabut dan arsip dokumen telah dibersihkan"
     
     def update_professional_info(self, user_id, form_data):
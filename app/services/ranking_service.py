@@ -0,0 +1,165 @@
+import math
+from datetime import datetime, timezone, timedelta
+from ..extensions import db, redis_client
+from ..models import Post, Connection
+from .counter_service import live_counts
+from . import block_graph
+
+# Skor gaya "hot": log10(engagement) + umur / HOT_DECAY_SECONDS. Peluruhan tertanam
+# di suku waktu (post 12.5 jam lebih baru setara engagement 10x lipat), jadi skor
+# post lama tidak perlu ditulis ulang setiap kali waktu berjalan.
+HOT_KEY = "feed:hot"
+HOT_REBUILD_LOCK = "feed:hot:rebuilding"
+# Penanda "ranking sudah dibangun tetapi kosong" (ZSET kosong tidak bisa disimpan
+# di Redis). Tanpa ini setiap read_for_you membangun ulang ranking saat tidak ada
+# post dalam jendela waktu. TTL-nya sama dengan interval rescore terjadwal.
+HOT_EMPTY_KEY = "feed:hot:empty"
+HOT_EMPTY_TTL = 600
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HOT_DECAY_SECONDS = 45000
+HOT_WINDOW_DAYS = 3
+HOT_MAX_LEN = 5000
+COMMENT_WEIGHT = 2
+AFFINITY_BOOST = 1.0
+CANDIDATE_WINDOW = 300
+
+
+class RankedPage:
+    def __init__(self, post_ids, has_next, total_pages):
+        self.post_ids = post_ids
+        self.has_next = has_next
+        self.total_pages = total_pages
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def hot_score(likes, comments, created_at):
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    engagement = (likes or 0) + COMMENT_WEIGHT * (comments or 0)
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return math.log10(max(engagement, 1)) + age / HOT_DECAY_SECONDS
+
+
+def _score_posts(posts):
+    counts = live_counts(posts)
+    return {
+        str(p.id): hot_score(counts[str(p.id)]['likes_count'], counts[str(p.id)]['comments_count'], p.created_at)
+        for p in posts
+    }
+
+
+def index_post(post):
+    """Masukkan post yang baru approved ke ranking."""
+    try:
+        redis_client.zadd(HOT_KEY, _score_posts([post]))
+    except Exception as e:
+        print(f"[Ranking] Gagal menambahkan post {post.id}: {e}")
+
+
+def refresh_post(post):
+    """Hitung ulang skor satu post setelah like/komentar; hanya jika post masih di ranking."""
+    try:
+        redis_client.zadd(HOT_KEY, _score_posts([post]), xx=True)
+    except Exception as e:
+        print(f"[Ranking] Gagal memperbarui skor post {post.id}: {e}")
+
+
+def unindex_post(post_id):
+    try:
+        redis_client.zrem(HOT_KEY, str(post_id))
+    except Exception as e:
+        print(f"[Ranking] Gagal menghapus post {post_id}: {e}")
+
+
+def rescore_hot_feed():
+    """Bangun ulang ranking dari post approved dalam HOT_WINDOW_DAYS terakhir.
+
+    Post yang keluar jendela waktu otomatis hilang, skor engagement disinkronkan
+    dengan counter terbaru. Ditulis ke key sementara lalu RENAME supaya pembaca
+    tidak pernah melihat ranking setengah jadi. Mengembalikan jumlah post.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=HOT_WINDOW_DAYS)
+    posts = db.session.query(Post.id, Post.user_id, Post.created_at, Post.likes_count, Post.comments_count)\
+        .filter(Post.moderation_status == 'approved', Post.created_at >= since)\
+        .all()
+
+    scores = _score_posts(posts)
+    if not scores:
+        pipe = redis_client.pipeline()
+        pipe.delete(HOT_KEY)
+        pipe.set(HOT_EMPTY_KEY, 1, ex=HOT_EMPTY_TTL)
+        pipe.execute()
+        return 0
+
+    tmp_key = f"{HOT_KEY}:tmp"
+    pipe = redis_client.pipeline()
+    pipe.delete(tmp_key)
+    pipe.zadd(tmp_key, scores)
+    pipe.zremrangebyrank(tmp_key, 0, -(HOT_MAX_LEN + 1))
+    pipe.rename(tmp_key, HOT_KEY)
+    pipe.delete(HOT_EMPTY_KEY)
+    pipe.execute()
+    return min(len(scores), HOT_MAX_LEN)
+
+
+def _ensure_ranking():
+    if redis_client.exists(HOT_KEY, HOT_EMPTY_KEY):
+        return True
+    # Hanya satu worker yang membangun ranking dingin; yang lain pakai feed 'latest'.
+    if not redis_client.set(HOT_REBUILD_LOCK, 1, nx=True, ex=60):
+        return False
+    try:
+        rescore_hot_feed()
+    finally:
+        redis_client.delete(HOT_REBUILD_LOCK)
+    return True
+
+
+def read_for_you(viewer_id, page, per_page):
+    """Satu halaman id post untuk feed 'for_you'. None jika ranking belum tersedia.
+
+    Kandidat diambil dengan satu ZREVRANGE, lalu untuk viewer yang login
+    post dari author yang di-follow mendapat AFFINITY_BOOST dan author yang
+    diblokir dibuang sebelum diurutkan ulang.
+    """
+    try:
+        if not _ensure_ranking():
+            return None
+        rows = redis_client.zrevrange(HOT_KEY, 0, CANDIDATE_WINDOW - 1, withscores=True)
+    except Exception as e:
+        print(f"[Ranking] Gagal membaca ranking: {e}")
+        return None
+
+    candidates = [(_decode(member), score) for member, score in rows] # type: ignore
+    if viewer_id and candidates:
+        authors = dict(
+            db.session.query(Post.id, Post.user_id)
+            .filter(Post.id.in_([pid for pid, _ in candidates]))
+            .all()
+        )
+        authors = {str(pid): str(uid) for pid, uid in authors.items()}
+        following = {
+            str(row.following_id) for row in db.session.query(Connection.following_id).filter(
+                Connection.follower_id == viewer_id,
+                Connection.following_id.in_(set(authors.values()))
+            )
+        }
+        blocked = block_graph.blocked_ids(viewer_id)
+        viewer = str(viewer_id)
+
+        ranked = []
+        for pid, score in candidates:
+            author = authors.get(pid)
+            if author is None or author in blocked or author == viewer:
+                continue
+            ranked.append((pid, score + (AFFINITY_BOOST if author in following else 0)))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        candidates = ranked
+
+    start = max(page - 1, 0) * per_page
+    post_ids = [pid for pid, _ in candidates[start:start + per_page]]
+    total_pages = math.ceil(len(candidates) / per_page) if per_page else 0
+    return RankedPage(post_ids, start + per_page < len(candidates), total_pages)
@@ -0,0 +1,309 @@
+import json
+import os
+import uuid
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, timezone
+from sqlalchemy import select, text, tuple_
+from ..extensions import db, redis_client
+from ..models import Post, Comment
+from .post_classification_service import post_classifier
+from .image_moderation_service import image_moderator
+from .post_moderation_service import ALLOWED_TEXT_CATEGORIES
+from .post_detail_service import invalidate_post_detail
+from .media_store import locate
+from .storage import get_storage
+
+# Moderasi ulang konten lama setelah model diganti. Baris dibaca dengan server-side
+# cursor (stream_results + yield_per) lewat koneksi terpisah, diklasifikasi per
+# batch dengan predict_batch, lalu hasilnya ditulis ke moderation_details['remoderation']
+# beserta versi model. moderation_status TIDAK diubah: verdict yang berbeda hanya
+# ditandai (verdict_changed) untuk ditinjau admin.
+#
+# Progress (created_at, id terakhir) disimpan di Redis setelah setiap batch ditulis,
+# jadi job yang mati di tengah jalan dilanjutkan dari batch berikutnya. Checkpoint
+# hanya dipakai ulang jika versi model masih sama.
+TARGETS = ('posts', 'comments')
+POST_STATUSES = ('approved', 'rejected', 'appealing', 'final_rejected')
+COMMENT_STATUSES = ('approved', 'rejected')
+
+DEFAULT_BATCH_SIZE = int(os.environ.get('REMODERATION_BATCH_SIZE', 200))
+DEFAULT_CONCURRENCY = int(os.environ.get('REMODERATION_CONCURRENCY', 2))
+# Target throughput (item/detik). Job di-throttle agar tidak melebihinya supaya
+# database dan CPU produksi tetap lega; 0 berarti tanpa batas.
+DEFAULT_TARGET_RATE = float(os.environ.get('REMODERATION_TARGET_RATE', 50))
+LOCK_TTL = 300
+
+# Verdict digabung ke moderation_details di sisi server (jsonb ||), bukan dari
+# snapshot baris yang dibaca di awal batch: perubahan admin/worker moderasi yang
+# terjadi selama batch diklasifikasi tidak tertimpa.
+_MERGE_VERDICT_SQL = """
+    UPDATE {table}
+    SET moderation_details = COALESCE(moderation_details, '{{}}'::jsonb)
+        || jsonb_build_object('remoderation', CAST(:verdict AS jsonb))
+    WHERE id = :id
+"""
+
+
+class RemoderationBusy(RuntimeError):
+    pass
+
+
+def _state_key(target, dry_run=False):
+    return f"remoderation:{target}:dry_run" if dry_run else f"remoderation:{target}"
+
+
+def _lock_key(target, dry_run=False):
+    return f"remoderation:{target}:lock" + (":dry_run" if dry_run else "")
+
+
+def is_running(target, dry_run=False):
+    return bool(redis_client.exists(_lock_key(target, dry_run)))
+
+
+def model_version(target):
+    """Versi model yang dipakai job ini: diambil dari model yang sudah dimuat (atau
+    dari sidecar), bukan dari file di disk yang bisa sudah diganti tanpa restart."""
+    text_version = post_classifier.model_version()
+    if target == 'posts':
+        return f"text:{text_version}/image:{image_moderator.model_version()}"
+    return f"text:{text_version}"
+
+
+def get_state(target, dry_run=False):
+    raw = redis_client.hgetall(_state_key(target, dry_run))
+    state = {k.decode(): v.decode() for k, v in raw.items()} # type: ignore
+    if 'transitions' in state:
+        state['transitions'] = json.loads(state['transitions'])
+    for field in ('processed', 'changed', 'errors'):
+        if field in state:
+            state[field] = int(state[field])
+    return state
+
+
+def job_status():
+    return {
+        target: {'run': get_state(target), 'dry_run': get_state(target, dry_run=True)}
+        for target in TARGETS
+    }
+
+
+def request_cancel(target):
+    redis_client.hset(_state_key(target), 'cancel_requested', '1')
+    redis_client.hset(_state_key(target, dry_run=True), 'cancel_requested', '1')
+
+
+def _read_image(storage, filename):
+    key = locate(filename, storage)
+    if key is None:
+        return None
+    try:
+        return storage.read(key)
+    except FileNotFoundError:
+        return None
+
+
+def _classify_posts(rows, version, storage):
+    text_results = post_classifier.predict_batch([row.caption for row in rows])
+
+    image_positions, images = [], []
+    for i, row in enumerate(rows):
+        if row.image_url and not row.image_url.startswith('http'):
+            data = _read_image(storage, row.image_url)
+            if data is not None:
+                image_positions.append(i)
+                images.append(data)
+    image_results = dict(zip(image_positions, image_moderator.predict_batch(images) if images else []))
+
+    checked_at = datetime.now(timezone.utc).isoformat()
+    verdicts = []
+    for i, row in enumerate(rows):
+        text_category, _ = text_results[i]
+        text_is_unsafe = text_category not in ALLOWED_TEXT_CATEGORIES
+        verdict = {
+            'model_version': version,
+            'checked_at': checked_at,
+            'text_status': 'unsafe' if text_is_unsafe else 'safe',
+            'text_category': text_category,
+        }
+        image_is_unsafe = False
+        if row.image_url and not row.image_url.startswith('http'):
+            result = image_results.get(i)
+            if result is None:
+                verdict['image_status'] = 'missing'
+            elif isinstance(result, Exception):
+                verdict['image_status'] = 'error'
+                verdict['image_error'] = str(result)
+            else:
+                image_status, image_category = result
+                image_is_unsafe = (image_status == 'unsafe')
+                verdict['image_status'] = image_status
+                verdict['image_category'] = image_category
+
+        verdict['is_unsafe'] = text_is_unsafe or image_is_unsafe
+        verdict['previous_status'] = row.moderation_status
+        verdict['verdict_changed'] = verdict['is_unsafe'] != (row.moderation_status != 'approved')
+        verdicts.append(verdict)
+    return verdicts
+
+
+def _classify_comments(rows, version):
+    checked_at = datetime.now(timezone.utc).isoformat()
+    verdicts = []
+    for row, (category, _) in zip(rows, post_classifier.predict_batch([row.text for row in rows])):
+        is_unsafe = category not in ALLOWED_TEXT_CATEGORIES
+        verdicts.append({
+            'model_version': version,
+            'checked_at': checked_at,
+            'category': category,
+            'is_unsafe': is_unsafe,
+            'previous_status': row.moderation_status,
+            'verdict_changed': is_unsafe != (row.moderation_status == 'rejected'),
+        })
+    return verdicts
+
+
+def _query(target, after=None):
+    if target == 'posts':
+        model = Post
+        stmt = select(Post.id, Post.created_at, Post.caption, Post.image_url,
+                      Post.moderation_status)\
+            .where(Post.moderation_status.in_(POST_STATUSES))
+    else:
+        model = Comment
+        stmt = select(Comment.id, Comment.created_at, Comment.text,
+                      Comment.moderation_status)\
+            .where(Comment.moderation_status.in_(COMMENT_STATUSES))
+    if after:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*after))
+    return model, stmt.order_by(model.created_at, model.id)
+
+
+def _write_verdicts(model, rows, verdicts):
+    db.session.execute(text(_MERGE_VERDICT_SQL.format(table=model.__tablename__)), [
+        {'id': row.id, 'verdict': json.dumps(verdict)}
+        for row, verdict in zip(rows, verdicts)
+    ])
+    db.session.commit()
+    if model is Post:
+        invalidate_post_detail(*[row.id for row in rows])
+
+
+def run_remoderation(target, dry_run=False, batch_size=None, concurrency=None,
+                     target_rate=None, restart=False, limit=None, progress=None):
+    """Jalankan (atau lanjutkan) moderasi ulang satu target. Harus di dalam app context.
+
+    Mode dry-run tidak menulis apa pun ke database dan selalu mulai dari awal;
+    hasilnya hanya jumlah verdict yang akan berubah. `progress(state)` dipanggil
+    setelah setiap batch.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Target tidak dikenal: {target}")
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    concurrency = max(int(concurrency or DEFAULT_CONCURRENCY), 1)
+    target_rate = DEFAULT_TARGET_RATE if target_rate is None else target_rate
+    version = model_version(target)
+    # Thread pool klasifikasi tidak punya app context: storage di-resolve di sini.
+    classify = partial(_classify_posts, storage=get_storage()) if target == 'posts' else _classify_comments
+
+    lock_key = _lock_key(target, dry_run)
+    if not redis_client.set(lock_key, os.getpid(), nx=True, ex=LOCK_TTL):
+        raise RemoderationBusy(f"Moderasi ulang {target} sedang berjalan")
+
+    state_key = _state_key(target, dry_run)
+    try:
+        previous = get_state(target, dry_run)
+        resume = (not dry_run and not restart and previous.get('status') != 'done'
+                  and previous.get('model_version') == version and previous.get('last_id'))
+        if resume:
+            after = (datetime.fromisoformat(previous['last_created_at']), uuid.UUID(previous['last_id']))
+            processed, changed, errors = previous['processed'], previous['changed'], previous.get('errors', 0)
+            transitions = Counter(previous.get('transitions', {}))
+            print(f"[Remoderation] Melanjutkan {target} setelah {processed} item ({previous['last_id']})")
+        else:
+            after, processed, changed, errors, transitions = None, 0, 0, 0, Counter()
+
+        started = time.perf_counter()
+        session_processed = 0
+        state = {
+            'status': 'running', 'target': target, 'model_version': version,
+            'dry_run': '1' if dry_run else '0', 'processed': processed, 'changed': changed,
+            'errors': errors, 'started_at': datetime.now(timezone.utc).isoformat(),
+        }
+        redis_client.delete(state_key)
+        redis_client.hset(state_key, mapping={**state, 'transitions': json.dumps(transitions)})
+        if resume:
+            redis_client.hset(state_key, mapping={
+                'last_created_at': previous['last_created_at'], 'last_id': previous['last_id']
+            })
+
+        model, stmt = _query(target, after)
+        if limit:
+            stmt = stmt.limit(limit)
+
+        def finish_batch(rows, verdicts):
+            nonlocal processed, changed, errors, session_processed
+            if not dry_run:
+                _write_verdicts(model, rows, verdicts)
+            for verdict in verdicts:
+                if verdict.get('image_status') == 'error':
+                    errors += 1
+                if verdict['verdict_changed']:
+                    changed += 1
+                    transitions[f"{verdict['previous_status']}->{'unsafe' if verdict['is_unsafe'] else 'safe'}"] += 1
+            processed += len(rows)
+            session_processed += len(rows)
+
+            elapsed = time.perf_counter() - started
+            rate = session_processed / elapsed if elapsed > 0 else 0.0
+            update_state = {
+                'processed': processed, 'changed': changed, 'errors': errors,
+                'rate': round(rate, 1), 'transitions': json.dumps(transitions),
+                'updated_at': datetime.now(timezone.utc).isoformat(),
+            }
+            if not dry_run:
+                update_state['last_created_at'] = rows[-1].created_at.isoformat()
+                update_state['last_id'] = str(rows[-1].id)
+            redis_client.hset(state_key, mapping=update_state)
+            redis_client.expire(lock_key, LOCK_TTL)
+            if progress:
+                progress(get_state(target, dry_run))
+
+            if target_rate > 0:
+                ahead = session_processed / target_rate - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+            return redis_client.hget(state_key, 'cancel_requested') is not None
+
+        cancelled = False
+        # Batch dibaca dan diklasifikasi paralel, tetapi ditulis (dan di-checkpoint)
+        # berurutan di thread ini supaya checkpoint tidak pernah melompati batch.
+        with db.engine.connect() as conn, ThreadPoolExecutor(max_workers=concurrency) as pool:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+            inflight = deque()
+            for rows in result.partitions():
+                inflight.append((rows, pool.submit(classify, rows, version)))
+                if len(inflight) >= concurrency:
+                    rows_done, future = inflight.popleft()
+                    if finish_batch(rows_done, future.result()):
+                        cancelled = True
+                        break
+            while inflight and not cancelled:
+                rows_done, future = inflight.popleft()
+                cancelled = finish_batch(rows_done, future.result())
+            for _, future in inflight:
+                future.cancel()
+
+        status = 'cancelled' if cancelled else 'done'
+        redis_client.hset(state_key, mapping={'status': status, 'finished_at': datetime.now(timezone.utc).isoformat()})
+        redis_client.hdel(state_key, 'cancel_requested')
+        print(f"[Remoderation] {target} {status}: {processed} item, {changed} verdict berubah")
+        return get_state(target, dry_run)
+    except Exception as e:
+        db.session.rollback()
+        redis_client.hset(state_key, mapping={'status': 'failed', 'error': str(e)})
+        raise
+    finally:
+        redis_client.delete(lock_key)
@@ -0,0 +1,140 @@
+import hashlib
+from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import insert
+from ..extensions import db, redis_client
+from ..models import Post, SeenPost
+
+# Bloom filter per user di atas bitmap Redis (SETBIT/BITFIELD), dipecah per minggu:
+# impression masuk ke filter minggu berjalan, pembacaan memeriksa BLOOM_WEEKS filter
+# terakhir, dan filter lama kedaluwarsa sendiri (EXPIREAT) sehingga tidak pernah
+# jenuh. Tiap filter 2^17 bit = 16 KB; dengan 4 hash, false positive ~1% sampai
+# sekitar 13 ribu post per minggu. False positive hanya berarti satu post tidak
+# muncul di mode 'unseen'.
+BLOOM_BITS = 1 << 17
+BLOOM_HASHES = 4
+BLOOM_WEEKS = 4
+WEEK_SECONDS = 7 * 24 * 3600
+# Penanda "filter sudah dibangun dari seen_posts"; diperpanjang setiap dibaca.
+BLOOM_TTL = BLOOM_WEEKS * WEEK_SECONDS
+BLOOM_REBUILD_LIMIT = 10000
+MAX_IMPRESSIONS_PER_CALL = 100
+
+
+def _week(when=None):
+    return int((when or datetime.now(timezone.utc)).timestamp() // WEEK_SECONDS)
+
+
+def _key(user_id, week):
+    return f"seen:bloom:{user_id}:{week}"
+
+
+def _loaded_key(user_id):
+    return f"seen:bloom:{user_id}:loaded"
+
+
+def _offsets(post_id):
+    digest = hashlib.blake2b(str(post_id).encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'big')
+    h2 = int.from_bytes(digest[8:], 'big') | 1
+    return [(h1 + i * h2) % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+
+def _add(pipe, user_id, week, post_ids):
+    key = _key(user_id, week)
+    for post_id in post_ids:
+        for offset in _offsets(post_id):
+            pipe.setbit(key, offset, 1)
+    # Filter minggu `week` hanya dibaca selama BLOOM_WEEKS minggu.
+    pipe.expireat(key, (week + BLOOM_WEEKS) * WEEK_SECONDS)
+
+
+def rebuild_seen_filter(user_id):
+    """Bangun ulang filter mingguan dari seen_posts dalam jendela BLOOM_WEEKS minggu."""
+    current = _week()
+    since = datetime.fromtimestamp((current - BLOOM_WEEKS + 1) * WEEK_SECONDS, timezone.utc)
+    rows = db.session.query(SeenPost.post_id, SeenPost.seen_at)\
+        .filter(SeenPost.user_id == user_id, SeenPost.seen_at >= since)\
+        .order_by(SeenPost.seen_at.desc())\
+        .limit(BLOOM_REBUILD_LIMIT).all()
+
+    by_week = {}
+    for row in rows:
+        by_week.setdefault(_week(row.seen_at), []).append(row.post_id)
+
+    pipe = redis_client.pipeline()
+    pipe.delete(*[_key(user_id, week) for week in range(current - BLOOM_WEEKS + 1, current + 1)])
+    for week, post_ids in by_week.items():
+        _add(pipe, user_id, week, post_ids)
+    pipe.set(_loaded_key(user_id), 1, ex=BLOOM_TTL)
+    pipe.execute()
+    return len(rows)
+
+
+def _ensure_loaded(user_id):
+    if not redis_client.expire(_loaded_key(user_id), BLOOM_TTL):
+        rebuild_seen_filter(user_id)
+
+
+def record_impressions(user_id, post_ids):
+    """Simpan impression secara bulk (ON CONFLICT DO NOTHING) dan tandai di filter minggu ini.
+
+    Hanya id post approved yang disimpan dan ditandai; id lain dari klien diabaikan.
+    Mengembalikan jumlah baris baru.
+    """
+    if not post_ids:
+        return 0
+
+    valid_ids = [row.id for row in db.session.query(Post.id).filter(
+        Post.id.in_(post_ids), Post.moderation_status == 'approved'
+    )]
+    if not valid_ids:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    stmt = insert(SeenPost).values([
+        {'user_id': user_id, 'post_id': post_id, 'seen_at': now} for post_id in valid_ids
+    ]).on_conflict_do_nothing(index_elements=['user_id', 'post_id'])
+    result = db.session.execute(stmt)
+    db.session.commit()
+
+    try:
+        _ensure_loaded(user_id)
+        pipe = redis_client.pipeline(transaction=False)
+        _add(pipe, user_id, _week(now), valid_ids)
+        pipe.execute()
+    except Exception as e:
+        print(f"[SeenFilter] Gagal memperbarui bloom {user_id}: {e}")
+
+    return result.rowcount # type: ignore
+
+
+def seen_mask(user_id, post_ids):
+    """List bool sejajar `post_ids`: True jika (kemungkinan besar) sudah dilihat."""
+    if not post_ids:
+        return []
+    offsets = [offset for post_id in post_ids for offset in _offsets(post_id)]
+    try:
+        _ensure_loaded(user_id)
+        current = _week()
+        pipe = redis_client.pipeline(transaction=False)
+        # Satu BITFIELD per filter mingguan untuk semua bit yang dicek.
+        for week in range(current - BLOOM_WEEKS + 1, current + 1):
+            args = []
+            for offset in offsets:
+                args += ['GET', 'u1', offset]
+            pipe.execute_command('BITFIELD', _key(user_id, week), *args)
+        per_week = pipe.execute()
+    except Exception as e:
+        print(f"[SeenFilter] Redis tidak tersedia, fallback ke database: {e}")
+        seen = {
+            str(r.post_id) for r in db.session.query(SeenPost.post_id).filter(
+                SeenPost.user_id == user_id,
+                SeenPost.post_id.in_(post_ids)
+            )
+        }
+        return [str(pid) in seen for pid in post_ids]
+
+    return [
+        any(all(bits[i * BLOOM_HASHES:(i + 1) * BLOOM_HASHES]) for bits in per_week)
+        for i in range(len(post_ids))
+    ]
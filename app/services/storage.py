@@ -0,0 +1,255 @@
+import io
+import mimetypes
+import os
+import shutil
+import uuid
+from flask import current_app, url_for
+
+# Backend penyimpanan file media (upload, varian, reject/pending/quarantine lama,
+# dokumen verifikasi). Semua kode memakai key relatif terhadap folder static,
+# mis. 'uploads/<nama>', 'variants/128/<nama>.webp', 'verifications/<nama>.enc',
+# sehingga nilai kolom DB dan URL /static/... yang dipakai klien tidak berubah.
+#
+# MEDIA_STORAGE=local (default): file di app/static seperti sebelumnya.
+# MEDIA_STORAGE=s3: bucket S3-compatible (AWS S3, MinIO, R2, ...). Beberapa node
+# API bisa berjalan di belakang load balancer tanpa NFS; /static/<key> yang tidak
+# ada di disk node di-redirect ke URL bucket (lihat media_routes.storage_static).
+STORAGE_BACKEND = os.environ.get('MEDIA_STORAGE', 'local').lower()
+CHUNK_SIZE = 1024 * 1024
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Prefix yang tidak boleh punya URL publik langsung (selalu presigned).
+PRIVATE_PREFIXES = ('verifications/', 'quarantine/')
+
+_storage = None
+
+
+def clean_key(key):
+    """Normalisasi key dan tolak path traversal ('..', path absolut, segmen kosong)."""
+    key = (key or '').replace('\\', '/').lstrip('/')
+    if not key or any(part in ('', '.', '..') for part in key.split('/')):
+        raise ValueError(f"Key storage tidak valid: {key!r}")
+    return key
+
+
+def _content_type(key):
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+
+class LocalStorage:
+    """File biasa di bawah `root` (default app/static)."""
+    is_local = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *clean_key(key).split('/'))
+
+    def put(self, key, data, content_type=None, cache_control=None):
+        """Tulis bytes atau file-like (di-stream per chunk) secara atomik."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    f.write(data)
+                else:
+                    shutil.copyfileobj(data, f, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, key):
+        """File-like untuk dibaca bertahap. FileNotFoundError jika tidak ada."""
+        return open(self.path(key), 'rb')
+
+    def read(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+    def stat(self, key):
+        """(ukuran byte, mtime) atau None jika tidak ada."""
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def copy(self, src, dst):
+        with self.open(src) as f:
+            self.put(dst, f)
+
+    def move(self, src, dst):
+        src_path, dst_path = self.path(src), self.path(dst)
+        if src_path == dst_path:
+            return
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        shutil.move(src_path, dst_path)
+
+    def list(self, prefix):
+        """Iterasi (key, ukuran, mtime) untuk semua file di bawah `prefix`."""
+        base = self.path(prefix)
+        for root, _, files in os.walk(base):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, '/'), st.st_size, st.st_mtime
+
+    def url(self, key, expires=None, external=False):
+        return url_for('static', filename=clean_key(key), _external=external)
+
+
+class S3Storage:
+    """Bucket S3-compatible lewat boto3 (opsional: hanya diimpor jika backend ini dipakai).
+
+    Untuk lokal/CI, MinIO bisa dipakai sebagai pengganti S3 dengan S3_ENDPOINT_URL.
+    """
+    is_local = False
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, public_url=None, url_expires=3600):
+        try:
+            import boto3
+            from botocore.config import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("MEDIA_STORAGE=s3 membutuhkan paket boto3 (pip install boto3)") from e
+        if not bucket:
+            raise RuntimeError("MEDIA_STORAGE=s3 membutuhkan S3_BUCKET")
+
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = f"{prefix.strip('/')}/" if prefix and prefix.strip('/') else ''
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.url_expires = url_expires
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=os.environ.get('S3_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.environ.get('S3_SECRET_ACCESS_KEY'),
+            config=BotoConfig(
+                signature_version='s3v4',
+                # MinIO dan endpoint custom umumnya tidak mendukung virtual-host style.
+                s3={'addressing_style': 'path' if endpoint_url else 'auto'},
+                max_pool_connections=int(os.environ.get('S3_MAX_CONNECTIONS', 20)),
+                retries={'max_attempts': 3, 'mode': 'standard'},
+            ),
+        )
+
+    def _key(self, key):
+        return f"{self.prefix}{clean_key(key)}"
+
+    def _not_found(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def put(self, key, data, content_type=None, cache_control=None):
+        """Upload bytes atau file-like. upload_fileobj men-stream per part (multipart untuk file besar)."""
+        extra = {'ContentType': content_type or _content_type(key)}
+        if cache_control:
+            extra['CacheControl'] = cache_control
+        fileobj = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(key), ExtraArgs=extra)
+
+    def open(self, key):
+        """Body streaming dari GetObject. FileNotFoundError jika tidak ada."""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except self._client_error as e:
+            if self._not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def read(self, key):
+        with self.open(key) as body:
+            return body.read()
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._not_found(e):
+                return None
+            raise
+        return head['ContentLength'], head['LastModified'].timestamp()
+
+    def exists(self, key):
+        return self.stat(key) is not None
+
+    def delete(self, key):
+        # DeleteObject idempoten: tidak error walaupun key tidak ada.
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    def copy(self, src, dst):
+        """Copy di sisi server (byte tidak lewat node ini)."""
+        try:
+            self.client.copy({'Bucket': self.bucket, 'Key': self._key(src)}, self.bucket, self._key(dst))
+        except self._client_error as e:
+            if self._not_found(e):
+                raise FileNotFoundError(src) from e
+            raise
+
+    def move(self, src, dst):
+        if clean_key(src) == clean_key(dst):
+            return
+        self.copy(src, dst)
+        self.delete(src)
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix).rstrip('/') + '/'):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):], obj['Size'], obj['LastModified'].timestamp()
+
+    def url(self, key, expires=None, external=True):
+        """URL langsung (S3_PUBLIC_URL, mis. CDN di depan bucket) atau presigned GET."""
+        key = clean_key(key)
+        if self.public_url and not key.startswith(PRIVATE_PREFIXES):
+            return f"{self.public_url}/{self.prefix}{key}"
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self._key(key)},
+            ExpiresIn=expires or self.url_expires,
+        )
+
+
+def create_storage(backend=None):
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == 'local':
+        return LocalStorage(os.environ.get('MEDIA_LOCAL_ROOT') or os.path.join(current_app.root_path, 'static'))
+    if backend == 's3':
+        return S3Storage(
+            bucket=os.environ.get('S3_BUCKET'),
+            prefix=os.environ.get('S3_PREFIX', ''),
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None,
+            region=os.environ.get('S3_REGION') or None,
+            public_url=os.environ.get('S3_PUBLIC_URL') or None,
+            url_expires=int(os.environ.get('S3_URL_EXPIRES', 3600)),
+        )
+    raise ValueError(f"MEDIA_STORAGE tidak dikenal: {backend}")
+
+
+def get_storage():
+    """Backend yang dikonfigurasi untuk proses ini (dibuat sekali, di dalam app context)."""
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
@@ -0,0 +1,205 @@
+import math
+from datetime import timezone
+from sqlalchemy import exists, and_
+from ..extensions import db, redis_client
+from ..models import Post, User, Connection, BlockedUser
+from ..utils.pagination import decode_cursor, InvalidCursor
+from .block_graph import blocked_by_viewer_clause
+
+TIMELINE_MAX_LEN = 800
+TIMELINE_TTL = 7 * 24 * 3600
+# Member penanda (skor -inf) supaya timeline kosong tetap "hangat": tanpa ini user
+# yang belum mengikuti siapa pun membangun ulang timeline di setiap request.
+# Selalu berada di urutan paling bawah, jadi ikut terpangkas duluan saat timeline penuh.
+SENTINEL = '_'
+
+
+class TimelinePage:
+    def __init__(self, post_ids, has_next, total_pages=None):
+        self.post_ids = post_ids
+        self.has_next = has_next
+        self.total_pages = total_pages
+
+
+def _key(user_id):
+    return f"timeline:{user_id}"
+
+
+def _score(created_at):
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.timestamp()
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _push(pipe, key, entries):
+    pipe.zadd(key, entries)
+    pipe.zremrangebyrank(key, 0, -(TIMELINE_MAX_LEN + 1))
+
+
+def _author_post_entries(author_id):
+    posts = db.session.query(Post.id, Post.created_at).filter(
+        Post.user_id == author_id,
+        Post.moderation_status == 'approved'
+    ).order_by(Post.created_at.desc()).limit(TIMELINE_MAX_LEN).all()
+    return {str(p.id): _score(p.created_at) for p in posts}
+
+
+def fan_out_post(post):
+    """Dorong post yang baru approved ke timeline follower yang sedang 'hangat'.
+
+    Timeline yang belum ada (user dingin) dilewati; akan dibangun ulang lewat
+    `flask timeline rebuild` atau saat pertama kali dibaca.
+    """
+    try:
+        follower_rows = db.session.query(Connection.follower_id).filter(
+            Connection.following_id == post.user_id,
+            ~exists().where(and_(
+                BlockedUser.blocker_id == Connection.follower_id,
+                BlockedUser.blocked_id == post.user_id
+            ))
+        ).all()
+        keys = [_key(row.follower_id) for row in follower_rows]
+        if not keys:
+            return
+
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(key)
+        warm_keys = [key for key, is_warm in zip(keys, pipe.execute()) if is_warm]
+
+        entry = {str(post.id): _score(post.created_at)}
+        pipe = redis_client.pipeline(transaction=False)
+        for key in warm_keys:
+            _push(pipe, key, entry)
+        pipe.execute()
+    except Exception as e:
+        print(f"[Timeline] Fan-out gagal untuk post {post.id}: {e}")
+
+
+def remove_post(post_id, author_id):
+    try:
+        follower_rows = db.session.query(Connection.follower_id).filter(
+            Connection.following_id == author_id
+        ).all()
+        pipe = redis_client.pipeline(transaction=False)
+        for row in follower_rows:
+            pipe.zrem(_key(row.follower_id), str(post_id))
+        pipe.execute()
+    except Exception as e:
+        print(f"[Timeline] Gagal menghapus post {post_id} dari timeline: {e}")
+
+
+def add_author_to_timeline(viewer_id, author_id, only_if_following=False):
+    try:
+        key = _key(viewer_id)
+        if not redis_client.exists(key):
+            return
+        if only_if_following and not Connection.query.filter_by(
+            follower_id=viewer_id, following_id=author_id
+        ).first():
+            return
+        entries = _author_post_entries(author_id)
+        if entries:
+            pipe = redis_client.pipeline(transaction=False)
+            _push(pipe, key, entries)
+            pipe.execute()
+    except Exception as e:
+        print(f"[Timeline] Gagal menambahkan post {author_id} ke timeline {viewer_id}: {e}")
+
+
+def remove_author_from_timeline(viewer_id, author_id):
+    try:
+        key = _key(viewer_id)
+        if not redis_client.exists(key):
+            return
+        entries = _author_post_entries(author_id)
+        if entries:
+            redis_client.zrem(key, *entries.keys())
+    except Exception as e:
+        print(f"[Timeline] Gagal menghapus post {author_id} dari timeline {viewer_id}: {e}")
+
+
+def rebuild_timeline(user_id):
+    """Bangun ulang timeline 'following' dari SQL. Mengembalikan jumlah entri."""
+    posts = db.session.query(Post.id, Post.created_at)\
+        .join(Connection, Connection.following_id == Post.user_id)\
+        .filter(
+            Connection.follower_id == user_id,
+            Post.moderation_status == 'approved',
+            ~blocked_by_viewer_clause(user_id, Post.user_id)
+        )\
+        .order_by(Post.created_at.desc())\
+        .limit(TIMELINE_MAX_LEN).all()
+
+    key = _key(user_id)
+    entries = {str(p.id): _score(p.created_at) for p in posts}
+    entries[SENTINEL] = float('-inf')
+    pipe = redis_client.pipeline()
+    pipe.delete(key)
+    pipe.zadd(key, entries)
+    pipe.expire(key, TIMELINE_TTL)
+    pipe.execute()
+    return len(posts)
+
+
+def read_timeline(user_id, page, per_page, cursor=None):
+    """Baca satu halaman id post dari timeline. None jika timeline belum ada.
+
+    InvalidCursor diteruskan ke pemanggil bila cursor rusak.
+    """
+    key = _key(user_id)
+    try:
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            max_score = _score(created_at)
+            pipe = redis_client.pipeline(transaction=False)
+            # User yang terus menggulir juga memperpanjang umur timeline-nya.
+            pipe.expire(key, TIMELINE_TTL)
+            pipe.zcount(key, max_score, max_score)
+            is_warm, ties = pipe.execute()
+            if not is_warm:
+                return None
+            rows = redis_client.zrevrangebyscore(
+                key, max_score, '(-inf', start=0, num=per_page + 1 + ties, withscores=True
+            )
+            # Skor kembar diurutkan member DESC, sama seperti (created_at, id) DESC di SQL.
+            candidates = [
+                _decode(member) for member, score in rows
+                if not (score == max_score and _decode(member) >= last_id)
+            ]
+            total_pages = None
+        else:
+            start = max(page - 1, 0) * per_page
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.zrevrange(key, start, start + per_page)
+            pipe.zcount(key, '(-inf', '+inf')
+            # EXPIRE hanya bernilai True jika key ada, sekaligus cek hangat/dingin.
+            pipe.expire(key, TIMELINE_TTL)
+            members, total, is_warm = pipe.execute()
+            if not is_warm:
+                return None
+            candidates = [m for m in map(_decode, members) if m != SENTINEL]
+            total_pages = math.ceil(total / per_page) if per_page else 0
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        print(f"[Timeline] Gagal membaca timeline {user_id}: {e}")
+        return None
+
+    return TimelinePage(candidates[:per_page], len(candidates) > per_page, total_pages)
+
+
+def load_timeline_posts(post_ids):
+    """Ambil (Post, User) untuk id timeline dengan urutan yang sama."""
+    if not post_ids:
+        return []
+    rows = db.session.query(Post, User)\
+        .join(User, Post.user_id == User.id)\
+        .filter(Post.id.in_(post_ids), Post.moderation_status == 'approved')\
+        .all()
+    by_id = {str(post.id): (post, author) for post, author in rows}
+    return [by_id[pid] for pid in post_ids if pid in by_id]
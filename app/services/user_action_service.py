@@ -1,5 +1,7 @@
 from ..extensions import db
 from ..models import BlockedUser, User
+from .timeline_service import add_author_to_timeline, remove_author_from_timeline
+from . import block_graph
 from typing import List
 import uuid
 
@@ -19,6 +21,8 @@ class UserActionService:
         new_block = BlockedUser(blocker_id=blocker_id, blocked_id=target_id) # type: ignore
         db.session.add(new_block)
         db.session.commit()
+        block_graph.record_block(blocker_id, target_id)
+        remove_author_from_timeline(blocker_id, target_id)
         return True
 
     def unblock_user(self, blocker_id: uuid.UUID, target_id: uuid.UUID) -> bool:
@@ -29,6 +33,8 @@ class UserActionService:
         if block:
             db.session.delete(block)
             db.session.commit()
+            block_graph.record_unblock(blocker_id, target_id)
+            add_author_to_timeline(blocker_id, target_id, only_if_following=True)
             return True
         return False
 
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from ..extensions import redis_client
+
+# Cache hasil model per "sidik jari" input: LRU lokal per proses di depan Redis
+# (dibagi semua worker). Key Redis menyertakan tag versi model yang diturunkan
+# dari mtime + ukuran file ONNX. Tag dipatok saat byte model dibaca (lihat
+# model_registry.read_model_file), bukan dari file di disk saat ini: proses yang
+# masih menjalankan model lama tetap menulis di bawah tag lama, dan hanya
+# proses yang sudah memuat file baru memakai tag baru.
+DEFAULT_LOCAL_SIZE = int(os.environ.get('VERDICT_CACHE_LOCAL_SIZE', 4096))
+DEFAULT_TTL = int(os.environ.get('VERDICT_CACHE_TTL', 7 * 24 * 3600))
+
+_registry = {}
+
+
+def file_version_part(path, st):
+    return f"{path}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def version_tag(parts):
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+class VerdictCache:
+    def __init__(self, name, version, local_size=DEFAULT_LOCAL_SIZE, ttl=DEFAULT_TTL):
+        self.name = name
+        self.version = version
+        self.local_size = local_size
+        self.ttl = ttl
+        self.enabled = os.environ.get('VERDICT_CACHE_ENABLED', 'true').lower() == 'true'
+
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._reset_stats()
+        _registry[name] = self
+
+    def _reset_stats(self):
+        self._local_hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._inference_ms_total = 0.0
+        self._inference_items = 0
+
+    def _redis_key(self, version, key):
+        return f"verdict:{self.name}:{version}:{key}"
+
+    def get_many(self, keys, accept=None, count_misses=True):
+        """List hasil sejajar `keys`; None untuk yang belum ada di cache.
+
+        `accept(hasil)` yang bernilai False membuat hasil diperlakukan sebagai miss.
+        `count_misses=False` untuk lookup tahap pertama yang miss-nya masih akan
+        dicari lagi (dan dicatat) di lookup berikutnya, supaya statistik tetap
+        satu hit/miss per item.
+        """
+        if not self.enabled or not keys:
+            return [None] * len(keys)
+
+        version = self.version
+        results = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._local.get(key)
+                if value is not None and (accept is None or accept(value)):
+                    self._local.move_to_end(key)
+                    results[i] = value
+                    self._local_hits += 1
+                else:
+                    missing.append(i)
+
+        if missing:
+            try:
+                raw = redis_client.mget([self._redis_key(version, keys[i]) for i in missing])
+            except Exception as e:
+                print(f"[VerdictCache] Gagal membaca Redis ({self.name}): {e}")
+                raw = [None] * len(missing)
+            with self._lock:
+                for i, value in zip(missing, raw): # type: ignore
+                    value = tuple(json.loads(value)) if value is not None else None
+                    if value is None or (accept is not None and not accept(value)):
+                        if count_misses:
+                            self._misses += 1
+                        continue
+                    results[i] = value
+                    self._redis_hits += 1
+                    self._remember(keys[i], value)
+        return results
+
+    def set_many(self, items):
+        """Simpan pasangan (key, hasil). Hasil berupa tuple yang bisa di-JSON-kan."""
+        if not self.enabled or not items:
+            return
+        version = self.version
+        with self._lock:
+            for key, value in items:
+                self._remember(key, tuple(value))
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key, value in items:
+                pipe.set(self._redis_key(version, key), json.dumps(list(value)), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"[VerdictCache] Gagal menulis Redis ({self.name}): {e}")
+
+    def _remember(self, key, value):
+        self._local[key] = value
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def record_inference(self, items, elapsed_ms):
+        """Catat waktu inferensi untuk item yang tidak ada di cache (dasar estimasi waktu yang dihemat)."""
+        with self._lock:
+            self._inference_items += items
+            self._inference_ms_total += elapsed_ms
+
+    def stats(self):
+        with self._lock:
+            hits = self._local_hits + self._redis_hits
+            lookups = hits + self._misses
+            avg_inference_ms = self._inference_ms_total / self._inference_items if self._inference_items else 0.0
+            return {
+                'name': self.name,
+                'enabled': self.enabled,
+                'model_version': self.version,
+                'local_entries': len(self._local),
+                'local_hits': self._local_hits,
+                'redis_hits': self._redis_hits,
+                'misses': self._misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'avg_inference_ms': round(avg_inference_ms, 3),
+                'saved_inference_ms': round(hits * avg_inference_ms, 1),
+            }
+
+
+def all_cache_stats():
+    return [cache.stats() for cache in _registry.values()]
+
+
+def reset_cache_stats():
+    for cache in _registry.values():
+        with cache._lock:
+            cache._reset_stats()
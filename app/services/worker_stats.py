@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+import time
+import psutil
+from ..extensions import redis_client
+
+# Setiap worker gunicorn menulis pemakaian memorinya ke satu hash Redis, supaya
+# endpoint admin (yang dilayani satu worker saja) bisa melihat semua worker.
+# 'shared' dan 'uss' menunjukkan seberapa banyak halaman yang masih dibagi
+# copy-on-write dengan master pada mode preload.
+MEMORY_KEY = "workers:memory"
+REPORT_INTERVAL = int(os.environ.get('WORKER_MEMORY_REPORT_INTERVAL', 60))
+
+_reporter_pid = None
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1)
+
+
+def memory_snapshot(pid=None):
+    process = psutil.Process(pid or os.getpid())
+    info = process.memory_full_info()
+    return {
+        'pid': process.pid,
+        'rss_mb': _mb(info.rss),
+        'pss_mb': _mb(getattr(info, 'pss', 0)),
+        'uss_mb': _mb(info.uss),
+        'shared_mb': _mb(getattr(info, 'shared', 0)),
+        'reported_at': time.time(),
+    }
+
+
+def publish_worker_memory():
+    snapshot = memory_snapshot()
+    try:
+        redis_client.hset(MEMORY_KEY, str(snapshot['pid']), json.dumps(snapshot))
+    except Exception as e:
+        print(f"[WorkerStats] Gagal menyimpan statistik memori: {e}")
+    return snapshot
+
+
+def remove_worker_memory(pid=None):
+    try:
+        redis_client.hdel(MEMORY_KEY, str(pid or os.getpid()))
+    except Exception as e:
+        print(f"[WorkerStats] Gagal menghapus statistik memori: {e}")
+
+
+def start_memory_reporter():
+    """Jalankan pelapor memori periodik di proses ini (sekali per pid)."""
+    global _reporter_pid
+    if _reporter_pid == os.getpid():
+        return
+    _reporter_pid = os.getpid()
+
+    def loop():
+        while True:
+            publish_worker_memory()
+            time.sleep(REPORT_INTERVAL)
+
+    threading.Thread(target=loop, name="worker-memory-reporter", daemon=True).start()
+
+
+def worker_memory_report():
+    """Snapshot semua worker yang masih melapor; entri basi (worker mati) dibuang."""
+    raw = redis_client.hgetall(MEMORY_KEY)
+    cutoff = time.time() - REPORT_INTERVAL * 3
+    workers, stale = [], []
+    for pid, value in raw.items(): # type: ignore
+        snapshot = json.loads(value)
+        if snapshot['reported_at'] < cutoff:
+            stale.append(pid)
+        else:
+            workers.append(snapshot)
+    if stale:
+        redis_client.hdel(MEMORY_KEY, *stale)
+
+    workers.sort(key=lambda w: w['pid'])
+    return {
+        'workers': workers,
+        'total_rss_mb': round(sum(w['rss_mb'] for w in workers), 1),
+        'total_pss_mb': round(sum(w['pss_mb'] for w in workers), 1),
+        'total_uss_mb': round(sum(w['uss_mb'] for w in workers), 1),
+    }
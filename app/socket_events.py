@@ -5,6 +5,8 @@ from .models import User, Chat, Message, ChatParticipant, ToxicMessageCounter, B
 from .config import Config
 from .services.notification_service import NotificationService
 from .services.post_classification_service import post_classifier
+from .services.timeline_service import remove_author_from_timeline
+from .services import block_graph
 import jwt
 import uuid
 from datetime import datetime, timezone
@@ -111,7 +113,7 @@ def handle_send_message(data):
             
             if recipient_part:
                 receiver = User.query.get(recipient_part.user_id)
-                is_blocked = BlockedUser.query.filter_by(blocker_id=recipient_part.user_id, blocked_id=sender.id).first() is not None
+                is_blocked = block_graph.is_blocked(recipient_part.user_id, sender.id)
                 
                 if receiver and receiver.is_ai_moderation_enabled and msg_type == 'text':
                     category, _ = post_classifier.predict(text)
@@ -135,6 +137,8 @@ def handle_send_message(data):
                             if not BlockedUser.query.filter_by(blocker_id=receiver.id, blocked_id=sender.id).first():
                                 db.session.add(BlockedUser(blocker_id=receiver.id, blocked_id=sender.id)) # type: ignore
                                 db.session.commit()
+                                block_graph.record_block(receiver.id, sender.id)
+                                remove_author_from_timeline(receiver.id, sender.id)
                                 socketio.emit('moderation_blocked', {
                                     'chat_id': str(chat_id),
                                     'user_name': sender.display_name,
@@ -230,10 +234,7 @@ def handle_send_message(data):
         }
         
         participants = ChatParticipant.query.filter_by(chat_id=chat_id).all()
-        blocked_by_ids = []
-        if chat.is_group:
-            blocks = BlockedUser.query.filter_by(blocked_id=sender.id).all()
-            blocked_by_ids = [str(b.blocker_id) for b in blocks]
+        blocked_by_ids = block_graph.blocked_by_ids(sender.id)
 
         for p in participants:
             pid = str(p.user_id)
@@ -243,12 +244,8 @@ def handle_send_message(data):
                 socketio.emit('new_message', response_data, to=pid)
                 continue
 
-            if chat.is_group and pid in blocked_by_ids:
+            if pid in blocked_by_ids:
                 continue
-                
-            if not chat.is_group:
-                is_blocking = BlockedUser.query.filter_by(blocker_id=p.user_id, blocked_id=sender.id).first()
-                if is_blocking: continue
 
             p.unread_count += 1
             socketio.emit('new_message', response_data, to=pid)
@@ -337,12 +334,18 @@ def handle_mark_read(data):
         unread_messages = Message.query.filter(Message.chat_id == chat_id, Message.sender_id != reader.id, Message.is_read_by_all == False).all()
         if unread_messages:
             changed = False
+            participants = ChatParticipant.query.filter(ChatParticipant.chat_id == chat_id).all()
+            blocked_by_cache = {}
             for msg in unread_messages:
-                other_participants = ChatParticipant.query.filter(ChatParticipant.chat_id == chat_id, ChatParticipant.user_id != msg.sender_id).all()
+                sender_key = str(msg.sender_id)
+                if sender_key not in blocked_by_cache:
+                    blocked_by_cache[sender_key] = block_graph.blocked_by_ids(msg.sender_id) if msg.sender_id else set()
+                blocking_sender = blocked_by_cache[sender_key]
                 all_eligible_read = True
-                for p in other_participants:
-                    is_blocking_sender = BlockedUser.query.filter_by(blocker_id=p.user_id, blocked_id=msg.sender_id).first() is not None
-                    if not is_blocking_sender and p.unread_count > 0:
+                for p in participants:
+                    if str(p.user_id) == sender_key:
+                        continue
+                    if str(p.user_id) not in blocking_sender and p.unread_count > 0:
                         all_eligible_read = False
                         break
                 if all_eligible_read:
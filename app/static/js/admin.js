@@ -145,6 +145,16 @@ document.addEventListener('alpine:init', () => {
             return '/static/uploads/' + safePath;
         },
 
+        // Upload baru disimpan per isi (<sha256>.<ext>) dan selalu berada di
+        // static/uploads; file lama masih di folder sesuai statusnya.
+        getMediaUrl(path, folder = 'uploads') {
+            if (!path) return '';
+            const safePath = String(path).trim();
+            if (safePath.startsWith('http')) return safePath;
+            if (/^[0-9a-f]{64}\.[a-z0-9]+$/.test(safePath)) return '/static/uploads/' + safePath;
+            return `/static/${folder}/${safePath}`;
+        },
+
         showToast(title, message, type = 'success') {
             const id = Date.now();
             this.toasts.push({ id, title, message, type, show: true });
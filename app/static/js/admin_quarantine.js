@@ -11,8 +11,7 @@ function quarantineLogic() {
         },
 
         getQuarantineUrl(path) {
-            if (!path) return '';
-            return '/static/quarantine/' + path;
+            return this.getMediaUrl(path, 'quarantine');
         }
     }
 }
\ No newline at end of file
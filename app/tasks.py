@@ -1,7 +1,8 @@
-import os
 from datetime import datetime, timezone, timedelta
 from .extensions import db
 from .models import Post, Appeal
+from .services.post_detail_service import invalidate_post_detail
+from .services.media_store import release
 
 def cleanup_moderation_task(app):
     with app.app_context():
@@ -12,22 +13,74 @@ def cleanup_moderation_task(app):
             Post.created_at <= limit_time
         ).all()
 
-        reject_folder = os.path.join(app.root_path, 'static', 'reject')
-        
         count = 0
+        removed_ids = []
         for post in expired_posts:
-            if post.image_url:
-                path = os.path.join(reject_folder, post.image_url)
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except Exception:
-                        pass
-            
             Appeal.query.filter_by(content_id=post.id).delete()
+            removed_ids.append(post.id)
+            image_url = post.image_url
             db.session.delete(post)
+            try:
+                release(image_url, legacy_folder='reject')
+            except OSError:
+                pass
             count += 1
         
         if count > 0:
             db.session.commit()
-            print(f"[Scheduler] Cleanup finished: {count} posts removed.")
\ No newline at end of file
+            invalidate_post_detail(*removed_ids)
+            print(f"[Scheduler] Cleanup finished: {count} posts removed.")
+
+def flush_post_counters_task(app):
+    from .services.counter_service import flush_pending_counters
+    with app.app_context():
+        try:
+            flushed = flush_pending_counters()
+            if flushed:
+                print(f"[Scheduler] Counter flush: {flushed} posts updated.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Scheduler] Counter flush failed: {e}")
+
+
+def reconcile_post_counters_task(app):
+    from .services.counter_service import reconcile_counters
+    with app.app_context():
+        try:
+            fixed = reconcile_counters()
+            print(f"[Scheduler] Counter reconcile finished: {fixed} posts recomputed.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Scheduler] Counter reconcile failed: {e}")
+
+
+def rescore_hot_feed_task(app):
+    from .services.ranking_service import rescore_hot_feed
+    with app.app_context():
+        try:
+            ranked = rescore_hot_feed()
+            print(f"[Scheduler] Hot feed rescored: {ranked} posts.")
+        except Exception as e:
+            print(f"[Scheduler] Hot feed rescore failed: {e}")
+
+
+def evict_media_cache_task(app):
+    from .services.media_resize_service import evict_cache
+    with app.app_context():
+        try:
+            result = evict_cache()
+            if result:
+                print(f"[Scheduler] Media cache: {result['files']} file, {result['bytes'] / 1024 / 1024:.1f} MB.")
+        except Exception as e:
+            print(f"[Scheduler] Media cache eviction failed: {e}")
+
+
+def collect_media_garbage_task(app):
+    from .services.media_store import collect_garbage
+    with app.app_context():
+        try:
+            removed, freed = collect_garbage()
+            if removed:
+                print(f"[Scheduler] Media GC: {removed} file dihapus ({freed / 1024 / 1024:.1f} MB).")
+        except Exception as e:
+            print(f"[Scheduler] Media GC failed: {e}")
@@ -1,36 +1,31 @@
+import io
 import os
-from PIL import Image, ImageOps
-from flask import current_app
+from PIL import Image
+
+# Batas jumlah piksel gambar yang diunggah (default 40 MP). Dicek dari header
+# sebelum decode, jadi gambar raksasa ditolak tanpa sempat dialokasikan.
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 40_000_000))
+
+
+class ImageTooLarge(ValueError):
+    pass
 
-def generate_thumbnail(filename_only, size=(256, 256)):
-    if not filename_only:
-        return None
-    
-    static_folder = current_app.static_folder
-    original_full_path = os.path.join(static_folder, 'uploads', filename_only) # type: ignore
-    
-    thumb_folder = os.path.join(static_folder, 'thumbnails') # type: ignore
-    thumb_filename = f"thumb_{size[0]}x{size[1]}_{filename_only}"
-    thumb_full_path = os.path.join(thumb_folder, thumb_filename)
-
-    if os.path.exists(thumb_full_path):
-        return f"thumbnails/{thumb_filename}"
-
-    if not os.path.exists(original_full_path):
-        return None
 
+def read_image_size(image_bytes):
+    """(lebar, tinggi) dari header gambar tanpa decode piksel; None jika format tidak dikenali."""
     try:
-        if not os.path.exists(thumb_folder):
-            os.makedirs(thumb_folder)
-
-        with Image.open(original_full_path) as img:
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            thumb_img = ImageOps.fit(img, size, Image.Resampling.LANCZOS)
-            thumb_img.save(thumb_full_path, quality=85, optimize=True)
-            
-        return f"thumbnails/{thumb_filename}"
-        
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return img.size
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+
+def check_image_pixels(image_bytes, limit=MAX_IMAGE_PIXELS):
+    """Lempar ImageTooLarge jika gambar melebihi `limit` piksel. Mengembalikan ukuran dari header."""
+    size = read_image_size(image_bytes)
+    if size and size[0] * size[1] > limit:
+        raise ImageTooLarge(f"Gambar terlalu besar ({size[0]}x{size[1]}), maksimal {limit // 1_000_000} megapiksel")
+    return size
+
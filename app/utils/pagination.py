@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, has_next, next_cursor):
+        self.items = items
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, id_type=str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_raw, id_raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_raw), id_type(id_raw)
+    except Exception:
+        raise InvalidCursor("Cursor tidak valid")
+
+
+def keyset_paginate(query, created_col, id_col, cursor, per_page, key=None):
+    """Paging berbasis (created_at, id) DESC tanpa COUNT(*) dan tanpa OFFSET.
+
+    `cursor` kosong berarti halaman pertama. `key` mengambil (created_at, id)
+    dari tiap baris hasil query; default-nya baris itu sendiri adalah model.
+    """
+    if key is None:
+        key = lambda row: (getattr(row, created_col.key), getattr(row, id_col.key))
+
+    if cursor:
+        try:
+            id_type = id_col.type.python_type
+        except NotImplementedError:
+            id_type = str
+        created_at, row_id = decode_cursor(cursor, id_type)
+        query = query.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(*key(rows[-1]))
+
+    return KeysetPage(rows, has_next, next_cursor)
@@ -1,25 +1,36 @@
-import pandas as pd
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 import re
 import os
 import html
 import emoji
+from functools import lru_cache
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
+# Kamus normalisasi, stopword NLTK dan pandas dimuat saat pertama dipakai, bukan
+# saat modul di-import, supaya proses yang tidak memproses teks tidak ikut membayar.
 
-try:
-    NORM_DF = pd.read_csv('kamus_normalisasi.csv')
-    NORMALIZATION_MAPPING = pd.Series(NORM_DF.expansion.values, index=NORM_DF.contraction).to_dict()
-except:
-    NORMALIZATION_MAPPING = {}
+@lru_cache(maxsize=None)
+def _nltk_ready():
+    import nltk
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+        nltk.download('punkt', quiet=True)
+    return True
 
-STOP_WORDS = set(stopwords.words('indonesian'))
+@lru_cache(maxsize=None)
+def get_normalization_mapping():
+    try:
+        import pandas as pd
+        norm_df = pd.read_csv('kamus_normalisasi.csv')
+        return pd.Series(norm_df.expansion.values, index=norm_df.contraction).to_dict()
+    except:
+        return {}
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    _nltk_ready()
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('indonesian'))
 
 POST_SPECIAL_VOWEL = ['siapa', 'apa', 'mana', 'dia', 'kenapa', 'ada', 'bawa', 'sana', 'sini', 'begitu']
 POST_LEET_MAP = {'0': 'o', '1': 'i', '2': 'z', '3': 'e', '4': 'a', '5': 's', '6': 'g', '7': 't', '8': 'b', '9': 'g', '@': 'a', '$': 's'}
@@ -31,61 +42,114 @@ POST_CUSTOM_STOPWORDS = [
     'sesudah', 'before', 'supaya', 'agar', 'jikalau', 'apabila', 'andaikata', 'manakala'
 ]
 
-try:
-    POST_NORM_DF = pd.read_csv('indonesian_norm.csv', on_bad_lines='skip', engine='python')
-    POST_NORM_DICT = dict(zip(POST_NORM_DF['contraction'], POST_NORM_DF['expansion']))
-except:
-    POST_NORM_DICT = {}
+@lru_cache(maxsize=None)
+def get_post_norm_dict():
+    try:
+        import pandas as pd
+        post_norm_df = pd.read_csv('indonesian_norm.csv', on_bad_lines='skip', engine='python')
+        return dict(zip(post_norm_df['contraction'], post_norm_df['expansion']))
+    except:
+        return {}
+
+class TextNormalizer:
+    """Normalisasi teks post/komentar/chat untuk post_classifier.
+
+    Semua pola dikompilasi sekali. Hasilnya harus identik byte per byte dengan
+    implementasi lama (lihat load_tests/text_normalizer_golden.py), termasuk
+    urutan penggantian leetspeak: aturan dijalankan berurutan sesuai
+    POST_LEET_MAP karena hasil satu aturan bisa membuka aturan berikutnya
+    ("43a" -> "4ea" -> "eea"), jadi aturan hanya dilewati untuk karakter yang
+    tidak ada di kata tersebut.
+    """
+
+    def __init__(self, norm_dict=None, special_vowels=POST_SPECIAL_VOWEL,
+                 leet_map=POST_LEET_MAP, stopwords=POST_CUSTOM_STOPWORDS):
+        self.norm_dict = norm_dict or {}
+        self.stopwords = frozenset(stopwords)
+        self.leet_rules = [
+            (char, re.compile(f"(?<=[a-z]){re.escape(char)}|{re.escape(char)}(?=[a-z])"), repl)
+            for char, repl in leet_map.items()
+        ]
+        self.leet_chars = frozenset(leet_map)
+
+        self.camel_case = re.compile(r'([a-z])([A-Z])')
+        self.hex_escape = re.compile(r'\\x[a-zA-Z0-9]+')
+        self.rt_user = re.compile(r'\b(rt|user)\b')
+        self.url = re.compile(r'http\S+|www\.\S+')
+        self.ampersand = re.compile(r'\s*&\s*')
+        self.slash = re.compile(r'\s*/\s*')
+        # Satu alternation setara dengan loop per kata: setiap kecocokan diapit \b
+        # dan penggantinya selalu menyisipkan spasi, jadi tidak ada kecocokan yang tumpang tindih.
+        self.special_vowel = re.compile(r'\b(' + '|'.join(special_vowels) + r')luh?\b')
+        self.consonant_lu = re.compile(r'([^aeiou\s])luh?\b')
+        self.inner_dot = re.compile(r'(?<=[a-zA-Z])\.(?=[a-zA-Z])')
+        self.disallowed = re.compile(r'[^a-zA-Z0-9\s.,!?\'"-]')
+        self.repeated_bang = re.compile(r'(!)\1+')
+        self.repeated_question = re.compile(r'(\?)\1+')
+        self.repeated_dot = re.compile(r'(\.)\1+')
+        self.repeated_char = re.compile(r'(.)\1{2,}')
+        self.whitespace = re.compile(r'\s+')
+
+    def _normalize_word(self, word):
+        norm_dict = self.norm_dict
+        if word in norm_dict:
+            return norm_dict[word]
+        if word.isdigit():
+            return word
+        if not self.leet_chars.intersection(word):
+            return norm_dict.get(word, word)
+        for char, pattern, repl in self.leet_rules:
+            if char in word:
+                word = pattern.sub(repl, word)
+        return norm_dict.get(word, word)
+
+    def normalize(self, text):
+        text = str(text)
+        text = self.camel_case.sub(r'\1 \2', text)
+        text = text.lower()
+        text = html.unescape(text)
+        text = self.hex_escape.sub(' ', text)
+        text = self.rt_user.sub(' ', text)
+        text = self.url.sub(' ', text)
+        text = self.ampersand.sub(' dan ', text)
+        text = self.slash.sub(' atau ', text)
+        text = text.replace('_', ' ')
+        text = emoji.demojize(text, delimiters=(" :", ": "))
+
+        text = self.special_vowel.sub(r'\1 lu', text)
+        text = self.consonant_lu.sub(r'\1 lu', text)
+
+        stopwords = self.stopwords
+        words = [self._normalize_word(word) for word in text.split()]
+        text = ' '.join(w for w in words if w not in stopwords)
+        text = self.inner_dot.sub('', text)
+        text = self.disallowed.sub('', text)
+        text = self.repeated_bang.sub(r'\1', text)
+        text = self.repeated_question.sub(r'\1', text)
+        text = self.repeated_dot.sub(r'\1', text)
+        text = self.repeated_char.sub(r'\1\1', text)
+        text = self.whitespace.sub(' ', text).strip()
+        return text
+
+@lru_cache(maxsize=None)
+def get_post_normalizer():
+    return TextNormalizer(get_post_norm_dict())
 
 def post_preprocess_text(text: str) -> str:
-    text = str(text)
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    text = text.lower()
-    text = html.unescape(text)
-    text = re.sub(r'\\x[a-zA-Z0-9]+', ' ', text)
-    text = re.sub(r'\b(rt|user)\b', ' ', text)
-    text = re.sub(r'http\S+|www\.\S+', ' ', text)
-    text = re.sub(r'\s*&\s*', ' dan ', text)
-    text = re.sub(r'\s*/\s*', ' atau ', text)
-    text = text.replace('_', ' ')
-    text = emoji.demojize(text, delimiters=(" :", ": "))
-    
-    for word in POST_SPECIAL_VOWEL:
-        text = re.sub(rf'\b{word}luh?\b', f'{word} lu', text)
-    text = re.sub(r'([^aeiou\s])luh?\b', r'\1 lu', text)
-    
-    words = text.split()
-    new_words = []
-    for word in words:
-        if word in POST_NORM_DICT:
-            new_words.append(POST_NORM_DICT[word])
-        elif word.isdigit():
-            new_words.append(word)
-        else:
-            temp_word = word
-            for char, repl in POST_LEET_MAP.items():
-                temp_word = re.sub(f"(?<=[a-z]){re.escape(char)}|{re.escape(char)}(?=[a-z])", repl, temp_word)
-            new_words.append(POST_NORM_DICT.get(temp_word, temp_word))
-    
-    cleaned_tokens = [w for w in new_words if w not in POST_CUSTOM_STOPWORDS]
-    text = ' '.join(cleaned_tokens)
-    text = re.sub(r'(?<=[a-zA-Z])\.(?=[a-zA-Z])', '', text) 
-    text = re.sub(r'[^a-zA-Z0-9\s.,!?\'"-]', '', text)
-    text = re.sub(r'(!)\1+', r'\1', text) 
-    text = re.sub(r'(\?)\1+', r'\1', text) 
-    text = re.sub(r'(\.)\1+', r'\1', text) 
-    text = re.sub(r'(.)\1{2,}', r'\1\1', text) 
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    return get_post_normalizer().normalize(text)
 
 def preprocess_text(text: str, remove_stopwords: bool = True) -> str:
     text = text.lower()
     text = text.replace('user', '') 
     text = re.sub(r'[^a-z\s]', '', text)
+    _nltk_ready()
+    from nltk.tokenize import word_tokenize
     tokens = word_tokenize(text)
-    normalized_tokens = [NORMALIZATION_MAPPING.get(token, token) for token in tokens]
+    normalization_mapping = get_normalization_mapping()
+    normalized_tokens = [normalization_mapping.get(token, token) for token in tokens]
     if remove_stopwords:
-        cleaned_tokens = [token for token in normalized_tokens if token not in STOP_WORDS]
+        stop_words = get_stop_words()
+        cleaned_tokens = [token for token in normalized_tokens if token not in stop_words]
     else:
         cleaned_tokens = normalized_tokens
     return " ".join(cleaned_tokens)
\ No newline at end of file
@@ -0,0 +1,52 @@
+import gc
+import os
+
+# Konfigurasi gunicorn produksi (dibaca otomatis dari direktori kerja):
+#   gunicorn run:amica_app_obj
+#
+# preload_app memuat aplikasi dan aset model (run.py -> preload: byte ONNX,
+# vocab, kamus normalisasi) sekali di master sebelum fork, sehingga dibagi
+# copy-on-write antar worker. Master tidak pernah membuat session ONNX (thread
+# pool runtime tidak aman di-fork); session, koneksi database dan scheduler
+# dibuat di tiap worker pada post_worker_init. Penghematan memorinya bisa diukur
+# dengan load_tests/bench_preload_memory.py atau /admin/ai/workers/memory.
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if preload_app:
+    os.environ.setdefault('DEFER_SCHEDULER', 'true')
+    os.environ.setdefault('PRELOAD_MODEL_ASSETS_ONLY', 'true')
+
+
+def when_ready(server):
+    if preload_app:
+        # Objek hasil preload dipindah ke generasi permanen supaya siklus GC di
+        # worker tidak menyentuh (dan menyalin) halaman memori milik master.
+        gc.collect()
+        gc.freeze()
+        server.log.info("Preload selesai, %d objek dibekukan untuk GC", gc.get_freeze_count())
+
+
+def post_worker_init(worker):
+    from run import amica_app_obj
+    from app.services.worker_stats import start_memory_reporter
+
+    if preload_app:
+        from app import start_scheduler
+        from app.extensions import db
+        from app.services.model_registry import reload_after_fork
+
+        with amica_app_obj.app_context():
+            db.engine.dispose(close=False)
+        reload_after_fork()
+        start_scheduler(amica_app_obj)
+
+    start_memory_reporter()
+
+
+def worker_exit(server, worker):
+    from app.services.worker_stats import remove_worker_memory
+
+    remove_worker_memory(worker.pid)
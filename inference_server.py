@@ -0,0 +1,36 @@
+import os
+import sys
+
+# Harus sebelum import paket app: service model di proses ini memuat model sendiri.
+os.environ['INFERENCE_SIDECAR'] = '1'
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.inference_executor import serve, SOCKET_PATH
+from app.services.image_moderation_service import image_moderator
+from app.services.post_classification_service import post_classifier
+from app.services.feedback_sentiment_service import feedback_analyzer
+from app.services.model_registry import warmup
+
+# Sidecar inference untuk INFERENCE_SOCKET_PATH. Jalankan sebagai proses terpisah
+# (systemd) dengan nilai INFERENCE_SOCKET_PATH yang sama dengan worker gunicorn:
+#   INFERENCE_SOCKET_PATH=/run/amica/inference.sock python inference_server.py
+# Tanpa monkey-patch gevent: setiap koneksi dilayani thread OS, dan ONNX Runtime
+# melepas GIL selama inferensi.
+if __name__ == '__main__':
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else SOCKET_PATH
+    if not socket_path:
+        sys.exit("INFERENCE_SOCKET_PATH belum di-set")
+
+    warmup()
+
+    serve(socket_path, {
+        'image_moderation': image_moderator.predict,
+        'post_classification': post_classifier.predict,
+        'feedback_sentiment': feedback_analyzer.predict,
+        'image_moderation_batch': image_moderator.predict_batch,
+        'post_classification_batch': post_classifier.predict_batch,
+        'feedback_sentiment_batch': feedback_analyzer.predict_batch,
+        'image_moderation_version': lambda _: image_moderator.model_version(),
+        'post_classification_version': lambda _: post_classifier.model_version(),
+    })
@@ -0,0 +1,168 @@
+"""Ukur latensi event chat selama ada upload post (inferensi gambar + teks).
+
+Dua akun test (lihat seed_data.py) bergabung ke chat yang sama. Akun A
+mengirim event 'typing', akun B mengukur waktu sampai 'user_typing' diterima.
+Pengukuran dilakukan dua kali: tanpa beban, lalu sambil N thread terus
+mengunggah jeruk.jpeg / senjata.jpeg ke POST /api/posts/.
+
+    python load_tests/bench_chat_latency.py --host http://localhost:5000 --uploaders 8
+
+Bandingkan hasil server dengan dan tanpa INFERENCE_SOCKET_PATH (sidecar
+inference_server.py). Tanpa sidecar, p95/p99 ikut naik selama inferensi
+berjalan karena event loop gevent tertahan.
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+
+import requests
+import socketio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BYPASS_TOKEN = os.environ.get("BYPASS_LIMITER_TOKEN", "AKUCAPEKBANGET")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "password123test"
+
+
+def load_image(filename):
+    with open(os.path.join(BASE_DIR, filename), "rb") as f:
+        return f.read()
+
+
+def login(host, email):
+    response = requests.post(f"{host}/api/auth/login", json={
+        "email": email,
+        "password": PASSWORD
+    }, headers={"X-Load-Test-Token": BYPASS_TOKEN}, timeout=30)
+    response.raise_for_status()
+    body = response.json()
+    return body["access_token"], body["user"]["id"]
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}", "X-Load-Test-Token": BYPASS_TOKEN}
+
+
+def connect(host, token):
+    client = socketio.Client(reconnection=False)
+    client.connect(f"{host}?token={token}", auth={"token": token}, transports=["websocket"])
+    return client
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def measure(sender, receiver_events, chat_id, samples, interval):
+    latencies = []
+    lost = 0
+    for i in range(samples):
+        receiver_events["event"].clear()
+        started = time.perf_counter()
+        sender.emit("typing", {"chat_id": chat_id, "is_typing": i % 2 == 0})
+        if receiver_events["event"].wait(timeout=5):
+            latencies.append((receiver_events["received_at"] - started) * 1000)
+        else:
+            lost += 1
+        time.sleep(interval)
+    return latencies, lost
+
+
+def upload_loop(host, token, images, stop, counter):
+    session = requests.Session()
+    while not stop.is_set():
+        filename = random.choice(list(images))
+        files = {"image": (filename, images[filename], "image/jpeg")}
+        data = {"caption": f"Uji latensi chat #{random.randint(1000, 9999)}", "tags": ["Testing"]}
+        try:
+            response = session.post(f"{host}/api/posts/", data=data, files=files,
+                                    headers=auth_header(token), timeout=60)
+            counter[response.status_code] = counter.get(response.status_code, 0) + 1
+        except requests.RequestException:
+            counter["error"] = counter.get("error", 0) + 1
+
+
+def report(label, latencies, lost):
+    if not latencies:
+        print(f"{label:<14} tidak ada event diterima (hilang {lost})")
+        return
+    print(
+        f"{label:<14} n={len(latencies):<4} hilang={lost:<3} "
+        f"p50={percentile(latencies, 50):7.1f} ms  p95={percentile(latencies, 95):7.1f} ms  "
+        f"p99={percentile(latencies, 99):7.1f} ms  max={max(latencies):7.1f} ms  "
+        f"mean={statistics.mean(latencies):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="http://localhost:5000")
+    parser.add_argument("--sender", type=int, default=0, help="indeks akun test_load_{i} pengirim")
+    parser.add_argument("--receiver", type=int, default=1, help="indeks akun test_load_{i} penerima")
+    parser.add_argument("--uploaders", type=int, default=8, help="jumlah thread upload paralel")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.05, help="jeda antar event (detik)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="jeda sebelum mengukur di bawah beban (detik)")
+    args = parser.parse_args()
+
+    sender_token, _ = login(args.host, f"test_load_{args.sender}@amica.test")
+    receiver_token, receiver_id = login(args.host, f"test_load_{args.receiver}@amica.test")
+
+    response = requests.post(f"{args.host}/api/chats/get-or-create/{receiver_id}",
+                             headers=auth_header(sender_token), timeout=30)
+    response.raise_for_status()
+    chat_id = response.json()["chat_id"]
+
+    receiver_events = {"event": threading.Event(), "received_at": 0.0}
+    receiver = connect(args.host, receiver_token)
+    sender = connect(args.host, sender_token)
+
+    @receiver.on("user_typing")
+    def on_typing(data):
+        if data.get("chat_id") == chat_id:
+            receiver_events["received_at"] = time.perf_counter()
+            receiver_events["event"].set()
+
+    sender.emit("join_chat", {"chat_id": chat_id})
+    receiver.emit("join_chat", {"chat_id": chat_id})
+    time.sleep(1)
+
+    try:
+        idle = measure(sender, receiver_events, chat_id, args.samples, args.interval)
+
+        images = {"jeruk.jpeg": load_image("jeruk.jpeg"), "senjata.jpeg": load_image("senjata.jpeg")}
+        upload_tokens = [login(args.host, f"test_load_{i}@amica.test")[0] for i in range(2, 2 + args.uploaders)]
+        stop = threading.Event()
+        counter = {}
+        threads = [
+            threading.Thread(target=upload_loop, args=(args.host, token, images, stop, counter), daemon=True)
+            for token in upload_tokens
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.warmup)
+        try:
+            loaded = measure(sender, receiver_events, chat_id, args.samples, args.interval)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=60)
+    finally:
+        sender.disconnect()
+        receiver.disconnect()
+
+    print(f"Chat {chat_id}, {args.uploaders} uploader, {args.samples} sampel per fase")
+    report("tanpa beban", *idle)
+    report("dengan upload", *loaded)
+    print(f"Status upload: {counter}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark preprocessing moderasi gambar: decode penuh (lama) vs decode tereduksi.
+
+Setiap mode dijalankan di subprocess tersendiri supaya peak RSS (ru_maxrss)
+tidak saling memengaruhi. Tanpa --image, script membuat JPEG sintetis 4000x3000
+(12 MP, setara foto ponsel).
+
+    python load_tests/bench_image_decode.py
+    python load_tests/bench_image_decode.py --image foto.jpg --iterations 50
+    python load_tests/bench_image_decode.py --with-model     # + latensi & kecocokan verdict model
+
+--with-model memuat model ONNX dan membandingkan verdict kedua jalur pada gambar
+yang sama (decode tereduksi memakai resampling berbeda, jadi skor bisa bergeser
+sedikit pada gambar yang berada di batas).
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+
+def synthetic_jpeg(path, width=4000, height=3000):
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                    np.full((height, width), 128, np.float32)], axis=2)
+    img += rng.normal(0, 12, img.shape).astype(np.float32)
+    cv2.imwrite(path, np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def legacy_preprocess(service, image_bytes):
+    import cv2
+    import numpy as np
+
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image from bytes.")
+    img_bgr = np.array(img, dtype=np.uint8)
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+    img_letterboxed = service._letterbox(img_rgb)
+    return np.expand_dims(img_letterboxed, axis=0).astype(np.float32)
+
+
+def run_child(mode, image_path, iterations, with_model):
+    from app.services import image_moderation_service as ims
+
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+
+    if with_model:
+        service = ims.image_moderator.load()
+    else:
+        # Hanya preprocessing: tidak perlu session ONNX.
+        service = object.__new__(ims.ImageModerationService)
+        service.image_size = (320, 320)
+
+    if mode == "legacy":
+        preprocess = lambda data: legacy_preprocess(service, data)
+    else:
+        preprocess = lambda data: service._preprocess(data)[0]
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    verdict = None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        batch = preprocess(image_bytes)
+        if with_model:
+            verdict = service._infer(batch)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        "mode": mode,
+        "p50_ms": statistics.median(latencies),
+        "max_ms": max(latencies),
+        "peak_rss_mb": peak_kb / 1024,
+        "rss_growth_mb": (peak_kb - baseline_kb) / 1024,
+        "verdict": verdict,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="path gambar uji (default: JPEG sintetis 12 MP)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--with-model", action="store_true")
+    parser.add_argument("--child", choices=["legacy", "reduced"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.image, args.iterations, args.with_model)
+        return
+
+    image_path = args.image
+    if not image_path:
+        image_path = os.path.join(tempfile.mkdtemp(), "bench_12mp.jpg")
+        synthetic_jpeg(image_path)
+
+    results = {}
+    for mode in ("legacy", "reduced"):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--image", image_path,
+               "--iterations", str(args.iterations)]
+        if args.with_model:
+            cmd.append("--with-model")
+        env = dict(os.environ, IMAGE_REDUCED_DECODE="true", WARMUP_MODELS="false")
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=BASE_DIR, env=env).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Gambar: {image_path} ({os.path.getsize(image_path) / 1024:.0f} KB), {args.iterations} iterasi")
+    for mode, r in results.items():
+        print(f"{mode:<8} p50 {r['p50_ms']:7.1f} ms  max {r['max_ms']:7.1f} ms  "
+              f"peak RSS {r['peak_rss_mb']:7.1f} MB  (+{r['rss_growth_mb']:.1f} MB saat preprocessing)")
+    if args.with_model:
+        same = results["legacy"]["verdict"] == results["reduced"]["verdict"]
+        print(f"Verdict lama {results['legacy']['verdict']}, baru {results['reduced']['verdict']}: "
+              f"{'sama' if same else 'BERBEDA'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark memori worker gunicorn untuk model ONNX, per strategi preload:
+
+    none      tanpa preload: setiap worker memuat aset dan membuat session sendiri
+    sessions  master memuat aset + session (warmup), worker membuat session ulang
+              (perilaku lama; session milik master ikut terbawa ke setiap worker)
+    assets    master hanya memuat aset read-only (preload), session dibuat di worker
+
+Setiap strategi dijalankan di subprocess tersendiri yang berperan sebagai master:
+memuat model sesuai strategi, gc.freeze(), fork N worker, menunggu semua worker
+selesai warmup, lalu mengukur PSS/USS master dan worker (psutil, Linux).
+
+    python load_tests/bench_preload_memory.py
+    python load_tests/bench_preload_memory.py --workers 4 --mode assets --mode sessions
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+MODES = ("none", "sessions", "assets")
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1)
+
+
+def _worker(mode, ready_w, stop_r):
+    from app.services import model_registry
+
+    if mode == "none":
+        model_registry.warmup()
+    else:
+        model_registry.reload_after_fork()
+    os.write(ready_w, b"1")
+    os.read(stop_r, 1)
+    os._exit(0)
+
+
+def run_child(mode, workers):
+    import psutil
+    from app.services import model_registry
+
+    if mode == "sessions":
+        model_registry.warmup()
+    elif mode == "assets":
+        model_registry.preload()
+    else:
+        model_registry._ensure_registered()
+    gc.collect()
+    gc.freeze()
+
+    ready_r, ready_w = os.pipe()
+    stop_r, stop_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            _worker(mode, ready_w, stop_r)
+        pids.append(pid)
+
+    for _ in pids:
+        os.read(ready_r, 1)
+
+    master = psutil.Process().memory_full_info()
+    worker_info = [psutil.Process(pid).memory_full_info() for pid in pids]
+    os.write(stop_w, b"1" * len(pids))
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(json.dumps({
+        "mode": mode,
+        "master_pss_mb": _mb(master.pss),
+        "worker_pss_mb": [_mb(info.pss) for info in worker_info],
+        "worker_uss_mb": [_mb(info.uss) for info in worker_info],
+        "total_pss_mb": _mb(master.pss + sum(info.pss for info in worker_info)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--mode", dest="modes", action="append", choices=MODES,
+                        help="strategi yang diukur (boleh berulang); default semua")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.workers)
+        return
+
+    results = {}
+    for mode in (args.modes or MODES):
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--workers", str(args.workers)]
+        env = dict(os.environ, WARMUP_MODELS="false", INFERENCE_SOCKET_PATH="")
+        output = subprocess.run(cmd, check=True, capture_output=True, text=True, cwd=BASE_DIR, env=env).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{args.workers} worker")
+    for mode, r in results.items():
+        print(f"{mode:<9} total PSS {r['total_pss_mb']:7.1f} MB  master {r['master_pss_mb']:6.1f} MB  "
+              f"USS/worker {max(r['worker_uss_mb']):6.1f} MB")
+    if "sessions" in results and "assets" in results:
+        saved = results["sessions"]["total_pss_mb"] - results["assets"]["total_pss_mb"]
+        print(f"Hemat dengan preload aset saja (vs session di master): {saved:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
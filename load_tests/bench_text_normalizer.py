@@ -0,0 +1,59 @@
+"""Benchmark throughput post_preprocess_text: implementasi lama vs TextNormalizer.
+
+    python load_tests/bench_text_normalizer.py --repeat 5
+
+Dua beban: caption (panjang, emoji, URL, leetspeak) dan pesan chat pendek.
+Cek kesetaraan keluaran dengan load_tests/text_normalizer_golden.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.text_utils import post_preprocess_text, get_post_normalizer
+from text_normalizer_golden import legacy_post_preprocess_text
+
+CAPTIONS = [
+    "Hari ini aku seneng bgt 😂 jalan2 ke pantai bareng temen2, siapaluh yang mau ikut? https://t.co/xyz #liburan",
+    "Akhirnya lulus juga!!! Makasih buat semua yang udah support aku selama ini 🙏🎓 #wisuda #proud",
+    "Jangan lupa minum air putih & istirahat cukup ya teman2, kesehatan mental itu penting 💚",
+    "RT @user: tips belajar efektif: 1) fokus 25 menit 2) istirahat 5 menit. cek www.contoh.com/belajar",
+    "g0bl0k b4ngetttt sih lu, kenapaluh gitu sama temen sendiri???",
+]
+CHATS = ["wkwk", "ok", "makasih ya", "otw", "siap kak", "g0bl0k lu", "4nj1ng", "hahaha", "oke deh", "ntar ya"]
+
+
+def run(fn, texts, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            fn(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000, help="jumlah teks per beban")
+    parser.add_argument("--repeat", type=int, default=3, help="ambil waktu terbaik dari N putaran")
+    args = parser.parse_args()
+
+    get_post_normalizer()
+    workloads = {
+        "caption": (CAPTIONS * (args.size // len(CAPTIONS) + 1))[:args.size],
+        "chat": (CHATS * (args.size // len(CHATS) + 1))[:args.size],
+    }
+
+    for name, texts in workloads.items():
+        legacy = run(legacy_post_preprocess_text, texts, args.repeat)
+        current = run(post_preprocess_text, texts, args.repeat)
+        print(f"{name:<8} lama {legacy:9.0f} teks/detik   baru {current:9.0f} teks/detik   ({current / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
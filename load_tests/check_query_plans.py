@@ -0,0 +1,194 @@
+"""Cek regresi query plan untuk query-query panas.
+
+Jalankan terhadap Postgres lokal yang sudah di-seed (bukan production):
+
+    python load_tests/seed_data.py
+    python load_tests/check_query_plans.py --seed 200000
+    python load_tests/check_query_plans.py            # cek saja, tanpa seed
+
+Setiap query di-EXPLAIN (FORMAT JSON). Script keluar dengan kode 1 jika ada
+Seq Scan pada tabel yang estimasi barisnya >= --min-rows.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, tuple_, exists, and_
+from app import create_app
+from app.extensions import db
+from app.models import (
+    User, Post, Comment, Connection, PostLike, BlockedUser, Notification,
+    ChatParticipant, Message, Appeal, Report, BotMessage
+)
+
+SEED_SQL = [
+    """
+    INSERT INTO posts (id, user_id, caption, moderation_status, likes_count, comments_count, created_at)
+    SELECT gen_random_uuid(), u.ids[1 + g % array_length(u.ids, 1)], 'seed post ' || g,
+           CASE WHEN g % 25 = 0 THEN 'rejected' ELSE 'approved' END, 0, 0,
+           NOW() - (g || ' seconds')::interval
+    FROM generate_series(1, :rows) g, (SELECT array_agg(id) AS ids FROM users) u
+    """,
+    """
+    INSERT INTO comments (id, post_id, user_id, text, moderation_status, created_at)
+    SELECT gen_random_uuid(), p.id, p.user_id, 'seed comment', 'approved', p.created_at
+    FROM posts p WHERE p.caption LIKE 'seed post %'
+    """,
+    """
+    INSERT INTO connections (follower_id, following_id, created_at)
+    SELECT a.id, b.id, NOW() FROM users a, users b
+    WHERE a.id <> b.id AND (hashtext(a.id::text || b.id::text) % 10) = 0
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO notifications (id, recipient_id, sender_id, type, text, is_read, created_at)
+    SELECT gen_random_uuid(), u.ids[1 + g % array_length(u.ids, 1)], u.ids[1 + (g + 1) % array_length(u.ids, 1)],
+           'like', 'seed', FALSE, NOW() - (g || ' seconds')::interval
+    FROM generate_series(1, :rows) g, (SELECT array_agg(id) AS ids FROM users) u
+    """,
+    """
+    INSERT INTO chats (id, is_group, name, created_at)
+    SELECT gen_random_uuid(), FALSE, 'seed chat ' || g, NOW() FROM generate_series(1, 200) g
+    """,
+    """
+    INSERT INTO messages (id, chat_id, sender_id, text, type, sent_at)
+    SELECT gen_random_uuid(), c.ids[1 + g % array_length(c.ids, 1)], u.ids[1 + g % array_length(u.ids, 1)],
+           'seed message', 'text', NOW() - (g || ' seconds')::interval
+    FROM generate_series(1, :rows) g,
+         (SELECT array_agg(id) AS ids FROM chats WHERE name LIKE 'seed chat %') c,
+         (SELECT array_agg(id) AS ids FROM users) u
+    """,
+    """
+    INSERT INTO bot_chats (id, user_id, created_at, updated_at)
+    SELECT gen_random_uuid(), id, NOW(), NOW() FROM users
+    """,
+    """
+    INSERT INTO bot_messages (id, bot_chat_id, role, content, sent_at)
+    SELECT gen_random_uuid(), b.ids[1 + g % array_length(b.ids, 1)], 'user', 'seed', NOW() - (g || ' seconds')::interval
+    FROM generate_series(1, :rows) g, (SELECT array_agg(id) AS ids FROM bot_chats) b
+    """,
+    """
+    INSERT INTO reports (reporter_user_id, reported_post_id, reason, status, created_at)
+    SELECT p.user_id, p.id, 'seed', CASE WHEN hashtext(p.id::text) % 10 = 0 THEN 'pending' ELSE 'resolved' END, p.created_at
+    FROM posts p WHERE p.caption LIKE 'seed post %'
+    """,
+    """
+    INSERT INTO appeals (user_id, content_type, content_id, justification, status, created_at)
+    SELECT p.user_id, 'post', p.id, 'seed', 'pending', p.created_at
+    FROM posts p WHERE p.moderation_status = 'rejected' AND p.caption LIKE 'seed post %'
+    """,
+]
+
+
+def seed(rows):
+    if not db.session.query(User.id).first():
+        sys.exit("Tabel users kosong. Jalankan load_tests/seed_data.py dulu.")
+    for sql in SEED_SQL:
+        db.session.execute(text(sql), {'rows': rows})
+    db.session.commit()
+    print(f"Seed selesai ({rows} baris untuk tabel besar).")
+
+
+def build_queries():
+    viewer_id = db.session.query(User.id).first()[0]
+    sample_post = db.session.query(Post.created_at, Post.id).order_by(Post.created_at.desc()).offset(100).first()
+    chat_id = db.session.query(Message.chat_id).first()
+    bot_chat_id = db.session.query(BotMessage.bot_chat_id).first()
+    post_id = sample_post.id if sample_post else viewer_id
+
+    queries = {
+        'feed latest (offset)': Post.query.filter(Post.moderation_status == 'approved')
+            .order_by(Post.created_at.desc()).limit(21),
+        'profile posts': Post.query.filter(Post.user_id == viewer_id, Post.moderation_status == 'approved')
+            .order_by(Post.created_at.desc()).limit(21),
+        'following timeline rebuild': db.session.query(Post.id, Post.created_at)
+            .join(Connection, Connection.following_id == Post.user_id)
+            .filter(
+                Connection.follower_id == viewer_id,
+                Post.moderation_status == 'approved',
+                ~exists().where(and_(BlockedUser.blocker_id == viewer_id, BlockedUser.blocked_id == Post.user_id))
+            ).order_by(Post.created_at.desc()).limit(800),
+        'followers list': Connection.query.filter(Connection.following_id == viewer_id)
+            .order_by(Connection.created_at.desc()).limit(20),
+        'post comments': Comment.query.filter(Comment.post_id == post_id, Comment.parent_comment_id.is_(None))
+            .order_by(Comment.created_at.asc()),
+        'post likes count': db.session.query(PostLike.user_id).filter(PostLike.post_id == post_id),
+        'blocked by': db.session.query(BlockedUser.blocker_id).filter(BlockedUser.blocked_id == viewer_id),
+        'notifications': Notification.query.filter(Notification.recipient_id == viewer_id)
+            .order_by(Notification.created_at.desc()).limit(20),
+        'inbox participants': ChatParticipant.query.filter(ChatParticipant.user_id == viewer_id),
+        'appeal by content': Appeal.query.filter(Appeal.content_id == post_id),
+        'pending reports': Report.query.filter(Report.status == 'pending')
+            .order_by(Report.created_at.desc()).limit(20),
+    }
+    if sample_post:
+        queries['feed latest (cursor)'] = Post.query.filter(
+            Post.moderation_status == 'approved',
+            tuple_(Post.created_at, Post.id) < tuple_(sample_post.created_at, sample_post.id)
+        ).order_by(Post.created_at.desc(), Post.id.desc()).limit(21)
+    if chat_id:
+        queries['chat history'] = Message.query.filter(Message.chat_id == chat_id[0])\
+            .order_by(Message.sent_at.desc()).limit(50)
+    if bot_chat_id:
+        queries['bot chat history'] = BotMessage.query.filter(BotMessage.bot_chat_id == bot_chat_id[0])\
+            .order_by(BotMessage.sent_at.asc())
+    return queries
+
+
+def table_sizes():
+    rows = db.session.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+    ))
+    return {name: count for name, count in rows}
+
+
+def seq_scans(plan):
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found += seq_scans(child)
+    return found
+
+
+def explain(query):
+    statement = getattr(query, 'statement', query)
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    result = db.session.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan[0]['Plan']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN query panas dan gagal jika ada Seq Scan pada tabel besar.")
+    parser.add_argument('--seed', type=int, default=0, help="Isi tabel besar dengan N baris sintetis sebelum cek.")
+    parser.add_argument('--min-rows', type=int, default=10000, help="Batas estimasi baris sebuah tabel dianggap besar.")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.seed:
+            seed(args.seed)
+        db.session.execute(text("ANALYZE"))
+
+        sizes = table_sizes()
+        failures = []
+        for name, query in build_queries().items():
+            plan = explain(query)
+            large = [t for t in seq_scans(plan) if sizes.get(t, 0) >= args.min_rows]
+            status = "FAIL" if large else "ok"
+            print(f"[{status:4}] {name:28} cost={plan['Total Cost']:.1f}" + (f"  seq scan: {', '.join(large)}" if large else ""))
+            if large:
+                failures.append(name)
+
+        if failures:
+            print(f"\n{len(failures)} query memakai Seq Scan pada tabel >= {args.min_rows} baris.")
+            sys.exit(1)
+        print("\nSemua query memakai index.")
+
+
+if __name__ == "__main__":
+    main()
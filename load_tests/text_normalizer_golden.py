@@ -0,0 +1,157 @@
+"""Bukti bahwa TextNormalizer (post_preprocess_text) identik byte per byte dengan
+implementasi lama.
+
+Script ini menyimpan salinan implementasi lama (`legacy_post_preprocess_text`)
+dan membandingkan keduanya pada korpus contoh caption/komentar/chat serta
+string acak (seed tetap) yang sengaja dirakit dari potongan rawan: leetspeak,
+akhiran lu/luh, entity HTML, URL, emoji, huruf kapital dan karakter non-ASCII.
+
+    python load_tests/text_normalizer_golden.py                 # korpus + 200000 string acak
+    python load_tests/text_normalizer_golden.py --fuzz 1000000
+    python load_tests/text_normalizer_golden.py --write load_tests/post_preprocess_golden.jsonl
+    python load_tests/text_normalizer_golden.py --golden load_tests/post_preprocess_golden.jsonl
+
+Keluar dengan kode 1 jika ada satu saja keluaran yang berbeda.
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import emoji
+from app.utils.text_utils import (
+    POST_SPECIAL_VOWEL, POST_LEET_MAP, POST_CUSTOM_STOPWORDS,
+    get_post_norm_dict, post_preprocess_text
+)
+
+CORPUS = [
+    "",
+    "Hari ini aku seneng bgt 😂 jalan2 ke pantai bareng temen2!!!",
+    "siapaluh yang ngambil?? apalu mau ribut hah",
+    "kenapaluh diem aja, sanaluh pergi",
+    "g0bl0k b4ngs4t 4nj1ng l0",
+    "43a 1a a1 @nj1ng $4y4ng",
+    "RT @user: cek www.contoh.com/promo sekarang http://t.co/abc",
+    "Tom&amp;Jerry &lt;3 kamu/dia",
+    "camelCaseTextDisini dan_underscore",
+    "wkwkwkwk", "ok", "makasih ya", "p", "gws yaa", "mantappp!!!???...",
+    "jam 10 ketemu di lt.2 ya", "harga 50.000 aja", "\\x89\\xf0 rusak",
+    "Semangat 💪🔥 untuk ujian besok",
+    "yang dan atau dengan adalah itu ini",
+    "beginiluh caranya, bawaluh sini",
+    "malu lu luh, kalo lu gitu",
+    "İstanbul straße café",
+]
+
+PIECES = [
+    'siapa', 'apa', 'mana', 'dia', 'kenapa', 'ada', 'bawa', 'sana', 'sini', 'begitu',
+    'lu', 'luh', 'l', 'u', 'h', 'a', 'e', 'i', 'o', 'b', 'k', 's', 't',
+    '0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '@', '$',
+    ' ', '  ', '.', '..', '!', '!!', '?', '??', '-', '_', '/', '&', '&amp;', '\\x41',
+    'http://x.y/z', 'www.a.b', 'rt', 'user', 'Ab', 'aB', 'yang', 'dan', 'ke',
+    '😂', '🔥', '💪', 'é', 'ß', 'İ', '\n', '\t', 'aaa', 'AAA', '1a', '43a', 'Siapa', 'LU',
+]
+
+
+def legacy_post_preprocess_text(text: str) -> str:
+    post_norm_dict = get_post_norm_dict()
+    text = str(text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = text.lower()
+    text = html.unescape(text)
+    text = re.sub(r'\\x[a-zA-Z0-9]+', ' ', text)
+    text = re.sub(r'\b(rt|user)\b', ' ', text)
+    text = re.sub(r'http\S+|www\.\S+', ' ', text)
+    text = re.sub(r'\s*&\s*', ' dan ', text)
+    text = re.sub(r'\s*/\s*', ' atau ', text)
+    text = text.replace('_', ' ')
+    text = emoji.demojize(text, delimiters=(" :", ": "))
+
+    for word in POST_SPECIAL_VOWEL:
+        text = re.sub(rf'\b{word}luh?\b', f'{word} lu', text)
+    text = re.sub(r'([^aeiou\s])luh?\b', r'\1 lu', text)
+
+    words = text.split()
+    new_words = []
+    for word in words:
+        if word in post_norm_dict:
+            new_words.append(post_norm_dict[word])
+        elif word.isdigit():
+            new_words.append(word)
+        else:
+            temp_word = word
+            for char, repl in POST_LEET_MAP.items():
+                temp_word = re.sub(f"(?<=[a-z]){re.escape(char)}|{re.escape(char)}(?=[a-z])", repl, temp_word)
+            new_words.append(post_norm_dict.get(temp_word, temp_word))
+
+    cleaned_tokens = [w for w in new_words if w not in POST_CUSTOM_STOPWORDS]
+    text = ' '.join(cleaned_tokens)
+    text = re.sub(r'(?<=[a-zA-Z])\.(?=[a-zA-Z])', '', text)
+    text = re.sub(r'[^a-zA-Z0-9\s.,!?\'"-]', '', text)
+    text = re.sub(r'(!)\1+', r'\1', text)
+    text = re.sub(r'(\?)\1+', r'\1', text)
+    text = re.sub(r'(\.)\1+', r'\1', text)
+    text = re.sub(r'(.)\1{2,}', r'\1\1', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def fuzz_inputs(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=200000, help="jumlah string acak")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--write", help="simpan pasangan input/output lama sebagai golden file JSONL")
+    parser.add_argument("--golden", help="cek post_preprocess_text terhadap golden file JSONL")
+    args = parser.parse_args()
+
+    mismatches = 0
+    checked = 0
+
+    if args.golden:
+        with open(args.golden, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                checked += 1
+                actual = post_preprocess_text(row["input"])
+                if actual != row["output"]:
+                    mismatches += 1
+                    if mismatches <= 20:
+                        print(f"BEDA {row['input']!r}: golden={row['output']!r} baru={actual!r}")
+        print(f"{checked} baris golden dicek, {mismatches} berbeda")
+        sys.exit(1 if mismatches else 0)
+
+    inputs = list(CORPUS) + list(fuzz_inputs(args.fuzz, args.seed))
+
+    if args.write:
+        with open(args.write, "w", encoding="utf-8") as f:
+            for text in inputs:
+                f.write(json.dumps({"input": text, "output": legacy_post_preprocess_text(text)}, ensure_ascii=False) + "\n")
+        print(f"{len(inputs)} baris golden ditulis ke {args.write}")
+        return
+
+    for text in inputs:
+        checked += 1
+        expected = legacy_post_preprocess_text(text)
+        actual = post_preprocess_text(text)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"BEDA {text!r}: lama={expected!r} baru={actual!r}")
+
+    print(f"{checked} input dicek ({len(CORPUS)} korpus + {args.fuzz} acak), {mismatches} berbeda")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.post_moderation_service import run_worker
+from app.services.model_registry import warmup
+
+# Worker moderasi post untuk mode ASYNC_POST_MODERATION=true.
+# Jalankan sebagai proses terpisah (bisa lebih dari satu): python moderation_worker.py
+if __name__ == '__main__':
+    app = create_app()
+    warmup(['post_classification', 'image_moderation'])
+    run_worker(app)
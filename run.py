@@ -3,13 +3,24 @@ monkey.patch_all()
 
 import sys
 import os
-from app import create_app as pembuat_aplikasi
-from app.extensions import socketio
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from app import create_app as pembuat_aplikasi
+from app.extensions import socketio
+from app.config import Config
+from app.services.model_registry import warmup, preload
+
 amica_app_obj = pembuat_aplikasi()
 
+if Config.WARMUP_MODELS:
+    # Di master gunicorn (preload_app) hanya aset read-only yang dimuat; session
+    # ONNX dibuat dan dipanaskan per worker di post_worker_init.
+    if os.environ.get('PRELOAD_MODEL_ASSETS_ONLY', 'false').lower() == 'true':
+        preload()
+    else:
+        warmup()
+
 if __name__ == '__main__':    
     socketio.run(
         amica_app_obj, 
@@ -21,5 +32,6 @@ if __name__ == '__main__':
     )
 
 # NOTES(pengingat) = gunicorn -k gevent -w 2 run:amica_app_obj
+# Konfigurasi worker, preload dan hook fork ada di gunicorn.conf.py (cukup: gunicorn run:amica_app_obj).
 # Nanti di server asli, pastikan perintah itu dimasukkan ke dalam System Service (systemd).
 # Jadi nanti, servernya akan berjalan otomatis di background 24 jam nonstop, meski servernya habis restart.
\ No newline at end of file